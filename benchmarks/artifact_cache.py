@@ -0,0 +1,83 @@
+"""
+Compares loading the serving artifacts of a model version from the artifact store, from the
+disk mirror and from memory of the `ArtifactCache`, once their versions are resolved.
+
+The artifacts of every tier are checked to predict the same probabilities as the ones loaded
+from the artifact store. It needs a ZenML store with a trained `titanic_xgboost` model version.
+
+Usage:
+    python benchmarks/artifact_cache.py --model-version latest --repeats 5
+"""
+
+import argparse
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+import xgboost as xgb
+from zenml.client import Client
+from zenml.models import ArtifactVersionResponse
+
+from titanicsurvivors.utils.cache import (
+    ArtifactCache,
+    resolve_serving_artifact_versions,
+)
+
+
+def timed_load(
+    artifact_versions: dict[str, ArtifactVersionResponse],
+    cache: ArtifactCache,
+    repeats: int,
+) -> tuple[dict[str, Any], float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        artifacts = {
+            attribute: cache.load(artifact_version)
+            for attribute, artifact_version in artifact_versions.items()
+        }
+        timings.append(time.perf_counter() - start)
+    return artifacts, float(np.median(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model-version", default="latest")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    # The artifact versions are resolved once, so only the loads of the artifacts are timed.
+    artifact_versions = resolve_serving_artifact_versions(
+        Client().get_model_version("titanic_xgboost", args.model_version)
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ArtifactCache(cache_dir=cache_dir)
+        results = {}
+        timings = {}
+        results["store"], timings["store"] = timed_load(artifact_versions, cache, 1)
+        cache.clear()
+        results["disk"], timings["disk"] = timed_load(artifact_versions, cache, 1)
+        results["memory"], timings["memory"] = timed_load(
+            artifact_versions, cache, args.repeats
+        )
+
+    for name in ("store", "disk", "memory"):
+        print(f"{name:>7}: {timings[name] * 1000:10.2f} ms")
+    model = results["store"]["model"]
+    inputs = xgb.DMatrix(
+        np.random.default_rng(0).random((1000, model.num_features())),
+        feature_names=model.feature_names,
+    )
+    for name in ("disk", "memory"):
+        np.testing.assert_array_equal(
+            results[name]["model"].predict(inputs), model.predict(inputs)
+        )
+    print(
+        f"identical predictions from every tier, memory speedup "
+        f"{timings['store'] / timings['memory']:.0f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Measures the throughput and the memory of batch scoring by the number of worker processes.
+
+Scaled-up copies of `data/train.csv` without the labels are written to CSV and scored with
+`score_passenger_batches` into partitioned Parquet, each run in a fresh process whose peak
+resident memory and the one of its largest worker are reported. The benchmark checks that the
+predictions of every run equal the ones of transforming and predicting the whole file at once.
+
+Usage:
+    python benchmarks/batch_scoring.py --repeat-rows 100 400 --workers 1 2 4
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import join
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from titanicsurvivors.steps.data_cleaning import (
+    fit_missing_value_medians,
+    handle_missing_values,
+)
+from titanicsurvivors.steps.dataset import encode_features, fit_feature_encoders
+from titanicsurvivors.steps.feature_engineering.common import engineer_features
+from titanicsurvivors.steps.feature_engineering.ticket import (
+    build_ticket_frequency_index,
+)
+from titanicsurvivors.steps.inference import (
+    PassengerScorer,
+    read_passenger_batches,
+    score_passenger_batches,
+    transform_passengers,
+)
+from titanicsurvivors.utils.data import DataFrameColumns
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+PARAMS = {
+    "max_depth": 6,
+    "eta": 0.1,
+    "objective": "binary:logistic",
+    "tree_method": "hist",
+}
+NUM_BOOST_ROUND = 100
+
+
+def fit_scorer(model_path: str) -> PassengerScorer:
+    raw_data = pd.read_csv(TRAIN_DATA_PATH)
+    features, age_categories, fare_categories, _ = engineer_features.entrypoint(
+        data=handle_missing_values.entrypoint(raw_data.copy())
+    )
+    encoders = fit_feature_encoders(data=features)
+    inputs = encode_features(data=features, encoders=encoders)
+    targets = inputs.pop(DataFrameColumns.SURVIVED.value)
+    dtrain = xgb.DMatrix(inputs[inputs.columns.sort_values()], label=targets)
+    xgb.train(PARAMS, dtrain, num_boost_round=NUM_BOOST_ROUND).save_model(model_path)
+    age_medians, fare_medians = fit_missing_value_medians.entrypoint(data=raw_data)
+    return PassengerScorer(
+        model_path=model_path,
+        encoders=encoders,
+        age_medians=age_medians,
+        fare_medians=fare_medians,
+        age_categories=age_categories,
+        fare_categories=fare_categories,
+        ticket_frequencies=build_ticket_frequency_index(data=raw_data),
+    )
+
+
+def write_scaled_passengers(repeat_rows: int, path: str) -> None:
+    data = pd.read_csv(TRAIN_DATA_PATH).drop(columns=DataFrameColumns.SURVIVED.value)
+    for copy in range(repeat_rows):
+        data.assign(
+            **{
+                DataFrameColumns.PASSENGER_ID.value: data[
+                    DataFrameColumns.PASSENGER_ID.value
+                ]
+                + copy * len(data)
+            }
+        ).to_csv(path, mode="a", header=copy == 0, index=False)
+
+
+def run(n_workers: str, path: str, scorer_path: str, output_path: str) -> None:
+    n_workers = int(n_workers)
+    scorer = joblib.load(scorer_path)
+    scorer.nthread = max(os.cpu_count() // n_workers, 1)
+    start = time.perf_counter()
+    rows, _, _ = score_passenger_batches(
+        scorer=scorer,
+        batches=read_passenger_batches([path]),
+        output_path=output_path,
+        n_workers=n_workers,
+    )
+    seconds = time.perf_counter() - start
+    peak_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    worker_peak_bytes = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+    print(json.dumps([rows, seconds, peak_bytes, worker_peak_bytes]))
+
+
+def expected_probabilities(path: str, scorer: PassengerScorer) -> np.ndarray:
+    model = xgb.Booster(model_file=scorer.model_path)
+    inputs = transform_passengers(
+        data=pd.read_csv(path),
+        encoders=scorer.encoders,
+        age_medians=scorer.age_medians,
+        fare_medians=scorer.fare_medians,
+        age_categories=scorer.age_categories,
+        fare_categories=scorer.fare_categories,
+        ticket_frequencies=scorer.ticket_frequencies,
+    )
+    return model.predict(xgb.DMatrix(inputs[model.feature_names]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat-rows", type=int, nargs="+", default=[100, 400])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--run", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(*args.run)
+        return
+
+    print(
+        f"{'rows':>9} {'workers':>7} {'seconds':>8} {'rows/s':>9} "
+        f"{'peak MiB':>9} {'worker MiB':>10}"
+    )
+    with tempfile.TemporaryDirectory() as data_dir:
+        scorer = fit_scorer(join(data_dir, "model.ubj"))
+        scorer_path = join(data_dir, "scorer.joblib")
+        joblib.dump(scorer, scorer_path)
+        for repeat_rows in args.repeat_rows:
+            path = join(data_dir, f"passengers_{repeat_rows}.csv")
+            write_scaled_passengers(repeat_rows, path)
+            expected = None
+            for n_workers in args.workers:
+                output_path = join(data_dir, f"predictions_{repeat_rows}_{n_workers}")
+                os.makedirs(output_path)
+                # Every run gets a fresh process, so its peak memory is its own.
+                output = subprocess.run(
+                    [
+                        sys.executable,
+                        __file__,
+                        "--run",
+                        str(n_workers),
+                        path,
+                        scorer_path,
+                        output_path,
+                    ],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                rows, seconds, peak_bytes, worker_peak_bytes = json.loads(
+                    output.splitlines()[-1]
+                )
+                print(
+                    f"{rows:>9} {n_workers:>7} {seconds:>8.2f} {rows / seconds:>9.0f} "
+                    f"{peak_bytes / 2**20:>9.0f} {worker_peak_bytes / 2**20:>10.0f}"
+                )
+                if expected is None:
+                    expected = expected_probabilities(path, scorer)
+                predictions = pd.read_parquet(output_path).sort_values(
+                    DataFrameColumns.PASSENGER_ID.value
+                )
+                np.testing.assert_array_equal(
+                    predictions[DataFrameColumns.SURVIVAL_PROBABILITY.value], expected
+                )
+    print("batch predictions equal the predictions of the whole file for every run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Compares the compiled forest with `Booster.predict` from a single row up to a million rows.
+
+A booster is trained on the encoded features of `data/train.csv` with the deep trees of the
+training pipeline and compiled with `compile_booster`. For every batch size the benchmark checks
+that the forest predicts the same margins as the booster and probabilities that differ at most
+in their last float32 bit, then reports the median latency of `Booster.predict` on a DMatrix,
+of `Booster.inplace_predict` and of the forest.
+
+Usage:
+    python benchmarks/compiled_forest.py --max-depth 50 --rounds 100 --categorical
+"""
+
+import argparse
+import os
+import time
+from os.path import join
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.dataset import (
+    encode_categorical_features,
+    encode_features,
+    fit_feature_encoders,
+)
+from titanicsurvivors.steps.feature_engineering.common import engineer_features
+from titanicsurvivors.utils.cross_validation import to_feature_matrix
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.forest import compile_booster
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def encoded_features(categorical: bool) -> tuple[pd.DataFrame, pd.Series]:
+    data = handle_missing_values.entrypoint(pd.read_csv(TRAIN_DATA_PATH))
+    features, _, _, _ = engineer_features.entrypoint(data=data)
+    encode = encode_categorical_features if categorical else encode_features
+    inputs = encode(data=features, encoders=fit_feature_encoders(data=features))
+    targets = inputs.pop(DataFrameColumns.SURVIVED.value)
+    return inputs[inputs.columns.sort_values()], targets
+
+
+def median_seconds(function, batch_size: int) -> float:
+    # Small batches are repeated, so their latency is not a single noisy measurement.
+    repeats = max(1, min(200, 100_000 // batch_size))
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--max-depth", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--categorical", action="store_true")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    args = parser.parse_args()
+
+    inputs, targets = encoded_features(args.categorical)
+    booster = xgb.train(
+        {"max_depth": args.max_depth, "eta": 0.1, "objective": "binary:logistic"},
+        xgb.DMatrix(inputs, label=targets, enable_categorical=True),
+        num_boost_round=args.rounds,
+    )
+    forest = compile_booster(booster)
+    print(
+        f"{forest.num_trees} trees, {forest.num_nodes} nodes, depth {forest.depth}, "
+        f"{'native categorical' if args.categorical else 'one-hot'} features"
+    )
+
+    matrix, feature_types = to_feature_matrix(inputs)
+    rng = np.random.default_rng(0)
+    print(
+        f"{'rows':>9} {'predict ms':>11} {'inplace ms':>11} {'forest ms':>10} "
+        f"{'vs predict':>10}"
+    )
+    for batch_size in args.batch_sizes:
+        batch = matrix[rng.integers(0, len(matrix), batch_size)]
+
+        def predict(batch=batch):
+            return booster.predict(
+                xgb.DMatrix(
+                    batch,
+                    feature_names=booster.feature_names,
+                    feature_types=feature_types,
+                    enable_categorical=True,
+                )
+            )
+
+        def inplace_predict(batch=batch):
+            return booster.inplace_predict(batch, validate_features=False)
+
+        def forest_predict(batch=batch):
+            return forest.predict(batch)
+
+        np.testing.assert_array_equal(
+            forest.predict_margin(batch),
+            booster.inplace_predict(
+                batch, validate_features=False, predict_type="margin"
+            ),
+        )
+        np.testing.assert_allclose(forest_predict(), predict(), rtol=0, atol=1.2e-7)
+        timings = [
+            median_seconds(function, batch_size)
+            for function in (predict, inplace_predict, forest_predict)
+        ]
+        print(
+            f"{batch_size:>9} {timings[0] * 1000:>11.3f} {timings[1] * 1000:>11.3f} "
+            f"{timings[2] * 1000:>10.3f} {timings[0] / timings[2]:>9.1f}x"
+        )
+    print("identical margins for every batch size")
+
+
+if __name__ == "__main__":
+    main()
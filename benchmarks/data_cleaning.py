@@ -0,0 +1,75 @@
+"""
+Compares the vectorised missing value handling with the former row-wise implementation.
+
+The benchmark resamples the rows of `data/train.csv` to a large synthetic frame and checks that
+the filled 'Age' and the 'Deck' columns of both implementations are identical.
+
+Usage:
+    python benchmarks/data_cleaning.py --rows 10000000
+"""
+
+import argparse
+import os
+import time
+from os.path import join
+
+import numpy as np
+import pandas as pd
+
+from titanicsurvivors.steps.data_cleaning import fill_missing_age, replace_cabin_w_deck
+from titanicsurvivors.utils.data import DataFrameColumns
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+
+
+def legacy_fill_missing_age(data: pd.DataFrame) -> pd.Series:
+    return data.groupby(
+        [DataFrameColumns.SEX.value, DataFrameColumns.TICKET_CLASS.value]
+    )[DataFrameColumns.AGE.value].transform(lambda x: x.fillna(x.median()))
+
+
+def legacy_replace_cabin_w_deck(data: pd.DataFrame) -> pd.Series:
+    deck = data[DataFrameColumns.CABIN_NUMBER.value].apply(
+        lambda cabin_number: cabin_number[0] if pd.notnull(cabin_number) else "M"
+    )
+    deck[deck == "T"] = "A"
+    deck = deck.replace(["A", "B", "C"], "ABC")
+    deck = deck.replace(["D", "E"], "DE")
+    return deck.replace(["F", "G"], "FG")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    train_data = pd.read_csv(TRAIN_DATA_PATH)
+    rows = np.random.default_rng(0).integers(0, len(train_data), size=args.rows)
+    data = train_data.iloc[rows].reset_index(drop=True)
+
+    timings = {}
+    for name, age, deck in (
+        ("legacy", legacy_fill_missing_age, legacy_replace_cabin_w_deck),
+        ("vectorised", fill_missing_age, replace_cabin_w_deck),
+    ):
+        start = time.perf_counter()
+        filled_age = age(data=data)
+        age_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        grouped_deck = deck(data=data)
+        deck_seconds = time.perf_counter() - start
+        timings[name] = (filled_age, grouped_deck, age_seconds, deck_seconds)
+        print(f"{name:>10}: age {age_seconds:8.3f} s, deck {deck_seconds:8.3f} s")
+
+    legacy_age, legacy_deck, legacy_age_s, legacy_deck_s = timings["legacy"]
+    age, deck, age_s, deck_s = timings["vectorised"]
+    pd.testing.assert_series_equal(legacy_age, age, check_names=False)
+    pd.testing.assert_series_equal(legacy_deck, deck.astype(object), check_names=False)
+    print(
+        f"identical output with {args.rows} rows, speedup age "
+        f"{legacy_age_s / age_s:.1f}x, deck {legacy_deck_s / deck_s:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark of the family size grouping against the former row-wise implementation.
+
+Usage:
+    python benchmarks/family_size.py --rows 10000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from titanicsurvivors.steps.feature_engineering.family_size import (
+    add_family_size,
+    group_family_size,
+)
+from titanicsurvivors.utils.data import DataFrameColumns
+
+
+def legacy_get_family_size_group(family_size: int) -> str | None:
+    if family_size == 1:
+        return "Alone"
+    if 1 < family_size < 5:
+        return "Small"
+    if family_size >= 5:
+        return "Large"
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        {
+            DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value: rng.integers(
+                0, 9, size=args.rows
+            ),
+            DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value: rng.integers(
+                0, 7, size=args.rows
+            ),
+        }
+    )
+    family_size = pd.DataFrame(
+        {DataFrameColumns.FAMILY_SIZE.value: add_family_size(data=data)}
+    )
+
+    start = time.perf_counter()
+    legacy = family_size[DataFrameColumns.FAMILY_SIZE.value].apply(
+        legacy_get_family_size_group
+    )
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    grouped = group_family_size(data=family_size)
+    seconds = time.perf_counter() - start
+
+    pd.testing.assert_series_equal(legacy, grouped.astype(object))
+    print(
+        f"    legacy: {legacy_seconds:8.3f} s, "
+        f"{legacy.memory_usage(deep=True) / 2**20:8.1f} MiB"
+    )
+    print(
+        f"vectorised: {seconds:8.3f} s, "
+        f"{grouped.memory_usage(deep=True) / 2**20:8.1f} MiB"
+    )
+    print(
+        f"identical output with {args.rows} rows, "
+        f"speedup {legacy_seconds / seconds:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compares the per-step feature engineering with the fused `engineer_features` step.
+
+Both variants run on a scaled-up copy of `data/train.csv`. Every step input and output goes
+through a Parquet file, which is what the artifact store does between the steps of a pipeline.
+The benchmark reports the time and the volume of the stored outputs and checks that both
+variants produce the same combined features.
+
+Usage:
+    python benchmarks/feature_engineering.py --repeat-rows 1000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from os.path import join
+
+import pandas as pd
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.feature_engineering.age import divide_age_in_bins
+from titanicsurvivors.steps.feature_engineering.common import (
+    combine_features,
+    engineer_features,
+)
+from titanicsurvivors.steps.feature_engineering.family_size import (
+    add_family_size_feature,
+)
+from titanicsurvivors.steps.feature_engineering.fare import divide_fare_in_bins
+from titanicsurvivors.steps.feature_engineering.ticket import (
+    add_ticket_frequency_feature,
+)
+from titanicsurvivors.steps.feature_engineering.title import add_title_feature
+from titanicsurvivors.utils.data import DataFrameColumns
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+
+
+def scaled_train_data(repeat_rows: int) -> pd.DataFrame:
+    train_data = pd.read_csv(TRAIN_DATA_PATH)
+    data = pd.concat([train_data] * repeat_rows, ignore_index=True)
+    data[DataFrameColumns.PASSENGER_ID.value] = range(1, len(data) + 1)
+    return data
+
+
+class ArtifactStore:
+    """Round-trips step inputs and outputs through Parquet files in a directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.stored_bytes = 0
+
+    def save(self, name: str, data: pd.DataFrame) -> str:
+        path = join(self.directory, f"{name}.parquet")
+        data.to_parquet(path)
+        self.stored_bytes += os.path.getsize(path)
+        return name
+
+    def load(self, name: str) -> pd.DataFrame:
+        return pd.read_parquet(join(self.directory, f"{name}.parquet"))
+
+
+def run_per_step(store: ArtifactStore, cleaned: str) -> pd.DataFrame:
+    age_data, _ = divide_age_in_bins.entrypoint(data=store.load(cleaned))
+    family_data = add_family_size_feature.entrypoint(data=store.load(cleaned))
+    fare_data, _ = divide_fare_in_bins.entrypoint(data=store.load(cleaned))
+    ticket_data, _ = add_ticket_frequency_feature.entrypoint(data=store.load(cleaned))
+    title_data = add_title_feature.entrypoint(data=store.load(cleaned))
+    outputs = {
+        "age_data": store.save("age_data", age_data),
+        "family_data": store.save("family_data", family_data),
+        "fare_data": store.save("fare_data", fare_data),
+        "ticket_data": store.save("ticket_data", ticket_data),
+        "title_data": store.save("title_data", title_data),
+    }
+    combined = combine_features.entrypoint(
+        data=store.load(cleaned),
+        **{argument: store.load(name) for argument, name in outputs.items()},
+    )
+    return store.load(store.save("combined_per_step", combined))
+
+
+def run_fused(store: ArtifactStore, cleaned: str) -> pd.DataFrame:
+    combined, _, _, _ = engineer_features.entrypoint(data=store.load(cleaned))
+    return store.load(store.save("combined_fused", combined))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat-rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ArtifactStore(directory)
+        cleaned = store.save(
+            "cleaned",
+            handle_missing_values.entrypoint(scaled_train_data(args.repeat_rows)),
+        )
+
+        results = {}
+        for name, run in (("per step", run_per_step), ("fused", run_fused)):
+            store.stored_bytes = 0
+            start = time.perf_counter()
+            results[name] = run(store, cleaned)
+            print(
+                f"{name:>8}: {time.perf_counter() - start:8.3f} s, "
+                f"{store.stored_bytes / 2**20:8.2f} MiB stored"
+            )
+
+    pd.testing.assert_frame_equal(results["per step"], results["fused"])
+    print(f"identical output with {len(results['fused'])} rows")
+
+
+if __name__ == "__main__":
+    main()
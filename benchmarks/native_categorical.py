@@ -0,0 +1,122 @@
+"""
+Compares XGBoost on one-hot encoded features with its native categorical support.
+
+The accuracy of both encodings is compared on stratified splits of `data/train.csv` with
+several seeds. The size of the feature matrix and the training and inference times are measured
+on a scaled-up copy of it. Both encodings are trained with the same parameters and the
+histogram tree method.
+
+Usage:
+    python benchmarks/native_categorical.py --repeat-rows 200 --seeds 5
+"""
+
+import argparse
+import os
+import time
+from os.path import join
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.dataset import (
+    encode_categorical_features,
+    encode_features,
+    fit_feature_encoders,
+)
+from titanicsurvivors.steps.feature_engineering.common import engineer_features
+from titanicsurvivors.steps.training import build_dmatrix
+from titanicsurvivors.utils.data import DataFrameColumns
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+ENCODINGS = {"one-hot": encode_features, "categorical": encode_categorical_features}
+PARAMS = {
+    "max_depth": 6,
+    "eta": 0.1,
+    "objective": "binary:logistic",
+    "eval_metric": "error",
+    "tree_method": "hist",
+}
+NUM_BOOST_ROUND = 100
+
+
+def combined_features(repeat_rows: int) -> pd.DataFrame:
+    train_data = pd.read_csv(TRAIN_DATA_PATH)
+    data = pd.concat([train_data] * repeat_rows, ignore_index=True)
+    data[DataFrameColumns.PASSENGER_ID.value] = range(1, len(data) + 1)
+    features, _, _, _ = engineer_features.entrypoint(
+        data=handle_missing_values.entrypoint(data)
+    )
+    return features
+
+
+def split_targets(encoded_data: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+    targets = encoded_data.pop(DataFrameColumns.SURVIVED.value)
+    return encoded_data, targets
+
+
+def accuracy(data: pd.DataFrame, encode, seed: int) -> float:
+    train_data, test_data = train_test_split(
+        data,
+        test_size=0.2,
+        random_state=seed,
+        stratify=data[DataFrameColumns.SURVIVED.value],
+    )
+    encoders = fit_feature_encoders(data=train_data)
+    train_inputs, train_targets = split_targets(encode(train_data, encoders))
+    test_inputs, test_targets = split_targets(encode(test_data, encoders))
+    model = xgb.train(
+        PARAMS,
+        build_dmatrix(inputs=train_inputs, targets=train_targets),
+        num_boost_round=NUM_BOOST_ROUND,
+    )
+    predictions = model.predict(build_dmatrix(inputs=test_inputs)) > 0.5
+    return accuracy_score(test_targets, predictions)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat-rows", type=int, default=200)
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+
+    data = combined_features(repeat_rows=1)
+    scaled_data = combined_features(repeat_rows=args.repeat_rows)
+    encoders = fit_feature_encoders(data=scaled_data)
+
+    accuracies = {}
+    print(
+        f"{'encoding':>11} {'columns':>7} {'matrix MiB':>10} {'train s':>8} "
+        f"{'predict s':>9} {'accuracy':>8}"
+    )
+    for name, encode in ENCODINGS.items():
+        accuracies[name] = np.mean(
+            [accuracy(data, encode, seed=seed) for seed in range(args.seeds)]
+        )
+        inputs, targets = split_targets(encode(scaled_data, encoders))
+        start = time.perf_counter()
+        model = xgb.train(
+            PARAMS,
+            build_dmatrix(inputs=inputs, targets=targets),
+            num_boost_round=NUM_BOOST_ROUND,
+        )
+        train_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        model.predict(build_dmatrix(inputs=inputs))
+        predict_seconds = time.perf_counter() - start
+        print(
+            f"{name:>11} {inputs.shape[1]:>7} "
+            f"{inputs.memory_usage(index=False).sum() / 2**20:>10.2f} "
+            f"{train_seconds:>8.3f} {predict_seconds:>9.3f} {accuracies[name]:>8.4f}"
+        )
+
+    difference = abs(accuracies["one-hot"] - accuracies["categorical"])
+    assert difference <= 0.02, f"accuracy differs by {difference:.4f}"
+    print(f"accuracy parity within {difference:.4f} over {args.seeds} seeds")
+
+
+if __name__ == "__main__":
+    main()
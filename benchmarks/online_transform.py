@@ -0,0 +1,149 @@
+"""
+Compares the online transformer with the DataFrame transform of single passengers.
+
+The benchmark first checks that the `OnlineTransformer`, after a round trip through the JSON
+layout of its materializer, gives the same float32 feature vectors as the offline path of the
+training pipeline for every passenger of `data/train.csv`, both for one-hot encoded and for
+native categorical features. It then reports the latency of transforming a single passenger
+dict and small batches, next to `transform_passengers` on a one-row DataFrame.
+
+Usage:
+    python benchmarks/online_transform.py --repeats 2000 --batch-sizes 1 8 64
+"""
+
+import argparse
+import json
+import os
+import time
+from functools import partial
+from os.path import join
+
+import numpy as np
+import pandas as pd
+
+from titanicsurvivors.steps.data_cleaning import (
+    fit_missing_value_medians,
+    handle_missing_values,
+)
+from titanicsurvivors.steps.dataset import (
+    encode_categorical_features,
+    encode_features,
+    fit_feature_encoders,
+)
+from titanicsurvivors.steps.feature_engineering.common import engineer_features
+from titanicsurvivors.steps.feature_engineering.online import build_online_transformer
+from titanicsurvivors.steps.feature_engineering.ticket import (
+    build_ticket_frequency_index,
+)
+from titanicsurvivors.steps.inference import transform_passengers
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.materializers import OnlineTransformerMaterializer
+from titanicsurvivors.utils.online import OnlineTransformer
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+
+
+def round_trip(transformer: OnlineTransformer) -> OnlineTransformer:
+    tables = {
+        name: getattr(transformer, name)
+        for name in OnlineTransformerMaterializer.TABLES
+    }
+    return OnlineTransformer(**json.loads(json.dumps(tables)))
+
+
+def offline_matrix(inputs: pd.DataFrame, feature_names: list[str]) -> np.ndarray:
+    # Native categorical features are compared by their codes, as they reach the model.
+    inputs = inputs[feature_names].copy()
+    for column in inputs.columns:
+        if isinstance(inputs[column].dtype, pd.CategoricalDtype):
+            inputs[column] = inputs[column].cat.codes.replace(-1, np.nan)
+    return inputs.to_numpy(dtype=np.float32)
+
+
+def latency(function, repeats: int) -> tuple[float, float]:
+    timings = np.empty(repeats)
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings[repeat] = time.perf_counter() - start
+    p50, p99 = np.percentile(timings, [50, 99]) * 1e6
+    return p50, p99
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    args = parser.parse_args()
+
+    raw_data = pd.read_csv(TRAIN_DATA_PATH)
+    features, age_categories, fare_categories, _ = engineer_features.entrypoint(
+        data=handle_missing_values.entrypoint(raw_data.copy())
+    )
+    encoders = fit_feature_encoders(data=features)
+    age_medians, fare_medians = fit_missing_value_medians.entrypoint(data=raw_data)
+    ticket_frequencies = build_ticket_frequency_index(raw_data)
+    passengers = raw_data.to_dict("records")
+
+    transformers = {}
+    for native_categorical, encode in (
+        (False, encode_features),
+        (True, encode_categorical_features),
+    ):
+        transformer = round_trip(
+            build_online_transformer(
+                age_medians=age_medians,
+                fare_medians=fare_medians,
+                age_categories=age_categories,
+                fare_categories=fare_categories,
+                ticket_frequencies=ticket_frequencies,
+                encoders=encoders,
+                native_categorical=native_categorical,
+            )
+        )
+        inputs = encode(data=features, encoders=encoders).drop(
+            columns=DataFrameColumns.SURVIVED.value
+        )
+        assert transformer.feature_names == sorted(inputs.columns)
+        expected = offline_matrix(inputs, transformer.feature_names)
+        np.testing.assert_array_equal(transformer.transform_batch(passengers), expected)
+        np.testing.assert_array_equal(
+            np.stack([transformer.transform(passenger) for passenger in passengers]),
+            expected,
+        )
+        transformers[native_categorical] = transformer
+    print(f"identical feature vectors for {len(passengers)} passengers")
+
+    transformer = transformers[False]
+    print(f"{'rows':>6} {'path':>10} {'p50 us':>10} {'p99 us':>10}")
+    for batch_size in args.batch_sizes:
+        batch = passengers[:batch_size]
+        frame = raw_data.iloc[:batch_size]
+        for name, function in (
+            (
+                "online",
+                partial(transformer.transform, batch[0])
+                if batch_size == 1
+                else partial(transformer.transform_batch, batch),
+            ),
+            (
+                "dataframe",
+                # `transform_passengers` fills the missing values in place.
+                lambda frame=frame: transform_passengers(
+                    data=frame.copy(),
+                    encoders=encoders,
+                    age_medians=age_medians,
+                    fare_medians=fare_medians,
+                    age_categories=age_categories,
+                    fare_categories=fare_categories,
+                    ticket_frequencies=ticket_frequencies,
+                ),
+            ),
+        ):
+            repeats = args.repeats if name == "online" else args.repeats // 20
+            p50, p99 = latency(function, max(repeats, 10))
+            print(f"{batch_size:>6} {name:>10} {p50:>10.1f} {p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
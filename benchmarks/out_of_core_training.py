@@ -0,0 +1,134 @@
+"""
+Compares the memory of training on a loaded DataFrame with training on streamed Parquet batches.
+
+The encoded features of scaled-up copies of `data/train.csv` are written to Parquet the way
+`ArrowDataFrameMaterializer` stores them. Each size is trained once from the whole DataFrame read
+into a DMatrix and once from a `ParquetBatchIter` into an `ExtMemQuantileDMatrix`, each in a fresh
+process whose peak resident memory is reported. The benchmark checks that both models reach a
+similar accuracy on the rows of `data/train.csv`.
+
+Usage:
+    python benchmarks/out_of_core_training.py --repeat-rows 100 400 1600
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import join
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xgboost as xgb
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.dataset import encode_features, fit_feature_encoders
+from titanicsurvivors.steps.feature_engineering.common import engineer_features
+from titanicsurvivors.steps.training import build_dmatrix
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.external_memory import ParquetBatchIter
+from titanicsurvivors.utils.materializers import ArrowDataFrameMaterializer
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+PARAMS = {
+    "max_depth": 6,
+    "eta": 0.1,
+    "objective": "binary:logistic",
+    "eval_metric": "error",
+    "tree_method": "hist",
+}
+NUM_BOOST_ROUND = 50
+
+
+def encoded_features() -> pd.DataFrame:
+    data = handle_missing_values.entrypoint(pd.read_csv(TRAIN_DATA_PATH))
+    features, _, _, _ = engineer_features.entrypoint(data=data)
+    return encode_features(data=features, encoders=fit_feature_encoders(data=features))
+
+
+def write_scaled_features(data: pd.DataFrame, repeat_rows: int, path: str) -> None:
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    with pq.ParquetWriter(path, table.schema, compression="zstd") as writer:
+        for _ in range(repeat_rows):
+            writer.write_table(
+                table, row_group_size=ArrowDataFrameMaterializer.ROW_GROUP_SIZE
+            )
+
+
+def train_in_memory(path: str, cache_dir: str) -> xgb.Booster:
+    inputs = pd.read_parquet(path)
+    targets = inputs.pop(DataFrameColumns.SURVIVED.value)
+    dtrain = build_dmatrix(inputs=inputs[inputs.columns.sort_values()], targets=targets)
+    return xgb.train(PARAMS, dtrain, num_boost_round=NUM_BOOST_ROUND)
+
+
+def train_out_of_core(path: str, cache_dir: str) -> xgb.Booster:
+    dtrain = xgb.ExtMemQuantileDMatrix(
+        ParquetBatchIter(path, cache_prefix=join(cache_dir, "train")),
+        enable_categorical=True,
+    )
+    return xgb.train(PARAMS, dtrain, num_boost_round=NUM_BOOST_ROUND)
+
+
+def run(mode: str, path: str, test_path: str) -> None:
+    train = {"in-memory": train_in_memory, "out-of-core": train_out_of_core}[mode]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        model = train(path, cache_dir)
+        seconds = time.perf_counter() - start
+    test_inputs = pd.read_parquet(test_path)
+    test_targets = test_inputs.pop(DataFrameColumns.SURVIVED.value)
+    predictions = model.predict(
+        build_dmatrix(inputs=test_inputs[test_inputs.columns.sort_values()])
+    )
+    accuracy = np.mean((predictions > 0.5) == test_targets.to_numpy())
+    peak_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps([seconds, peak_bytes, accuracy]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat-rows", type=int, nargs="+", default=[100, 400, 1600])
+    parser.add_argument("--run", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(*args.run)
+        return
+
+    data = encoded_features()
+    print(f"{'rows':>9} {'mode':>11} {'seconds':>8} {'peak MiB':>9} {'accuracy':>8}")
+    with tempfile.TemporaryDirectory() as data_dir:
+        test_path = join(data_dir, "test.parquet")
+        write_scaled_features(data, 1, test_path)
+        for repeat_rows in args.repeat_rows:
+            path = join(data_dir, "data.parquet")
+            write_scaled_features(data, repeat_rows, path)
+            accuracies = {}
+            for mode in ("in-memory", "out-of-core"):
+                # Every run gets a fresh process, so its peak memory is its own.
+                output = subprocess.run(
+                    [sys.executable, __file__, "--run", mode, path, test_path],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                seconds, peak_bytes, accuracies[mode] = json.loads(
+                    output.splitlines()[-1]
+                )
+                print(
+                    f"{len(data) * repeat_rows:>9} {mode:>11} {seconds:>8.2f} "
+                    f"{peak_bytes / 2**20:>9.0f} {accuracies[mode]:>8.4f}"
+                )
+            difference = abs(accuracies["in-memory"] - accuracies["out-of-core"])
+            assert difference <= 0.02, f"accuracy differs by {difference:.4f}"
+    print("accuracy parity within 0.02 for every size")
+
+
+if __name__ == "__main__":
+    main()
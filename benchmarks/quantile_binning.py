@@ -0,0 +1,91 @@
+"""
+Compares the exact `pd.qcut` age and fare bins with the streaming quantile sketch bins.
+
+The benchmark bins a scaled-up and jittered copy of the cleaned `data/train.csv` columns once
+with `pd.qcut` and once with `approximate_qcut`, and additionally builds the sketch from
+partitions that are merged afterwards. It reports the time, the largest measured rank error of
+the approximate edges, which must stay within the bound of the sketch, and the share of values
+that end up in the same bin.
+
+Usage:
+    python benchmarks/quantile_binning.py --rows 10000000
+"""
+
+import argparse
+import os
+import time
+from os.path import join
+
+import numpy as np
+import pandas as pd
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.utils.binning import (
+    QuantileSketch,
+    approximate_qcut,
+    categories_to_edges,
+    quantile_edge_errors,
+)
+from titanicsurvivors.utils.data import DataFrameColumns
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+BINS = {DataFrameColumns.AGE.value: 10, DataFrameColumns.FARE.value: 13}
+
+
+def scaled_column(name: str, rows: int, rng: np.random.Generator) -> pd.Series:
+    cleaned = handle_missing_values.entrypoint(pd.read_csv(TRAIN_DATA_PATH))
+    values = np.resize(cleaned[name].to_numpy(dtype=float), rows)
+    # Jitter the values, so the quantiles do not fall onto the few distinct values.
+    return pd.Series(values * rng.uniform(0.99, 1.01, size=rows), name=name)
+
+
+def merged_sketch_edges(values: pd.Series, bins: int, partitions: int) -> np.ndarray:
+    sketches = [
+        QuantileSketch(seed=seed).update(partition)
+        for seed, partition in enumerate(
+            np.array_split(values.to_numpy(dtype=float), partitions)
+        )
+    ]
+    for sketch in sketches[1:]:
+        sketches[0].merge(sketch)
+    return sketches[0].quantiles(np.linspace(0, 1, bins + 1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--partitions", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for name, bins in BINS.items():
+        values = scaled_column(name, rows=args.rows, rng=rng)
+
+        start = time.perf_counter()
+        exact = pd.qcut(values, bins)
+        exact_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        approximate = approximate_qcut(values, bins)
+        approximate_seconds = time.perf_counter() - start
+
+        errors = quantile_edge_errors(
+            values, edges=categories_to_edges(approximate.unique())
+        )
+        merged_errors = quantile_edge_errors(
+            values,
+            edges=merged_sketch_edges(values, bins=bins, partitions=args.partitions),
+        )
+        agreement = np.mean(exact.cat.codes.to_numpy() == approximate.cat.codes)
+        print(
+            f"{name:>5}: qcut {exact_seconds:7.3f} s, sketch {approximate_seconds:7.3f} s, "
+            f"rank error {errors['rank_error']:.5f} "
+            f"(merged {merged_errors['rank_error']:.5f}, "
+            f"bound {errors['rank_error_bound']:.5f}), "
+            f"same bin {agreement:.2%}"
+        )
+        assert errors["rank_error"] <= errors["rank_error_bound"]
+        assert merged_errors["rank_error"] <= merged_errors["rank_error_bound"]
+
+
+if __name__ == "__main__":
+    main()
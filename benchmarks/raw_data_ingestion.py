@@ -0,0 +1,71 @@
+"""
+Measures how the wall time of reading the raw data scales with the number of reading workers.
+
+The benchmark writes synthetic copies of `data/train.csv` to a temporary directory and reads
+that directory with `read_raw_data` for an increasing number of thread and process workers.
+
+Usage:
+    python benchmarks/raw_data_ingestion.py --files 64 --repeat-rows 100
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from os.path import join
+
+import pandas as pd
+
+from titanicsurvivors.steps.raw_data import read_raw_data
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+
+
+def write_synthetic_files(target_dir: str, files: int, repeat_rows: int) -> None:
+    train_data = pd.read_csv(TRAIN_DATA_PATH)
+    first_file = join(target_dir, "passengers_0000.csv")
+    pd.concat([train_data] * repeat_rows, ignore_index=True).to_csv(
+        first_file, index=False
+    )
+    for index in range(1, files):
+        shutil.copyfile(first_file, join(target_dir, f"passengers_{index:04d}.csv"))
+
+
+def time_read(data_dir: str, max_workers: int, executor: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    table, _ = read_raw_data(
+        raw_data_files=[data_dir], max_workers=max_workers, executor=executor
+    )
+    return time.perf_counter() - start, table.num_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--repeat-rows", type=int, default=100)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_synthetic_files(data_dir, files=args.files, repeat_rows=args.repeat_rows)
+        print(
+            f"{'executor':>8} {'workers':>7} {'rows':>10} {'seconds':>8} {'speedup':>7}"
+        )
+        for executor in ("thread", "process"):
+            baseline = None
+            for max_workers in worker_counts:
+                seconds, rows = time_read(data_dir, max_workers, executor)
+                baseline = baseline or seconds
+                print(
+                    f"{executor:>8} {max_workers:>7} {rows:>10} {seconds:>8.3f} "
+                    f"{baseline / seconds:>7.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Load-tests a running `TitanicService` and reports its latency percentiles and throughput.
+
+The encoded features of the passengers of `data/train.csv` are sent by concurrent clients,
+either as JSON records to the adaptive batching `predict` endpoint or as Arrow streams to the
+`predict_arrow` endpoint. The benchmark checks that every response holds one prediction per
+passenger of its request.
+
+Start the service locally first, e.g. with the deployment pipeline or with
+`bentoml serve service:TitanicService` in `src/titanicsurvivors/pipelines/deploy`.
+
+Usage:
+    python benchmarks/service_load_test.py --url http://localhost:3000 --concurrency 1 8 32
+    python benchmarks/service_load_test.py --payload arrow --rows-per-request 1024
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import requests
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.dataset import encode_features, fit_feature_encoders
+from titanicsurvivors.steps.feature_engineering.common import engineer_features
+from titanicsurvivors.utils.data import DataFrameColumns
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+_sessions = threading.local()
+
+
+def encoded_features() -> pd.DataFrame:
+    data = handle_missing_values.entrypoint(pd.read_csv(TRAIN_DATA_PATH))
+    features, _, _, _ = engineer_features.entrypoint(data=data)
+    inputs = encode_features(
+        data=features, encoders=fit_feature_encoders(data=features)
+    )
+    inputs = inputs.drop(columns=DataFrameColumns.SURVIVED.value)
+    return inputs[inputs.columns.sort_values()]
+
+
+def records_request(url: str, inputs: pd.DataFrame) -> requests.Request:
+    return requests.Request(
+        "POST", f"{url}/predict", json={"inputs": inputs.to_dict("records")}
+    )
+
+
+def arrow_request(url: str, inputs: pd.DataFrame) -> requests.Request:
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(inputs, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return requests.Request(
+        "POST",
+        f"{url}/predict_arrow",
+        files={"batch": ("batch.arrow", sink.getvalue().to_pybytes(), ARROW_STREAM)},
+    )
+
+
+def number_of_predictions(payload: str, response: requests.Response) -> int:
+    if payload == "arrow":
+        with pa.ipc.open_stream(response.content) as reader:
+            return reader.read_all().num_rows
+    return len(response.json())
+
+
+def send(payload: str, request: requests.PreparedRequest, rows: int) -> float:
+    # Every client thread keeps its own connection open between its requests.
+    if not hasattr(_sessions, "session"):
+        _sessions.session = requests.Session()
+    start = time.perf_counter()
+    response = _sessions.session.send(request)
+    latency = time.perf_counter() - start
+    response.raise_for_status()
+    predictions = number_of_predictions(payload, response)
+    assert predictions == rows, f"{predictions} predictions for {rows} passengers"
+    return latency
+
+
+def load_test(
+    payload: str,
+    prepared_requests: list[requests.PreparedRequest],
+    rows_per_request: int,
+    concurrency: int,
+) -> tuple[np.ndarray, float]:
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        start = time.perf_counter()
+        latencies = list(
+            clients.map(
+                lambda request: send(payload, request, rows_per_request),
+                prepared_requests,
+            )
+        )
+        seconds = time.perf_counter() - start
+    return np.array(latencies), seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:3000")
+    parser.add_argument("--payload", choices=["records", "arrow"], default="records")
+    parser.add_argument("--rows-per-request", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    inputs = encoded_features()
+    build_request = arrow_request if args.payload == "arrow" else records_request
+    # The payloads are serialised before the clients start, so only the requests are timed.
+    rng = np.random.default_rng(0)
+    prepared_requests = [
+        build_request(
+            args.url, inputs.iloc[rng.integers(0, len(inputs), args.rows_per_request)]
+        ).prepare()
+        for _ in range(args.requests)
+    ]
+    load_test(args.payload, prepared_requests[:50], args.rows_per_request, 1)
+
+    print(
+        f"{'clients':>7} {'p50 ms':>8} {'p99 ms':>8} {'requests/s':>10} "
+        f"{'passengers/s':>12}"
+    )
+    for concurrency in args.concurrency:
+        latencies, seconds = load_test(
+            args.payload, prepared_requests, args.rows_per_request, concurrency
+        )
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(
+            f"{concurrency:>7} {p50:>8.2f} {p99:>8.2f} {len(latencies) / seconds:>10.0f} "
+            f"{len(latencies) * args.rows_per_request / seconds:>12.0f}"
+        )
+    print("every response holds one prediction per passenger of its request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compares the memory of the dense and the sparse one-hot encoding of the combined features.
+
+Both encodings run on a scaled-up copy of `data/train.csv`, once with the default one-hot
+encoded features and once with the ticket numbers and names one-hot encoded as well, which
+gives a wide category set. The benchmark reports the peak of the memory allocated while encoding
+and building the XGBoost DMatrix, as traced by `tracemalloc`, and the size of the encoded
+matrix. It checks that both encodings contain the same values.
+
+Usage:
+    python benchmarks/sparse_encoding.py --repeat-rows 20
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+from os.path import join
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.dataset import (
+    CATEGORICAL_FEATURES,
+    NON_NUMERIC_FEATURES,
+    encode_features,
+    encode_sparse_features,
+    fit_feature_encoders,
+)
+from titanicsurvivors.steps.feature_engineering.common import engineer_features
+from titanicsurvivors.steps.training import build_dmatrix
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.encoding import FeatureEncoders
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+WIDE_FEATURES = [DataFrameColumns.TICKET_NUMBER.value, DataFrameColumns.NAME.value]
+
+
+def scaled_features(repeat_rows: int) -> pd.DataFrame:
+    train_data = pd.read_csv(TRAIN_DATA_PATH)
+    data = pd.concat([train_data] * repeat_rows, ignore_index=True)
+    data[DataFrameColumns.PASSENGER_ID.value] = range(1, len(data) + 1)
+    combined_features, _, _, _ = engineer_features.entrypoint(
+        data=handle_missing_values.entrypoint(data)
+    )
+    return combined_features
+
+
+def dense_matrix(
+    data: pd.DataFrame, encoders: FeatureEncoders
+) -> tuple[xgb.DMatrix, int]:
+    encoded_data = encode_features(data=data, encoders=encoders)
+    targets = encoded_data.pop(DataFrameColumns.SURVIVED.value)
+    return build_dmatrix(inputs=encoded_data, targets=targets), int(
+        encoded_data.memory_usage(index=False).sum()
+    )
+
+
+def sparse_matrix(
+    data: pd.DataFrame, encoders: FeatureEncoders
+) -> tuple[xgb.DMatrix, int]:
+    encoded_data = encode_sparse_features(data=data, encoders=encoders)
+    targets = encoded_data.column(DataFrameColumns.SURVIVED.value)
+    inputs = encoded_data.select(
+        [
+            name
+            for name in encoded_data.feature_names
+            if name != DataFrameColumns.SURVIVED.value
+        ]
+    )
+    matrix = inputs.matrix
+    return build_dmatrix(inputs=inputs, targets=targets), (
+        matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat-rows", type=int, default=20)
+    args = parser.parse_args()
+
+    data = scaled_features(args.repeat_rows)
+    print(
+        f"{'features':>8} {'mode':>6} {'columns':>7} {'seconds':>8} {'peak MiB':>9} "
+        f"{'matrix MiB':>10}"
+    )
+    for name, extra_features in (("default", []), ("wide", WIDE_FEATURES)):
+        encoders = fit_feature_encoders(
+            data=data,
+            non_numeric_features=NON_NUMERIC_FEATURES + extra_features,
+            categorical_features=CATEGORICAL_FEATURES + extra_features,
+        )
+        for mode, build in (("dense", dense_matrix), ("sparse", sparse_matrix)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            dmatrix, matrix_bytes = build(data, encoders)
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{name:>8} {mode:>6} {dmatrix.num_col():>7} {seconds:>8.3f} "
+                f"{peak / 2**20:>9.1f} {matrix_bytes / 2**20:>10.1f}"
+            )
+            del dmatrix
+
+        sample = data.iloc[:1000]
+        np.testing.assert_array_equal(
+            encode_sparse_features(data=sample, encoders=encoders).matrix.toarray(),
+            encode_features(data=sample, encoders=encoders).to_numpy(np.float32),
+        )
+    print(f"identical encoded values with {len(data)} rows")
+
+
+if __name__ == "__main__":
+    main()
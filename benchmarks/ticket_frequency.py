@@ -0,0 +1,107 @@
+"""
+Compares updating the ticket frequency index batch by batch with recomputing it from scratch.
+
+A passenger history grows by one batch of passengers per day. Every day the ticket frequencies
+of the history are once recomputed with `add_ticket_frequency` and once merged into the index
+with `update_ticket_frequency_index`. The benchmark reports both timings as the history grows
+and checks that the index gives the same frequencies as the full recomputation, also after the
+last batch is merged a second time.
+
+Usage:
+    python benchmarks/ticket_frequency.py --days 100 --batch-rows 50000
+"""
+
+import argparse
+import os
+import time
+from os.path import join
+
+import numpy as np
+import pandas as pd
+
+from titanicsurvivors.steps.feature_engineering.ticket import (
+    add_ticket_frequency,
+    build_ticket_passenger_index,
+    lookup_ticket_frequency,
+    update_ticket_frequency_index,
+)
+from titanicsurvivors.utils.data import DataFrameColumns
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+
+
+def daily_batch(
+    tickets: np.ndarray, day: int, rows: int, rng: np.random.Generator
+) -> pd.DataFrame:
+    # Most passengers travel on tickets of the same day, some on tickets of earlier days.
+    sampled = rng.choice(tickets, size=rows)
+    travel_day = np.where(rng.random(rows) < 0.9, day, rng.integers(0, day + 1, rows))
+    return pd.DataFrame(
+        {
+            DataFrameColumns.PASSENGER_ID.value: np.arange(
+                day * rows, (day + 1) * rows
+            ),
+            DataFrameColumns.TICKET_NUMBER.value: pd.Series(sampled)
+            + "/"
+            + travel_day.astype(str),
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--batch-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    tickets = (
+        pd.read_csv(TRAIN_DATA_PATH)[DataFrameColumns.TICKET_NUMBER.value]
+        .unique()
+        .astype(str)
+    )
+    rng = np.random.default_rng(0)
+    batches = []
+    index = build_ticket_passenger_index(
+        data=pd.DataFrame(
+            columns=[
+                DataFrameColumns.PASSENGER_ID.value,
+                DataFrameColumns.TICKET_NUMBER.value,
+            ]
+        )
+    )
+    print(f"{'day':>5} {'rows':>10} {'full':>8} {'incremental':>11} {'speedup':>7}")
+    for day in range(args.days):
+        batches.append(daily_batch(tickets, day=day, rows=args.batch_rows, rng=rng))
+
+        start = time.perf_counter()
+        history = pd.concat(batches, ignore_index=True)
+        full = add_ticket_frequency(data=history)
+        full_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = update_ticket_frequency_index(index=index, data=batches[-1])
+        lookup_ticket_frequency(
+            index=index[DataFrameColumns.TICKET_FREQUENCY.value], data=batches[-1]
+        )
+        incremental_seconds = time.perf_counter() - start
+
+        if day == 0 or (day + 1) % max(1, args.days // 10) == 0:
+            print(
+                f"{day + 1:>5} {len(history):>10} {full_seconds:>8.3f} "
+                f"{incremental_seconds:>11.3f} "
+                f"{full_seconds / incremental_seconds:>7.1f}"
+            )
+
+    # A retried run merges the same batch again, which must not count it twice.
+    index = update_ticket_frequency_index(index=index, data=batches[-1])
+    pd.testing.assert_series_equal(
+        lookup_ticket_frequency(
+            index=index[DataFrameColumns.TICKET_FREQUENCY.value], data=history
+        ),
+        full,
+    )
+    print(f"identical ticket frequencies for {len(history)} passengers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compares the vectorised title extraction and grouping with the former row-wise implementation.
+
+Usage:
+    python benchmarks/title.py --rows 10000000
+"""
+
+import argparse
+import os
+import time
+from os.path import join
+
+import numpy as np
+import pandas as pd
+
+from titanicsurvivors.steps.feature_engineering.title import (
+    add_is_married,
+    add_title,
+    get_title_group,
+    group_titles,
+)
+from titanicsurvivors.utils.data import DataFrameColumns
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+
+
+def legacy_title_features(data: pd.DataFrame) -> pd.DataFrame:
+    title = (
+        data[DataFrameColumns.NAME.value]
+        .str.split(", ", expand=True)[1]
+        .str.split(".", expand=True)[0]
+    )
+    is_married = pd.Series(np.zeros(len(data)))
+    is_married.loc[title == "Mrs"] = 1
+    return pd.DataFrame(
+        {
+            DataFrameColumns.TITLE.value: title.apply(get_title_group),
+            DataFrameColumns.IS_MARRIED.value: is_married,
+        }
+    )
+
+
+def title_features(data: pd.DataFrame) -> pd.DataFrame:
+    title = pd.DataFrame({DataFrameColumns.TITLE.value: add_title(data=data)})
+    return pd.DataFrame(
+        {
+            DataFrameColumns.TITLE.value: group_titles(data=title),
+            DataFrameColumns.IS_MARRIED.value: add_is_married(data=title),
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    names = pd.read_csv(TRAIN_DATA_PATH)[DataFrameColumns.NAME.value]
+    data = pd.DataFrame(
+        {DataFrameColumns.NAME.value: np.resize(names.to_numpy(), args.rows)}
+    )
+
+    results = {}
+    timings = {}
+    for name, features in (
+        ("legacy", legacy_title_features),
+        ("vectorised", title_features),
+    ):
+        start = time.perf_counter()
+        results[name] = features(data)
+        timings[name] = time.perf_counter() - start
+        print(f"{name:>10}: {timings[name]:8.3f} s")
+
+    pd.testing.assert_frame_equal(
+        results["legacy"], results["vectorised"], check_dtype=False
+    )
+    print(
+        f"identical output with {args.rows} rows, "
+        f"speedup {timings['legacy'] / timings['vectorised']:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
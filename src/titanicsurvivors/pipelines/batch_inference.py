@@ -0,0 +1,52 @@
+import os
+from typing import Literal
+
+from dotenv import load_dotenv
+from zenml import pipeline
+from zenml.client import Client
+from zenml.enums import ModelStages
+
+from titanicsurvivors.models import titanic_xgboost
+from titanicsurvivors.settings import docker_settings, mlflow_settings
+from titanicsurvivors.steps.inference import score_passengers
+from titanicsurvivors.utils.cache import resolve_serving_artifact_versions
+
+load_dotenv()
+
+
+@pipeline(
+    settings={"docker": docker_settings, "experiment_tracker": mlflow_settings},
+    name=f"Batch_Inference_{os.getenv('GROUP_NAME', 'Default')}",
+    enable_cache=False,
+)
+def score_passengers_in_batches(
+    input_files: list[str] | None = None,
+    output_path: str = "./predictions",
+    input_format: Literal["csv", "parquet"] = "csv",
+    model_version: str = ModelStages.LATEST.value,
+    native_categorical: bool = False,
+    max_workers: int | None = None,
+):
+    # The passengers are transformed with the artifacts pinned to the model version, which
+    # the feature engineering run the model was trained on fitted.
+    artifact_versions = resolve_serving_artifact_versions(
+        Client().get_model_version(titanic_xgboost.name, model_version)
+    )
+    score_passengers(
+        model=artifact_versions["model"],
+        encoders=artifact_versions["encoders"],
+        age_medians=artifact_versions["age_medians"],
+        fare_medians=artifact_versions["fare_medians"],
+        age_categories=artifact_versions["age_categories"],
+        fare_categories=artifact_versions["fare_categories"],
+        ticket_frequency_index=artifact_versions["ticket_frequency_index"],
+        input_files=input_files or ["./data"],
+        output_path=output_path,
+        input_format=input_format,
+        native_categorical=native_categorical,
+        max_workers=max_workers,
+    )
+
+
+if __name__ == "__main__":
+    score_passengers_in_batches()
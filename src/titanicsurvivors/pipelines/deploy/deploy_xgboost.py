@@ -30,7 +30,13 @@ def bento_deployment_pipeline():
         },
         exclude=["data"],
         python={
-            "packages": ["zenml", "xgboost", "pandas", "scikit-learn"],
+            "packages": [
+                "zenml",
+                "xgboost",
+                "pandas",
+                "pyarrow",
+                "scikit-learn",
+            ],
         },
     )
 
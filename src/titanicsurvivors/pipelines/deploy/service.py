@@ -0,0 +1,186 @@
+import os
+from pathlib import Path
+from typing import Annotated
+
+import bentoml
+import numpy as np
+import pyarrow as pa
+import xgboost as xgb
+from bentoml.exceptions import InvalidArgument
+from bentoml.validators import ContentType
+
+MODEL_NAME = "titanic-classifier"
+# Concurrent requests are merged into one batch of up to `MAX_BATCH_SIZE` passengers, or as
+# many as arrive within `MAX_LATENCY_MS`.
+MAX_BATCH_SIZE = int(os.getenv("TITANIC_MAX_BATCH_SIZE", "256"))
+MAX_LATENCY_MS = int(os.getenv("TITANIC_MAX_LATENCY_MS", "10"))
+THRESHOLD = 0.5
+# The stage of `titanic_xgboost` to serve, for example "production". If it is set, the service
+# serves the model version in the stage together with the artifacts pinned to it, loaded
+# through the artifact cache and swapped for those of a new version in the stage, instead of
+# the bento model.
+MODEL_STAGE = os.getenv("TITANIC_MODEL_STAGE")
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def records_to_matrix(records: list[dict], feature_names: list[str]) -> np.ndarray:
+    """
+    Stacks encoded feature records into one float32 matrix in the column order of the model.
+
+    Features that are missing from a record, or are None, are missing values.
+
+    Args:
+        records: The encoded features of the passengers, one dict per passenger.
+        feature_names: The feature names of the model.
+
+    Returns:
+        The matrix with a row per record.
+
+    Raises:
+        ValueError: If a record has keys that are not features of the model, like the columns
+            of a raw passenger, or values that are not numbers.
+    """
+    known = set(feature_names)
+    for record in records:
+        unknown = record.keys() - known
+        if unknown:
+            raise ValueError(
+                f"A record has keys that are not features of the model: "
+                f"{sorted(unknown)}. Send the encoded features of the passengers."
+            )
+    try:
+        matrix = np.array(
+            [[record.get(name) for name in feature_names] for record in records],
+            dtype=np.float32,
+        )
+    except (TypeError, ValueError) as error:
+        raise ValueError(
+            f"The records hold values that are not numbers: {error}"
+        ) from error
+    return matrix.reshape(len(records), len(feature_names))
+
+
+def table_to_matrix(table: pa.Table, feature_names: list[str]) -> np.ndarray:
+    """
+    Converts the columns of an Arrow table of encoded features into one float32 matrix in the
+    column order of the model.
+
+    Categorical features, as encoded by `encode_categorical_features`, are sent as their codes.
+
+    Args:
+        table: The encoded features of the passengers, one column per feature.
+        feature_names: The feature names of the model.
+
+    Returns:
+        The matrix with a row per row of the table.
+    """
+    matrix = np.empty((table.num_rows, len(feature_names)), dtype=np.float32)
+    for position, name in enumerate(feature_names):
+        matrix[:, position] = (
+            table.column(name).cast(pa.float32()).to_numpy(zero_copy_only=False)
+        )
+    return matrix
+
+
+@bentoml.service(
+    name="TitanicService",
+)
+class TitanicService:
+    def __init__(self):
+        self.watcher = None
+        if MODEL_STAGE:
+            # Imported here, a bento of the model alone is served without the project.
+            from titanicsurvivors.utils.cache import ModelVersionWatcher
+
+            self.watcher = ModelVersionWatcher(stage=MODEL_STAGE).start()
+        else:
+            self.model: xgb.Booster = bentoml.xgboost.load_model(MODEL_NAME)
+
+    def current_model(self) -> xgb.Booster:
+        # A request uses one model throughout, even if a new version is swapped in meanwhile.
+        if self.watcher is None:
+            return self.model
+        return self.watcher.artifacts.model
+
+    @bentoml.api(
+        batchable=True, max_batch_size=MAX_BATCH_SIZE, max_latency_ms=MAX_LATENCY_MS
+    )
+    def predict(self, inputs: list[dict]) -> list[str]:
+        # `inputs` holds the passengers of all requests of the batch, they are transformed
+        # and predicted at once and the labels are split back into the requests by BentoML.
+        model = self.current_model()
+        try:
+            matrix = records_to_matrix(inputs, model.feature_names)
+        except ValueError as error:
+            raise InvalidArgument(str(error)) from error
+        probabilities = model.inplace_predict(matrix)
+        return np.where(probabilities > THRESHOLD, "Survived", "Died").tolist()
+
+    @bentoml.api(
+        batchable=True, max_batch_size=MAX_BATCH_SIZE, max_latency_ms=MAX_LATENCY_MS
+    )
+    def predict_passengers(self, passengers: list[dict]) -> list[str]:
+        # Raw passengers are transformed with the artifacts pinned to the served model version,
+        # so the endpoint is only available if the service serves a stage.
+        if self.watcher is None:
+            raise InvalidArgument(
+                "Raw passengers are only predicted if the service serves a model stage, set "
+                "`TITANIC_MODEL_STAGE` or send the encoded features to `predict`."
+            )
+        artifacts = self.watcher.artifacts
+        if artifacts.online_transformer is not None:
+            probabilities = artifacts.model.inplace_predict(
+                artifacts.online_transformer.transform_batch(passengers)
+            )
+        else:
+            probabilities = self.predict_with_dataframe(artifacts, passengers)
+        return np.where(probabilities > THRESHOLD, "Survived", "Died").tolist()
+
+    @bentoml.api
+    def predict_arrow(
+        self,
+        batch: Annotated[Path, ContentType(ARROW_STREAM)],
+        context: bentoml.Context,
+    ) -> Annotated[Path, ContentType(ARROW_STREAM)]:
+        # A columnar batch is already a batch, so it is predicted without waiting for other
+        # requests and without converting it to records.
+        with pa.ipc.open_stream(pa.memory_map(str(batch))) as reader:
+            table = reader.read_all()
+        model = self.current_model()
+        # Predicts on the matrix directly instead of building a DMatrix first.
+        probabilities = model.inplace_predict(
+            table_to_matrix(table, model.feature_names)
+        )
+        predictions = pa.table(
+            {
+                "Survived": (probabilities > THRESHOLD).astype(np.int8),
+                "Survival_Probability": probabilities,
+            }
+        )
+        output = Path(context.temp_dir) / "predictions.arrow"
+        with pa.ipc.new_stream(str(output), predictions.schema) as writer:
+            writer.write_table(predictions)
+        return output
+
+    @staticmethod
+    def predict_with_dataframe(artifacts, passengers: list[dict]) -> np.ndarray:
+        # Model versions trained without an online transformer transform the passengers like
+        # the batch inference pipeline does.
+        import pandas as pd
+
+        from titanicsurvivors.steps.inference import transform_passengers
+
+        model = artifacts.model
+        inputs = transform_passengers(
+            data=pd.DataFrame(passengers),
+            encoders=artifacts.encoders,
+            age_medians=artifacts.age_medians,
+            fare_medians=artifacts.fare_medians,
+            age_categories=artifacts.age_categories,
+            fare_categories=artifacts.fare_categories,
+            ticket_frequencies=artifacts.ticket_frequencies,
+            native_categorical="c" in (model.feature_types or []),
+        )
+        return model.predict(
+            xgb.DMatrix(inputs[model.feature_names], enable_categorical=True)
+        )
@@ -4,9 +4,15 @@ from dotenv import load_dotenv
 from zenml import pipeline
 from zenml.client import Client
 
-from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.data_cleaning import (
+    fit_missing_value_medians,
+    handle_missing_values,
+)
 from titanicsurvivors.steps.feature_engineering.age import divide_age_in_bins
-from titanicsurvivors.steps.feature_engineering.common import combine_features
+from titanicsurvivors.steps.feature_engineering.common import (
+    combine_features,
+    engineer_features,
+)
 from titanicsurvivors.steps.feature_engineering.family_size import (
     add_family_size_feature,
 )
@@ -24,22 +30,62 @@ load_dotenv()
     settings={"docker": docker_settings, "experiment_tracker": mlflow_settings},
     name=f"Feature_Engineering_{os.getenv('GROUP_NAME', 'Default')}",
 )
-def add_features_to_dataset():
+def add_features_to_dataset(
+    fused: bool = False,
+    approximate_bins: bool = False,
+    reuse_bins: bool = False,
+    incremental_tickets: bool = False,
+):
     client = Client()
     raw_data = client.get_artifact_version(
         f"raw_data_{os.getenv('GROUP_NAME', 'Default')}"
     )
+    fitted_age_categories, fitted_fare_categories = None, None
+    if reuse_bins:
+        # Applies the bins of the latest fitted categories instead of fitting new ones.
+        fitted_age_categories = client.get_artifact_version(
+            f"age_categories_{os.getenv('GROUP_NAME', 'Default')}"
+        )
+        fitted_fare_categories = client.get_artifact_version(
+            f"fare_categories_{os.getenv('GROUP_NAME', 'Default')}"
+        )
+    # The medians of the raw data fill the missing values of the passengers scored later on.
+    fit_missing_value_medians(data=raw_data)
     data_without_missing_data = handle_missing_values(raw_data)
-    data_binned_age, age_categories = divide_age_in_bins(data=data_without_missing_data)
+    ticket_frequency_index = None
+    if incremental_tickets:
+        # The raw data is a batch of new passengers, merged into the latest ticket index.
+        ticket_frequency_index = client.get_artifact_version(
+            f"ticket_frequency_index_{os.getenv('GROUP_NAME', 'Default')}"
+        )
+    if fused:
+        # Computes the same combined features in one step, without the intermediate
+        # artifacts of the single feature steps.
+        engineer_features(
+            data=data_without_missing_data,
+            approximate=approximate_bins,
+            age_categories=fitted_age_categories,
+            fare_categories=fitted_fare_categories,
+            ticket_frequency_index=ticket_frequency_index,
+        )
+        return
+    data_binned_age, age_categories = divide_age_in_bins(
+        data=data_without_missing_data,
+        approximate=approximate_bins,
+        age_categories=fitted_age_categories,
+    )
     data_family_size = add_family_size_feature(data=data_without_missing_data)
     data_binned_fare, fare_categories = divide_fare_in_bins(
-        data=data_without_missing_data
+        data=data_without_missing_data,
+        approximate=approximate_bins,
+        fare_categories=fitted_fare_categories,
     )
-    data_w_ticket_frequency = add_ticket_frequency_feature(
-        data=data_without_missing_data
+    data_w_ticket_frequency, _ = add_ticket_frequency_feature(
+        data=data_without_missing_data, ticket_frequency_index=ticket_frequency_index
     )
     data_w_title = add_title_feature(data=data_without_missing_data)
     combine_features(
+        data=data_without_missing_data,
         age_data=data_binned_age,
         family_data=data_family_size,
         fare_data=data_binned_fare,
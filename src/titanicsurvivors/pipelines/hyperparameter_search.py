@@ -0,0 +1,65 @@
+import os
+
+from dotenv import load_dotenv
+from zenml import pipeline
+from zenml.client import Client
+
+from titanicsurvivors.models import titanic_xgboost
+from titanicsurvivors.steps.dataset import (
+    FITTED_ARTIFACTS,
+    feature_transformation,
+    fit_encoders,
+    link_fitted_artifacts,
+    split_data_into_subset,
+)
+from titanicsurvivors.steps.tuning import search_xgb_hyperparameters
+from titanicsurvivors.steps.validation import validate_xgb_model
+from titanicsurvivors.settings import docker_settings, mlflow_settings
+
+load_dotenv()
+
+
+@pipeline(
+    model=titanic_xgboost,
+    settings={"docker": docker_settings, "experiment_tracker": mlflow_settings},
+    name=f"Search_Hyperparameters_{os.getenv('GROUP_NAME', 'Default')}",
+)
+def search_xgb(
+    search: str = "random", n_trials: int = 20, max_workers: int | None = None
+):
+    client = Client()
+
+    data_w_features = client.get_artifact_version(
+        name_id_or_prefix=f"combined_features_{os.getenv('GROUP_NAME', 'Default')}"
+    )
+
+    # The artifacts of the feature engineering run the features come from are pinned to the
+    # model version, so the best model is served with the ones it was trained with.
+    fitted_artifacts = {
+        name: client.get_artifact_version(
+            f"{name}_{os.getenv('GROUP_NAME', 'Default')}"
+        )
+        for name in FITTED_ARTIFACTS
+    }
+    link_fitted_artifacts(**fitted_artifacts)
+    encoders = fit_encoders(data_w_features=data_w_features)
+    encoded_data = feature_transformation(
+        data_w_features=data_w_features, encoders=encoders
+    )
+    train_input, test_input, train_target, test_target = split_data_into_subset(
+        data=encoded_data
+    )
+    # The trials stop early on a validation split of the train split, the test split is only
+    # used to validate the best model, which is linked to the model version of the run.
+    xgb_model = search_xgb_hyperparameters(
+        inputs=train_input,
+        targets=train_target,
+        search=search,
+        n_trials=n_trials,
+        max_workers=max_workers,
+    )
+    validate_xgb_model(model=xgb_model, inputs=test_input, targets=test_target)
+
+
+if __name__ == "__main__":
+    search_xgb()
@@ -14,8 +14,8 @@ load_dotenv()
     name=f"Load_Raw_Data_{os.getenv('GROUP_NAME', 'Default')}",
 )
 def prepare_raw_data():
-    raw_data_files = ["./data/train.csv"]
-    load_raw_data(raw_data_files=raw_data_files)
+    raw_data_files = ["./data"]
+    load_raw_data(raw_data_files=raw_data_files, max_workers=4)
 
 
 if __name__ == "__main__":
@@ -6,11 +6,28 @@ from zenml.client import Client
 
 from titanicsurvivors.models import titanic_xgboost
 from titanicsurvivors.steps.dataset import (
+    FITTED_ARTIFACTS,
+    categorical_feature_transformation,
     feature_transformation,
+    fit_encoders,
+    link_fitted_artifacts,
+    sparse_feature_transformation,
     split_data_into_subset,
+    split_sparse_data_into_subset,
+)
+from titanicsurvivors.steps.feature_engineering.online import (
+    compile_online_transformer,
+)
+from titanicsurvivors.steps.training import (
+    compile_xgb_model,
+    train_xgb_classifier,
+    train_xgb_classifier_out_of_core,
+)
+from titanicsurvivors.steps.validation import (
+    cross_validate_xgb_classifier,
+    validate_xgb_model,
+    validate_xgb_model_out_of_core,
 )
-from titanicsurvivors.steps.training import train_xgb_classifier
-from titanicsurvivors.steps.validation import validate_xgb_model
 from titanicsurvivors.settings import docker_settings, mlflow_settings
 
 load_dotenv()
@@ -21,27 +38,126 @@ load_dotenv()
     settings={"docker": docker_settings, "experiment_tracker": mlflow_settings},
     name=f"Train_Model_{os.getenv('GROUP_NAME', 'Default')}",
 )
-def train_xgb():
+def train_xgb(
+    sparse: bool = False,
+    native_categorical: bool = False,
+    out_of_core: bool = False,
+    performance_profile: bool = False,
+    cross_validate: bool = False,
+    max_depth: int = 50,
+    tree_method: str = "hist",
+    max_bin: int = 256,
+    nthread: int | None = None,
+    online_transformer: bool = False,
+    compile_model: bool = False,
+):
+    if cross_validate and (sparse or out_of_core):
+        raise ValueError(
+            "Cross-validation needs the encoded features as a DataFrame, it is not supported "
+            "with sparse or out-of-core training."
+        )
     client = Client()
 
-    # ... Please add the name of the artifact, that we want to use here
     data_w_features = client.get_artifact_version(
-        name_id_or_prefix=f"<artifact_name>_{os.getenv('GROUP_NAME', 'Default')}"
+        name_id_or_prefix=f"combined_features_{os.getenv('GROUP_NAME', 'Default')}"
     )
 
-    encoded_data = feature_transformation(data_w_features=data_w_features)
-    train_input, test_input, train_target, test_target = split_data_into_subset(
-        data=encoded_data
-    )
+    # The artifacts of the feature engineering run the features come from are pinned to the
+    # model version, so the model is served with the medians, bins and ticket frequencies it
+    # was trained with.
+    fitted_artifacts = {
+        name: client.get_artifact_version(
+            f"{name}_{os.getenv('GROUP_NAME', 'Default')}"
+        )
+        for name in FITTED_ARTIFACTS
+    }
+    link_fitted_artifacts(**fitted_artifacts)
+    encoders = fit_encoders(data_w_features=data_w_features)
+    if online_transformer:
+        # Compiles the artifacts the features were fitted with and the encoders into lookup
+        # tables that transform single passengers at request time.
+        compile_online_transformer(
+            **fitted_artifacts,
+            encoders=encoders,
+            native_categorical=native_categorical,
+        )
+    if out_of_core:
+        # Streams the encoded data from the artifact store into an external-memory DMatrix,
+        # the rounds stop early on a split of the train rows and the test split is held out
+        # for the validation.
+        transformation = (
+            categorical_feature_transformation
+            if native_categorical
+            else feature_transformation
+        )
+        encoded_data = transformation(
+            data_w_features=data_w_features, encoders=encoders
+        )
+        xgb_model = train_xgb_classifier_out_of_core(
+            encoded_data=encoded_data,
+            max_depth=max_depth,
+            eta=0.1,
+            objective="binary:logistic",
+            eval_metric="error",
+            max_bin=max_bin,
+            nthread=nthread,
+        )
+        validate_xgb_model_out_of_core(model=xgb_model, encoded_data=encoded_data)
+        return
+    if native_categorical:
+        # Keeps the categorical features in a single 'category' column each instead of
+        # one-hot encoding them, XGBoost splits on their categories directly.
+        encoded_data = categorical_feature_transformation(
+            data_w_features=data_w_features, encoders=encoders
+        )
+        train_input, test_input, train_target, test_target = split_data_into_subset(
+            data=encoded_data
+        )
+    elif sparse:
+        # Keeps the one-hot encoded features in a CSR matrix from encoding to training.
+        encoded_data = sparse_feature_transformation(
+            data_w_features=data_w_features, encoders=encoders
+        )
+        train_input, test_input, train_target, test_target = (
+            split_sparse_data_into_subset(data=encoded_data)
+        )
+    else:
+        encoded_data = feature_transformation(
+            data_w_features=data_w_features, encoders=encoders
+        )
+        train_input, test_input, train_target, test_target = split_data_into_subset(
+            data=encoded_data
+        )
+    # The performance profile trains on a QuantileDMatrix and stops early on a validation
+    # split of the train split instead of cross-validating on it.
     xgb_model = train_xgb_classifier(
         inputs=train_input,
         targets=train_target,
-        max_depth=50,
+        performance_profile=performance_profile,
+        max_depth=max_depth,
         eta=0.1,
         objective="binary:logistic",
         eval_metric="error",
+        tree_method=tree_method,
+        max_bin=max_bin,
+        nthread=nthread,
     )
     validate_xgb_model(model=xgb_model, inputs=test_input, targets=test_target)
+    if compile_model and not sparse:
+        # Exports the trees as flat arrays with a NumPy predictor, checked against the booster
+        # on the test split.
+        compile_xgb_model(model=xgb_model, inputs=test_input)
+    if cross_validate:
+        # Gives stratified k-fold metrics of the configuration in addition to the ones of the
+        # single test split, the folds are trained concurrently with the rounds of the model.
+        cross_validate_xgb_classifier(
+            data=encoded_data,
+            model=xgb_model,
+            max_depth=max_depth,
+            tree_method=tree_method,
+            max_bin=max_bin,
+            nthread=nthread,
+        )
 
 
 if __name__ == "__main__":
@@ -2,31 +2,144 @@ import os
 from typing import Annotated
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from dotenv import load_dotenv
 
 from zenml import step
 
 from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.materializers import ArrowDataFrameMaterializer
 
 load_dotenv()
 
-
-@step()
+# The groups whose median ages and fares fill the missing ones.
+AGE_GROUP_COLUMNS = [DataFrameColumns.SEX.value, DataFrameColumns.TICKET_CLASS.value]
+FARE_GROUP_COLUMNS = [
+    DataFrameColumns.TICKET_CLASS.value,
+    DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value,
+    DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value,
+]
+# The counts of relatives, which are also groups of the median fares.
+FAMILY_COUNT_COLUMNS = [
+    DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value,
+    DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value,
+]
+MISSING_DECK = "M"
+DECK_DTYPE = pd.CategoricalDtype(["ABC", "DE", "FG", MISSING_DECK])
+DECK_GROUPS = {
+    "A": "ABC",
+    "B": "ABC",
+    "C": "ABC",
+    "T": "ABC",
+    "D": "DE",
+    "E": "DE",
+    "F": "FG",
+    "G": "FG",
+}
+
+
+@step(output_materializers=ArrowDataFrameMaterializer)
 def handle_missing_values(
     data: pd.DataFrame,
+    age_medians: pd.DataFrame | None = None,
+    fare_medians: pd.DataFrame | None = None,
 ) -> Annotated[
     pd.DataFrame, f"data_without_missing_data_{os.getenv('GROUP_NAME', 'Default')}"
 ]:
-    data[DataFrameColumns.AGE.value] = fill_missing_age(data=data)
+    for column in FAMILY_COUNT_COLUMNS:
+        data[column] = fill_missing_count(data=data, column=column)
+    data[DataFrameColumns.AGE.value] = fill_missing_age(data=data, medians=age_medians)
     data[DataFrameColumns.PORT_OF_EMBARKATION.value] = fill_missing_embarked(data=data)
-    data[DataFrameColumns.FARE.value] = fill_missing_fare(data=data)
+    data[DataFrameColumns.FARE.value] = fill_missing_fare(
+        data=data, medians=fare_medians
+    )
     data[DataFrameColumns.DECK.value] = replace_cabin_w_deck(data=data)
     data = data.drop(columns=[DataFrameColumns.CABIN_NUMBER.value])
 
     return data
 
 
-def fill_missing_age(data: pd.DataFrame) -> pd.Series:
+@step(output_materializers=ArrowDataFrameMaterializer)
+def fit_missing_value_medians(
+    data: pd.DataFrame,
+) -> tuple[
+    Annotated[pd.DataFrame, f"age_medians_{os.getenv('GROUP_NAME', 'Default')}"],
+    Annotated[pd.DataFrame, f"fare_medians_{os.getenv('GROUP_NAME', 'Default')}"],
+]:
+    # Fitted on the raw data, so the passengers scored after training are filled with the
+    # medians of the training data instead of the ones of their batch.
+    age_medians = fit_group_medians(
+        data=data, group_columns=AGE_GROUP_COLUMNS, column=DataFrameColumns.AGE.value
+    )
+    fare_medians = fit_group_medians(
+        data=data, group_columns=FARE_GROUP_COLUMNS, column=DataFrameColumns.FARE.value
+    )
+    return age_medians, fare_medians
+
+
+def fit_group_medians(
+    data: pd.DataFrame, group_columns: list[str], column: str
+) -> pd.DataFrame:
+    """
+    Fits the medians of a column by group, to fill the missing values of other data with.
+
+    Args:
+        data: The raw titanic DataFrame to fit the medians on.
+        group_columns: The columns of the groups.
+        column: The column whose medians are fitted.
+
+    Returns:
+        A DataFrame with the group columns and the median of the column per group, groups
+        without any known value are left out.
+    """
+    return data.groupby(group_columns)[column].median().dropna().reset_index()
+
+
+def lookup_group_medians(
+    data: pd.DataFrame, medians: pd.DataFrame, column: str
+) -> pd.Series:
+    """
+    Looks up the fitted median of the group of every row.
+
+    Args:
+        data: The titanic DataFrame containing the group columns of the medians.
+        medians: The medians fitted by `fit_group_medians`.
+        column: The column of the medians.
+
+    Returns:
+        A Series with the median of the group of every row, NaN for groups that were not
+        fitted.
+    """
+    group_columns = [name for name in medians.columns if name != column]
+    return (
+        data[group_columns]
+        .merge(medians, how="left", on=group_columns)[column]
+        .set_axis(data.index)
+    )
+
+
+def fill_missing_count(data: pd.DataFrame, column: str) -> pd.Series:
+    """
+    Fills missing values in a count of relatives, 'SibSp' or 'Parch', with 0.
+
+    The counts are complete in the training data, but a passenger that is scored later on may
+    come without them. A passenger without a known relative is counted as traveling without
+    one, so the family size and the group of the median fare are still defined.
+
+    Args:
+        data: The titanic DataFrame containing the column.
+        column: The count column, 'SibSp' or 'Parch'.
+
+    Returns:
+        A Series representing the count column with missing values filled with 0.
+    """
+    return data[column].fillna(0)
+
+
+def fill_missing_age(
+    data: pd.DataFrame, medians: pd.DataFrame | None = None
+) -> pd.Series:
     """
     Fills missing values in the 'Age' column of data filled with the median age based on
     'Sex' and 'Pclass' groups.
@@ -39,17 +152,28 @@ def fill_missing_age(data: pd.DataFrame) -> pd.Series:
     associated with higher median ages and females generally having slightly lower median ages
     than males.
 
+    Passengers that are scored after training are filled with the medians fitted on the
+    training data by `fit_missing_value_medians`, so their ages do not depend on the other
+    passengers of their batch.
+
     Args:
         data: The titanic DataFrame containing the columns 'Sex', 'Pclass',
                 and 'Age'.
+        medians: The fitted median ages, the medians of `data` if None.
 
     Returns:
         A Series representing the 'Age' column with missing values filled based on
         group medians.
     """
-    return data.groupby(
-        [DataFrameColumns.SEX.value, DataFrameColumns.TICKET_CLASS.value]
-    )[DataFrameColumns.AGE.value].transform(lambda x: x.fillna(x.median()))
+    if medians is not None:
+        median_age = lookup_group_medians(
+            data=data, medians=medians, column=DataFrameColumns.AGE.value
+        )
+    else:
+        median_age = data.groupby(AGE_GROUP_COLUMNS)[
+            DataFrameColumns.AGE.value
+        ].transform("median")
+    return data[DataFrameColumns.AGE.value].fillna(median_age)
 
 
 def fill_missing_embarked(data: pd.DataFrame) -> pd.Series:
@@ -76,7 +200,9 @@ def fill_missing_embarked(data: pd.DataFrame) -> pd.Series:
     return data[DataFrameColumns.PORT_OF_EMBARKATION.value].fillna("S")
 
 
-def fill_missing_fare(data: pd.DataFrame) -> pd.Series:
+def fill_missing_fare(
+    data: pd.DataFrame, medians: pd.DataFrame | None = None
+) -> pd.Series:
     """
     Fills missing values in the 'Fare' column of the data filled with the median Fare of a
     third class passenger traveling alone.
@@ -87,20 +213,25 @@ def fill_missing_fare(data: pd.DataFrame) -> pd.Series:
     replacement for the missing value. This approach is used to estimate the missing Fare in a
     manner aligned with typical fare patterns for such passengers.
 
+    Passengers that are scored after training are filled with the medians fitted on the
+    training data by `fit_missing_value_medians`.
+
     Args:
         data: The titanic DataFrame containing the columns 'Pclass', 'Parch', 'SibSp', and 'Fare'.
+        medians: The fitted median fares, the medians of `data` if None.
 
     Returns:
         A Series representing the 'Fare' column with the missing value filled based on the
         median Fare of a third class passenger traveling alone.
     """
-    med_fare = data.groupby(
-        [
-            DataFrameColumns.TICKET_CLASS.value,
-            DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value,
-            DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value,
-        ]
-    )[DataFrameColumns.FARE.value].transform("median")
+    if medians is not None:
+        med_fare = lookup_group_medians(
+            data=data, medians=medians, column=DataFrameColumns.FARE.value
+        )
+    else:
+        med_fare = data.groupby(FARE_GROUP_COLUMNS)[
+            DataFrameColumns.FARE.value
+        ].transform("median")
 
     return data[DataFrameColumns.FARE.value].fillna(med_fare)
 
@@ -124,28 +255,32 @@ def replace_cabin_w_deck(data: pd.DataFrame) -> pd.Series:
     - The 'T' deck, which only has one 1st class passenger, is grouped with 'A' as it closely
         resembles the A deck.
     - 'M' is used to represent missing 'Cabin' values and is treated as a separate deck due to its
-        distinct characteristics and lower survival rates.
+        distinct characteristics and lower survival rates. Cabins on an unknown deck are treated
+        as missing as well.
+
+    The first letters of the cabins are sliced and dictionary encoded with Arrow string kernels.
+    The deck groups are then looked up in `DECK_GROUPS` once per distinct letter and the codes of
+    the letters are translated to the codes of their groups in a single vectorised step.
 
     Args:
-        data: The titanic DataFrame containing the 'Deck' column.
+        data: The titanic DataFrame containing the 'Cabin' column.
 
     Returns:
-        A Series representing the optimized 'Deck' column with grouped deck values.
+        A categorical Series representing the optimized 'Deck' column with grouped deck values.
     """
 
-    data[DataFrameColumns.DECK.value] = data[DataFrameColumns.CABIN_NUMBER.value].apply(
-        lambda cabin_number: cabin_number[0] if pd.notnull(cabin_number) else "M"
-    )
-
-    idx = data[data[DataFrameColumns.DECK.value] == "T"].index
-    data.loc[idx, DataFrameColumns.DECK.value] = "A"
-    data[DataFrameColumns.DECK.value] = data[DataFrameColumns.DECK.value].replace(
-        ["A", "B", "C"], "ABC"
+    cabins = pa.array(
+        data[DataFrameColumns.CABIN_NUMBER.value], type=pa.string(), from_pandas=True
     )
-    data[DataFrameColumns.DECK.value] = data[DataFrameColumns.DECK.value].replace(
-        ["D", "E"], "DE"
+    decks = pc.utf8_slice_codeunits(cabins, start=0, stop=1).dictionary_encode()
+    group_codes = DECK_DTYPE.categories.get_indexer(
+        [DECK_GROUPS.get(deck, MISSING_DECK) for deck in decks.dictionary.to_pylist()]
+        + [MISSING_DECK]
     )
-    data[DataFrameColumns.DECK.value] = data[DataFrameColumns.DECK.value].replace(
-        ["F", "G"], "FG"
+    # Missing cabins get the code -1, which selects the appended 'M' group.
+    deck_codes = decks.indices.fill_null(-1).to_numpy()
+    return pd.Series(
+        pd.Categorical.from_codes(group_codes[deck_codes], dtype=DECK_DTYPE),
+        index=data.index,
+        name=DataFrameColumns.DECK.value,
     )
-    return data[DataFrameColumns.DECK.value]
@@ -1,18 +1,60 @@
 import os
 
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from dotenv import load_dotenv
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder, LabelEncoder
 from typing_extensions import Annotated
-from zenml import step
+from zenml import link_artifact_to_model, step
+from zenml.artifacts.unmaterialized_artifact import UnmaterializedArtifact
+from zenml.materializers.pandas_materializer import PandasMaterializer
 
 from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.encoding import FeatureEncoders, SparseFeatures, Vocabulary
+from titanicsurvivors.utils.materializers import (
+    ArrowDataFrameMaterializer,
+    FeatureEncodersMaterializer,
+    SparseFeaturesMaterializer,
+)
 
 load_dotenv()
 
+NON_NUMERIC_FEATURES = [
+    DataFrameColumns.PORT_OF_EMBARKATION.value,
+    DataFrameColumns.SEX.value,
+    DataFrameColumns.DECK.value,
+    DataFrameColumns.TITLE.value,
+    DataFrameColumns.FAMILY_SIZE_GROUPED.value,
+]
+CATEGORICAL_FEATURES = [
+    DataFrameColumns.TICKET_CLASS.value,
+    DataFrameColumns.SEX.value,
+    DataFrameColumns.DECK.value,
+    DataFrameColumns.PORT_OF_EMBARKATION.value,
+    DataFrameColumns.TITLE.value,
+    DataFrameColumns.FAMILY_SIZE_GROUPED.value,
+]
+UNUSED_COLUMNS = [
+    DataFrameColumns.NAME.value,
+    DataFrameColumns.TICKET_NUMBER.value,
+    DataFrameColumns.FAMILY_SIZE.value,
+    DataFrameColumns.PASSENGER_ID.value,
+    DataFrameColumns.EVENT_TIMESTAMP.value,
+]
 
-@step
+# The names of the artifacts of the feature engineering pipeline that a model is trained with
+# and that `link_fitted_artifacts` pins to its model version.
+FITTED_ARTIFACTS = [
+    "age_medians",
+    "fare_medians",
+    "age_categories",
+    "fare_categories",
+    "ticket_frequency_index",
+]
+
+
+@step(output_materializers=(ArrowDataFrameMaterializer, PandasMaterializer))
 def split_data_into_subset(
     data: pd.DataFrame, test_split: float = 0.2
 ) -> tuple[
@@ -29,76 +71,260 @@ def split_data_into_subset(
     return train_input, test_input, train_target, test_target
 
 
-@step()
-def feature_transformation(
-    data_w_features: pd.DataFrame,
-) -> Annotated[pd.DataFrame, "encoded_data"]:
-    label_encoder = LabelEncoder()
-    one_hot_encoder = OneHotEncoder()
-    encoded_non_numerical = encode_non_numerical(
-        data=data_w_features, label_encoder=label_encoder
+@step(output_materializers=(SparseFeaturesMaterializer, PandasMaterializer))
+def split_sparse_data_into_subset(
+    data: SparseFeatures, test_split: float = 0.2
+) -> tuple[
+    Annotated[SparseFeatures, f"train_input_{os.getenv('GROUP_NAME', 'Default')}"],
+    Annotated[SparseFeatures, f"test_input_{os.getenv('GROUP_NAME', 'Default')}"],
+    Annotated[pd.Series, f"train_target_{os.getenv('GROUP_NAME', 'Default')}"],
+    Annotated[pd.Series, f"test_target_{os.getenv('GROUP_NAME', 'Default')}"],
+]:
+    # The columns are in the same order as the ones of `split_data_into_subset`.
+    inputs = data.select(
+        sorted(set(data.feature_names) - {DataFrameColumns.SURVIVED.value})
     )
-    encoded_data = encode_categorical(
-        data=encoded_non_numerical, one_hot_encoder=one_hot_encoder
+    targets = pd.Series(
+        data.column(DataFrameColumns.SURVIVED.value).astype(np.int64),
+        name=DataFrameColumns.SURVIVED.value,
     )
-    encoded_data = encoded_data.drop(
-        columns=[
-            column
-            for column in [
-                DataFrameColumns.NAME.value,
-                DataFrameColumns.TICKET_NUMBER.value,
-                DataFrameColumns.FAMILY_SIZE.value,
-                DataFrameColumns.PASSENGER_ID.value,
-                "event_timestamp",
-            ]
-            if column in encoded_data.columns
-        ]
+    train_rows, test_rows = train_test_split(
+        np.arange(len(data)),
+        test_size=test_split,
+        shuffle=True,
+        stratify=targets,
     )
-    return encoded_data
+    return (
+        inputs.take(train_rows),
+        inputs.take(test_rows),
+        targets.iloc[train_rows],
+        targets.iloc[test_rows],
+    )
+
+
+@step(output_materializers=FeatureEncodersMaterializer)
+def fit_encoders(
+    data_w_features: pd.DataFrame,
+) -> Annotated[
+    FeatureEncoders, f"feature_encoders_{os.getenv('GROUP_NAME', 'Default')}"
+]:
+    return fit_feature_encoders(data=data_w_features)
 
 
-def encode_non_numerical(
+@step
+def link_fitted_artifacts(
+    age_medians: UnmaterializedArtifact,
+    fare_medians: UnmaterializedArtifact,
+    age_categories: UnmaterializedArtifact,
+    fare_categories: UnmaterializedArtifact,
+    ticket_frequency_index: UnmaterializedArtifact,
+) -> None:
+    # Pins the artifacts of the feature engineering run the model is trained on to its model
+    # version, so the model is always served with them and not with the ones of a later run.
+    for artifact_version in (
+        age_medians,
+        fare_medians,
+        age_categories,
+        fare_categories,
+        ticket_frequency_index,
+    ):
+        link_artifact_to_model(artifact_version=artifact_version)
+
+
+@step(output_materializers=ArrowDataFrameMaterializer)
+def feature_transformation(
+    data_w_features: pd.DataFrame, encoders: FeatureEncoders
+) -> Annotated[pd.DataFrame, "encoded_data"]:
+    return encode_features(data=data_w_features, encoders=encoders)
+
+
+@step(output_materializers=SparseFeaturesMaterializer)
+def sparse_feature_transformation(
+    data_w_features: pd.DataFrame, encoders: FeatureEncoders
+) -> Annotated[SparseFeatures, "encoded_sparse_data"]:
+    return encode_sparse_features(data=data_w_features, encoders=encoders)
+
+
+@step(output_materializers=ArrowDataFrameMaterializer)
+def categorical_feature_transformation(
+    data_w_features: pd.DataFrame, encoders: FeatureEncoders
+) -> Annotated[pd.DataFrame, "encoded_categorical_data"]:
+    return encode_categorical_features(data=data_w_features, encoders=encoders)
+
+
+def fit_feature_encoders(
     data: pd.DataFrame,
-    label_encoder: LabelEncoder,
     non_numeric_features: list[str] | None = None,
-) -> pd.DataFrame:
-    non_numeric_features = non_numeric_features or [
-        DataFrameColumns.PORT_OF_EMBARKATION.value,
-        DataFrameColumns.SEX.value,
-        DataFrameColumns.DECK.value,
-        DataFrameColumns.TITLE.value,
-        DataFrameColumns.FAMILY_SIZE_GROUPED.value,
+    categorical_features: list[str] | None = None,
+) -> FeatureEncoders:
+    """
+    Fits the vocabularies of the label encoded and of the one-hot encoded features.
+
+    The vocabularies are fitted once on the training data and stored as an artifact, so new
+    batches and single rows are encoded with `encode_features` the same way as the training data.
+
+    Args:
+        data: The titanic DataFrame with all features.
+        non_numeric_features: The features that are label encoded.
+        categorical_features: The features that are one-hot encoded.
+
+    Returns:
+        The fitted feature encoders.
+    """
+    non_numeric_features = non_numeric_features or NON_NUMERIC_FEATURES
+    categorical_features = categorical_features or CATEGORICAL_FEATURES
+    label_vocabularies = {
+        feature: Vocabulary.fit(data[feature]) for feature in non_numeric_features
+    }
+    one_hot_vocabularies = {
+        feature: Vocabulary.fit(
+            label_vocabularies[feature].encode(data[feature])
+            if feature in label_vocabularies
+            else data[feature]
+        )
+        for feature in categorical_features
+    }
+    return FeatureEncoders(
+        label_vocabularies=label_vocabularies,
+        one_hot_vocabularies=one_hot_vocabularies,
+    )
+
+
+def encode_features(data: pd.DataFrame, encoders: FeatureEncoders) -> pd.DataFrame:
+    """
+    Encodes the features of a batch or a single row with fitted feature encoders.
+
+    Args:
+        data: The titanic DataFrame with all features.
+        encoders: The feature encoders fitted by `fit_feature_encoders`.
+
+    Returns:
+        The encoded DataFrame without the columns that are not used for training.
+    """
+    encoded_non_numerical = encode_non_numerical(data=data.copy(), encoders=encoders)
+    encoded_data = encode_categorical(data=encoded_non_numerical, encoders=encoders)
+    return encoded_data.drop(
+        columns=[column for column in UNUSED_COLUMNS if column in encoded_data.columns]
+    )
+
+
+def encode_sparse_features(
+    data: pd.DataFrame, encoders: FeatureEncoders
+) -> SparseFeatures:
+    """
+    Encodes the features of a batch or a single row into a sparse CSR matrix.
+
+    The matrix has the same columns as the DataFrame of `encode_features`, but the one-hot
+    encoded columns are never densified: every row holds its numeric values and a single entry
+    per one-hot encoded feature. The memory therefore grows with the number of encoded features
+    and not with the number of their categories.
+
+    Args:
+        data: The titanic DataFrame with all features.
+        encoders: The feature encoders fitted by `fit_feature_encoders`.
+
+    Returns:
+        The encoded features as a CSR matrix with the names of its columns.
+    """
+    numeric_columns = [
+        column
+        for column in data.columns
+        if column not in encoders.one_hot_vocabularies and column not in UNUSED_COLUMNS
     ]
-    for feature in non_numeric_features:
-        data[feature] = label_encoder.fit_transform(data[feature])
-    return data
+    numeric_data = encode_non_numerical(
+        data=data[
+            list(dict.fromkeys(numeric_columns + list(encoders.label_vocabularies)))
+        ].copy(),
+        encoders=encoders,
+    )[numeric_columns].to_numpy(dtype=np.float32)
 
+    number_of_rows, number_of_numeric = numeric_data.shape
+    rows = [np.repeat(np.arange(number_of_rows), number_of_numeric)]
+    columns = [np.tile(np.arange(number_of_numeric), number_of_rows)]
+    values = [numeric_data.ravel()]
+    offset = number_of_numeric
+    for feature, vocabulary in encoders.one_hot_vocabularies.items():
+        values_to_encode = data[feature]
+        if feature in encoders.label_vocabularies:
+            values_to_encode = encoders.label_vocabularies[feature].encode(
+                values_to_encode
+            )
+        codes = vocabulary.encode(values_to_encode)
+        # Unknown categories have no entry, like the all zero row of `encode_categorical`.
+        encoded_rows = np.flatnonzero(codes >= 0)
+        rows.append(encoded_rows)
+        columns.append(offset + codes[encoded_rows])
+        values.append(np.ones(len(encoded_rows), dtype=np.float32))
+        offset += len(vocabulary)
 
-def encode_categorical(
-    data: pd.DataFrame,
-    one_hot_encoder: OneHotEncoder,
-    categorical_features: list[str] | None = None,
+    matrix = sp.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+        shape=(number_of_rows, offset),
+    )
+    return SparseFeatures(
+        matrix, feature_names=numeric_columns + encoders.one_hot_columns
+    )
+
+
+def encode_categorical_features(
+    data: pd.DataFrame, encoders: FeatureEncoders
 ) -> pd.DataFrame:
-    categorical_features = categorical_features or [
-        DataFrameColumns.TICKET_CLASS.value,
-        DataFrameColumns.SEX.value,
-        DataFrameColumns.DECK.value,
-        DataFrameColumns.PORT_OF_EMBARKATION.value,
-        DataFrameColumns.TITLE.value,
-        DataFrameColumns.FAMILY_SIZE_GROUPED.value,
-    ]
-    one_hot_encoder.fit(data[categorical_features])
-    encoded_array = one_hot_encoder.transform(data[categorical_features])
+    """
+    Encodes the features of a batch or a single row for the native categorical support of
+    XGBoost.
+
+    Instead of being one-hot encoded, every one-hot encoded feature is kept as a single column of
+    the pandas 'category' dtype, whose categories are the fitted vocabulary of the feature. So the
+    codes of a category are the same in every batch, and unknown categories are missing values.
+    The DMatrix of the DataFrame has to be built with `enable_categorical=True`.
+
+    Args:
+        data: The titanic DataFrame with all features.
+        encoders: The feature encoders fitted by `fit_feature_encoders`.
+
+    Returns:
+        The encoded DataFrame without the columns that are not used for training.
+    """
+    encoded_data = data.drop(
+        columns=[column for column in UNUSED_COLUMNS if column in data.columns]
+    )
+    for feature, vocabulary in encoders.label_vocabularies.items():
+        if feature not in encoders.one_hot_vocabularies:
+            encoded_data[feature] = vocabulary.encode(encoded_data[feature])
+    for feature, vocabulary in encoders.one_hot_vocabularies.items():
+        values, categories = encoded_data[feature], vocabulary.categories
+        if feature in encoders.label_vocabularies:
+            label_vocabulary = encoders.label_vocabularies[feature]
+            values = label_vocabulary.encode(values)
+            categories = label_vocabulary.categories[categories]
+        encoded_data[feature] = pd.Categorical.from_codes(
+            vocabulary.encode(values), categories=categories
+        )
+    return encoded_data
+
+
+def encode_non_numerical(data: pd.DataFrame, encoders: FeatureEncoders) -> pd.DataFrame:
+    for feature, vocabulary in encoders.label_vocabularies.items():
+        data[feature] = vocabulary.encode(data[feature])
+    return data
+
+
+def encode_categorical(data: pd.DataFrame, encoders: FeatureEncoders) -> pd.DataFrame:
+    encoded_array = np.zeros((len(data), len(encoders.one_hot_columns)))
+    offset = 0
+    for feature, vocabulary in encoders.one_hot_vocabularies.items():
+        codes = vocabulary.encode(data[feature])
+        # Unknown categories are encoded as all zeros.
+        rows = np.flatnonzero(codes >= 0)
+        encoded_array[rows, offset + codes[rows]] = 1.0
+        offset += len(vocabulary)
 
     encoded_df = pd.DataFrame(
-        encoded_array.toarray(),
-        columns=one_hot_encoder.get_feature_names_out(
-            input_features=categorical_features
-        ),
+        encoded_array, columns=encoders.one_hot_columns, index=data.index
     )
     df_encoded = pd.concat(
         [
-            data.drop(columns=categorical_features),
+            data.drop(columns=list(encoders.one_hot_vocabularies)),
             encoded_df,
         ],
         axis=1,
@@ -6,25 +6,70 @@ from pandas import Categorical
 from typing_extensions import Annotated
 from zenml import step
 
+from titanicsurvivors.utils.binning import (
+    apply_bins,
+    log_bin_edge_errors,
+    quantile_bins,
+)
 from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.experiment_tracking import get_experiment_tracker_name
+from titanicsurvivors.utils.materializers import (
+    INPUT_COLUMNS,
+    ArrowDataFrameMaterializer,
+    CategoricalMaterializer,
+)
 
 load_dotenv()
 
 
-@step(enable_cache=False)
+@step(
+    experiment_tracker=get_experiment_tracker_name(),
+    enable_cache=False,
+    output_materializers=(ArrowDataFrameMaterializer, CategoricalMaterializer),
+    extra={
+        INPUT_COLUMNS: {
+            "data": [
+                DataFrameColumns.PASSENGER_ID.value,
+                DataFrameColumns.AGE.value,
+            ]
+        }
+    },
+)
 def divide_age_in_bins(
-    data: pd.DataFrame, store_init: bool = False
+    data: pd.DataFrame,
+    store_init: bool = False,
+    approximate: bool = False,
+    age_categories: Categorical | None = None,
 ) -> tuple[
     Annotated[pd.DataFrame, f"data_w_binned_age_{os.getenv('GROUP_NAME', 'Default')}"],
     Annotated[Categorical, f"age_categories_{os.getenv('GROUP_NAME', 'Default')}"],
 ]:
-    binned_age_data, age_category_values = bin_age(data=data, store_init=store_init)
-    data.loc[:, DataFrameColumns.AGE.value] = binned_age_data.cat.codes
-    return data, age_category_values
+    binned_age_data, age_category_values = bin_age(
+        data=data,
+        store_init=store_init,
+        approximate=approximate,
+        categories=age_categories,
+    )
+    if approximate and age_categories is None:
+        log_bin_edge_errors(
+            data[DataFrameColumns.AGE.value], categories=age_category_values
+        )
+    age_data = pd.DataFrame(
+        {
+            DataFrameColumns.PASSENGER_ID.value: data[
+                DataFrameColumns.PASSENGER_ID.value
+            ],
+            DataFrameColumns.AGE_CATEGORY.value: binned_age_data.cat.codes,
+        }
+    )
+    return age_data, age_category_values
 
 
 def bin_age(
-    data: pd.DataFrame, store_init: bool = False
+    data: pd.DataFrame,
+    store_init: bool = False,
+    approximate: bool = False,
+    categories: pd.Categorical | None = None,
 ) -> tuple[pd.Series, pd.Categorical]:
     """
     Bins the 'Age' column of a data into 10 quantile-based categories and returns the binned ages
@@ -43,15 +88,23 @@ def bin_age(
 
     Args:
         data: The titanic DataFrame containing the 'Age' column.
+        store_init: Whether duplicate bin edges are dropped instead of raising an error.
+        approximate: Whether the bin edges are estimated with a streaming quantile sketch
+            instead of sorting the whole column, see `quantile_bins`.
+        categories: Previously fitted age bins. If given, the values are binned into them with
+            `apply_bins` instead of fitting new bins.
 
     Returns:
         A tuple containing:
             - A Series representing the binned age values.
             - A Categorical representation of the unique age bins.
     """
-    binned_fare = pd.qcut(
+    if categories is not None:
+        return apply_bins(data[DataFrameColumns.AGE.value], categories), categories
+    binned_fare = quantile_bins(
         data[DataFrameColumns.AGE.value],
         10,
         duplicates="drop" if store_init else "raise",
+        approximate=approximate,
     )
     return binned_fare, binned_fare.unique()
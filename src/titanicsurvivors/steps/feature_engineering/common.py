@@ -4,36 +4,171 @@ from dotenv import load_dotenv
 from typing_extensions import Annotated
 
 import pandas as pd
+from pandas import Categorical
 from zenml import step
 
+from titanicsurvivors.steps.feature_engineering.age import bin_age
+from titanicsurvivors.steps.feature_engineering.family_size import (
+    add_family_size,
+    group_family_size,
+)
+from titanicsurvivors.steps.feature_engineering.fare import bin_fare
+from titanicsurvivors.steps.feature_engineering.ticket import index_ticket_frequencies
+from titanicsurvivors.steps.feature_engineering.title import (
+    add_is_married,
+    add_title,
+    group_titles,
+)
+from titanicsurvivors.utils.binning import log_bin_edge_errors
 from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.experiment_tracking import get_experiment_tracker_name
+from titanicsurvivors.utils.materializers import (
+    ArrowDataFrameMaterializer,
+    CategoricalMaterializer,
+)
 
 load_dotenv()
 
 
-@step
+@step(output_materializers=ArrowDataFrameMaterializer)
 def combine_features(
+    data: pd.DataFrame,
     age_data: pd.DataFrame,
     family_data: pd.DataFrame,
     fare_data: pd.DataFrame,
     ticket_data: pd.DataFrame,
     title_data: pd.DataFrame,
 ) -> Annotated[pd.DataFrame, f"combined_features_{os.getenv('GROUP_NAME', 'Default')}"]:
-    age_data[DataFrameColumns.FAMILY_SIZE_GROUPED.value] = family_data[
-        DataFrameColumns.FAMILY_SIZE_GROUPED.value
-    ]
-    age_data[DataFrameColumns.FARE.value] = fare_data[
+    return join_features(
+        data=data,
+        features=[age_data, family_data, fare_data, ticket_data, title_data],
+    )
+
+
+def join_features(data: pd.DataFrame, features: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Joins feature columns keyed by 'PassengerId' to the titanic DataFrame.
+
+    The rows are matched by their 'PassengerId' and not by their position, so the feature frames
+    may contain their rows in any order. The binned 'Age_Category' and 'Fare_Category' columns
+    replace the original 'Age' and 'Fare' columns.
+
+    Args:
+        data: The titanic DataFrame without missing values.
+        features: DataFrames with a 'PassengerId' column and one or more feature columns.
+
+    Returns:
+        The titanic DataFrame with the feature columns appended.
+    """
+    combined = data.set_index(DataFrameColumns.PASSENGER_ID.value).join(
+        [
+            feature_data.set_index(DataFrameColumns.PASSENGER_ID.value)
+            for feature_data in features
+        ]
+    )
+    combined[DataFrameColumns.AGE.value] = combined.pop(
+        DataFrameColumns.AGE_CATEGORY.value
+    )
+    combined[DataFrameColumns.FARE.value] = combined.pop(
         DataFrameColumns.FARE_CATEGORY.value
-    ]
-    age_data[DataFrameColumns.TICKET_CLASS.value] = ticket_data[
-        DataFrameColumns.TICKET_CLASS.value
-    ]
-    age_data[DataFrameColumns.TICKET_FREQUENCY.value] = ticket_data[
-        DataFrameColumns.TICKET_FREQUENCY.value
-    ]
-    age_data[DataFrameColumns.TITLE.value] = title_data[DataFrameColumns.TITLE.value]
-    age_data[DataFrameColumns.IS_MARRIED.value] = title_data[
-        DataFrameColumns.IS_MARRIED.value
-    ]
-
-    return age_data
+    )
+    return combined.reset_index()
+
+
+@step(
+    experiment_tracker=get_experiment_tracker_name(),
+    enable_cache=False,
+    output_materializers=(ArrowDataFrameMaterializer, CategoricalMaterializer),
+)
+def engineer_features(
+    data: pd.DataFrame,
+    store_init: bool = False,
+    approximate: bool = False,
+    age_categories: Categorical | None = None,
+    fare_categories: Categorical | None = None,
+    ticket_frequency_index: pd.DataFrame | None = None,
+) -> tuple[
+    Annotated[pd.DataFrame, f"combined_features_{os.getenv('GROUP_NAME', 'Default')}"],
+    Annotated[Categorical, f"age_categories_{os.getenv('GROUP_NAME', 'Default')}"],
+    Annotated[Categorical, f"fare_categories_{os.getenv('GROUP_NAME', 'Default')}"],
+    Annotated[
+        pd.DataFrame, f"ticket_frequency_index_{os.getenv('GROUP_NAME', 'Default')}"
+    ],
+]:
+    """
+    Computes all features of the feature engineering pipeline in a single step.
+
+    This is the fused alternative to running `divide_age_in_bins`, `add_family_size_feature`,
+    `divide_fare_in_bins`, `add_ticket_frequency_feature`, `add_title_feature` and
+    `combine_features` one after another. The cleaned data is loaded once and every feature is
+    derived from the same frame, so there are no intermediate artifacts. The resulting
+    'combined_features' artifact has the same columns as the one of `combine_features`, and the
+    ticket frequency index is stored like by `add_ticket_frequency_feature`.
+
+    Args:
+        data: The titanic DataFrame without missing values.
+        store_init: Whether duplicate bin edges are dropped instead of raising an error.
+        approximate: Whether the age and fare bin edges are estimated with a streaming
+            quantile sketch, their errors are logged to the experiment tracker.
+        age_categories: Previously fitted age bins that are applied instead of fitting new ones.
+        fare_categories: Previously fitted fare bins that are applied instead of fitting new ones.
+        ticket_frequency_index: A stored ticket frequency index that the data is merged into as
+            a batch of new passengers, instead of building a new one.
+
+    Returns:
+        A tuple containing:
+            - The DataFrame with all features.
+            - A Categorical representation of the unique age bins.
+            - A Categorical representation of the unique fare bins.
+            - The ticket frequency index.
+    """
+    binned_age_data, age_category_values = bin_age(
+        data=data,
+        store_init=store_init,
+        approximate=approximate,
+        categories=age_categories,
+    )
+    binned_fare_data, fare_category_values = bin_fare(
+        data=data,
+        store_init=store_init,
+        approximate=approximate,
+        categories=fare_categories,
+    )
+    if approximate and age_categories is None:
+        log_bin_edge_errors(
+            data[DataFrameColumns.AGE.value], categories=age_category_values
+        )
+    if approximate and fare_categories is None:
+        log_bin_edge_errors(
+            data[DataFrameColumns.FARE.value], categories=fare_category_values
+        )
+    family_size = pd.DataFrame(
+        {DataFrameColumns.FAMILY_SIZE.value: add_family_size(data=data)}
+    )
+    title = pd.DataFrame({DataFrameColumns.TITLE.value: add_title(data=data)})
+    ticket_frequencies, ticket_frequency_index = index_ticket_frequencies(
+        data=data, ticket_frequency_index=ticket_frequency_index
+    )
+
+    features = pd.DataFrame(
+        {
+            DataFrameColumns.PASSENGER_ID.value: data[
+                DataFrameColumns.PASSENGER_ID.value
+            ],
+            DataFrameColumns.AGE_CATEGORY.value: binned_age_data.cat.codes,
+            DataFrameColumns.FAMILY_SIZE_GROUPED.value: group_family_size(
+                data=family_size
+            ),
+            DataFrameColumns.FARE_CATEGORY.value: binned_fare_data.cat.codes,
+            DataFrameColumns.TICKET_FREQUENCY.value: ticket_frequencies,
+            DataFrameColumns.TITLE.value: group_titles(data=title),
+            DataFrameColumns.IS_MARRIED.value: add_is_married(data=title),
+        }
+    )
+    combined_features = join_features(data=data, features=[features])
+    return (
+        combined_features,
+        age_category_values,
+        fare_category_values,
+        ticket_frequency_index,
+    )
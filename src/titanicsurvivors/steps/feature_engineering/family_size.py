@@ -3,39 +3,74 @@ import os
 from dotenv import load_dotenv
 from typing_extensions import Annotated
 
+import numpy as np
 import pandas as pd
 from zenml import step
 
 from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.materializers import (
+    INPUT_COLUMNS,
+    ArrowDataFrameMaterializer,
+)
 
 load_dotenv()
 
-
-@step
+FAMILY_SIZE_GROUP_EDGES = [0, 1, 4, np.inf]
+FAMILY_SIZE_GROUPS = pd.CategoricalDtype(["Alone", "Small", "Large"], ordered=True)
+
+
+@step(
+    output_materializers=ArrowDataFrameMaterializer,
+    extra={
+        INPUT_COLUMNS: {
+            "data": [
+                DataFrameColumns.PASSENGER_ID.value,
+                DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value,
+                DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value,
+            ]
+        }
+    },
+)
 def add_family_size_feature(
     data: pd.DataFrame,
 ) -> Annotated[
     pd.DataFrame, f"data_w_family_size_{os.getenv('GROUP_NAME', 'Default')}"
 ]:
-    family_size = add_family_size(data=data)
-    data.loc[:, DataFrameColumns.FAMILY_SIZE.value] = family_size
-    data.loc[:, DataFrameColumns.FAMILY_SIZE_GROUPED.value] = group_family_size(
-        data=data
+    family_size = pd.DataFrame(
+        {DataFrameColumns.FAMILY_SIZE.value: add_family_size(data=data)}
+    )
+    family_data = pd.DataFrame(
+        {
+            DataFrameColumns.PASSENGER_ID.value: data[
+                DataFrameColumns.PASSENGER_ID.value
+            ],
+            DataFrameColumns.FAMILY_SIZE_GROUPED.value: group_family_size(
+                data=family_size
+            ),
+        }
     )
-    return data
+    return family_data
 
 
 def group_family_size(data: pd.DataFrame) -> pd.Series:
-    return data[DataFrameColumns.FAMILY_SIZE.value].apply(get_family_size_group)
+    """
+    Groups the 'Family_Size' column of data into the categories 'Alone', 'Small' and 'Large'.
 
+    The sizes are binned with the fixed edges of `FAMILY_SIZE_GROUP_EDGES`: a size of 1 is
+    'Alone', sizes from 2 to 4 are 'Small' and sizes of 5 and more are 'Large'. Sizes below 1
+    are not a valid family size and, like missing sizes, end up as missing values.
 
-def get_family_size_group(family_size: int) -> str:
-    if family_size == 1:
-        return "Alone"
-    if 1 < family_size < 5:
-        return "Small"
-    if family_size >= 5:
-        return "Large"
+    Args:
+        data: The titanic DataFrame containing the 'Family_Size' column.
+
+    Returns:
+        A categorical Series representing the family size groups.
+    """
+    return pd.cut(
+        data[DataFrameColumns.FAMILY_SIZE.value],
+        bins=FAMILY_SIZE_GROUP_EDGES,
+        labels=FAMILY_SIZE_GROUPS.categories,
+    )
 
 
 def add_family_size(data: pd.DataFrame) -> pd.Series:
@@ -52,11 +87,11 @@ def add_family_size(data: pd.DataFrame) -> pd.Series:
                              and number of parents/children.
 
     Returns:
-        A Series representing the family size of each passenger.
+        An integer Series representing the family size of each passenger.
     """
 
     return (
         data[DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value]
         + data[DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value]
         + 1
-    )
+    ).astype(np.int64)
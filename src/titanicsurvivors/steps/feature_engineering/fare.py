@@ -7,25 +7,69 @@ import pandas as pd
 from pandas import Categorical
 from zenml import step
 
+from titanicsurvivors.utils.binning import (
+    apply_bins,
+    log_bin_edge_errors,
+    quantile_bins,
+)
 from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.experiment_tracking import get_experiment_tracker_name
+from titanicsurvivors.utils.materializers import (
+    INPUT_COLUMNS,
+    ArrowDataFrameMaterializer,
+    CategoricalMaterializer,
+)
 
 load_dotenv()
 
 
-@step
+@step(
+    experiment_tracker=get_experiment_tracker_name(),
+    output_materializers=(ArrowDataFrameMaterializer, CategoricalMaterializer),
+    extra={
+        INPUT_COLUMNS: {
+            "data": [
+                DataFrameColumns.PASSENGER_ID.value,
+                DataFrameColumns.FARE.value,
+            ]
+        }
+    },
+)
 def divide_fare_in_bins(
-    data: pd.DataFrame, store_init: bool = False
+    data: pd.DataFrame,
+    store_init: bool = False,
+    approximate: bool = False,
+    fare_categories: Categorical | None = None,
 ) -> tuple[
     Annotated[pd.DataFrame, f"data_w_binned_fare_{os.getenv('GROUP_NAME', 'Default')}"],
     Annotated[Categorical, f"fare_categories_{os.getenv('GROUP_NAME', 'Default')}"],
 ]:
-    binned_fare_data, fare_category_values = bin_fare(data=data, store_init=store_init)
-    data.loc[:, DataFrameColumns.FARE_CATEGORY.value] = binned_fare_data.cat.codes
-    return data, fare_category_values
+    binned_fare_data, fare_category_values = bin_fare(
+        data=data,
+        store_init=store_init,
+        approximate=approximate,
+        categories=fare_categories,
+    )
+    if approximate and fare_categories is None:
+        log_bin_edge_errors(
+            data[DataFrameColumns.FARE.value], categories=fare_category_values
+        )
+    fare_data = pd.DataFrame(
+        {
+            DataFrameColumns.PASSENGER_ID.value: data[
+                DataFrameColumns.PASSENGER_ID.value
+            ],
+            DataFrameColumns.FARE_CATEGORY.value: binned_fare_data.cat.codes,
+        }
+    )
+    return fare_data, fare_category_values
 
 
 def bin_fare(
-    data: pd.DataFrame, store_init: bool = False
+    data: pd.DataFrame,
+    store_init: bool = False,
+    approximate: bool = False,
+    categories: pd.Categorical | None = None,
 ) -> tuple[pd.Series, pd.Categorical]:
     """
     Bins the 'Fare' column of data into 13 quantile-based categories and returns the binned fares
@@ -45,16 +89,23 @@ def bin_fare(
 
     Args:
         data: The titanic DataFrame containing the 'Fare' column.
+        store_init: Whether duplicate bin edges are dropped instead of raising an error.
+        approximate: Whether the bin edges are estimated with a streaming quantile sketch
+            instead of sorting the whole column, see `quantile_bins`.
+        categories: Previously fitted fare bins. If given, the values are binned into them with
+            `apply_bins` instead of fitting new bins.
 
     Returns:
         A tuple containing:
             - A Series representing the binned fare values.
             - A Categorical representation of the unique fare bins.
     """
-
-    binned_fare = pd.qcut(
+    if categories is not None:
+        return apply_bins(data[DataFrameColumns.FARE.value], categories), categories
+    binned_fare = quantile_bins(
         data[DataFrameColumns.FARE.value],
         13,
         duplicates="drop" if store_init else "raise",
+        approximate=approximate,
     )
     return binned_fare, binned_fare.unique()
@@ -0,0 +1,139 @@
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+from pandas import Categorical
+from typing_extensions import Annotated
+from zenml import step
+
+from titanicsurvivors.steps.data_cleaning import DECK_GROUPS, MISSING_DECK
+from titanicsurvivors.steps.feature_engineering.family_size import (
+    FAMILY_SIZE_GROUP_EDGES,
+    FAMILY_SIZE_GROUPS,
+)
+from titanicsurvivors.steps.feature_engineering.title import (
+    TITLE_GROUPS,
+    TITLE_PATTERN,
+)
+from titanicsurvivors.utils.binning import categories_to_edges
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.encoding import FeatureEncoders
+from titanicsurvivors.utils.materializers import (
+    INPUT_COLUMNS,
+    OnlineTransformerMaterializer,
+)
+from titanicsurvivors.utils.online import NUMERIC_FEATURES, OnlineTransformer
+
+load_dotenv()
+
+# The port of embarkation of passengers without one, see `fill_missing_embarked`.
+MISSING_EMBARKED = "S"
+
+
+@step(
+    output_materializers=OnlineTransformerMaterializer,
+    extra={
+        INPUT_COLUMNS: {
+            "ticket_frequency_index": [
+                DataFrameColumns.TICKET_NUMBER.value,
+                DataFrameColumns.TICKET_FREQUENCY.value,
+            ]
+        }
+    },
+)
+def compile_online_transformer(
+    age_medians: pd.DataFrame,
+    fare_medians: pd.DataFrame,
+    age_categories: Categorical,
+    fare_categories: Categorical,
+    ticket_frequency_index: pd.DataFrame,
+    encoders: FeatureEncoders,
+    native_categorical: bool = False,
+) -> Annotated[
+    OnlineTransformer, f"online_transformer_{os.getenv('GROUP_NAME', 'Default')}"
+]:
+    return build_online_transformer(
+        age_medians=age_medians,
+        fare_medians=fare_medians,
+        age_categories=age_categories,
+        fare_categories=fare_categories,
+        ticket_frequencies=ticket_frequency_index.set_index(
+            DataFrameColumns.TICKET_NUMBER.value
+        )[DataFrameColumns.TICKET_FREQUENCY.value],
+        encoders=encoders,
+        native_categorical=native_categorical,
+    )
+
+
+def build_online_transformer(
+    age_medians: pd.DataFrame,
+    fare_medians: pd.DataFrame,
+    age_categories: Categorical,
+    fare_categories: Categorical,
+    ticket_frequencies: pd.Series,
+    encoders: FeatureEncoders,
+    native_categorical: bool = False,
+    feature_names: list[str] | None = None,
+) -> OnlineTransformer:
+    """
+    Compiles the fitted artifacts of the training pipeline into an `OnlineTransformer`.
+
+    Missing ages and fares are filled with the group medians fitted on the raw training data by
+    `fit_missing_value_medians`, like the batch scoring does. The vocabularies of the encoders are
+    resolved to the position, and for native categorical features the code, that every category
+    of a feature has in the feature vector.
+
+    Args:
+        age_medians: The median ages fitted by `fit_missing_value_medians`.
+        fare_medians: The median fares fitted by `fit_missing_value_medians`.
+        age_categories: The fitted age bins.
+        fare_categories: The fitted fare bins.
+        ticket_frequencies: The ticket frequency index, indexed by the ticket number.
+        encoders: The feature encoders fitted by `fit_feature_encoders`.
+        native_categorical: Whether the model was trained on the features of
+            `encode_categorical_features` instead of `encode_features`.
+        feature_names: The column order of the model, by default the sorted encoded columns
+            as given by `split_data_into_subset`.
+
+    Returns:
+        The compiled transformer.
+    """
+    categorical_columns = (
+        list(encoders.one_hot_vocabularies)
+        if native_categorical
+        else encoders.one_hot_columns
+    )
+    feature_names = feature_names or sorted(NUMERIC_FEATURES + categorical_columns)
+    positions = {name: position for position, name in enumerate(feature_names)}
+    categories = {}
+    for feature, vocabulary in encoders.one_hot_vocabularies.items():
+        values = vocabulary.categories
+        if feature in encoders.label_vocabularies:
+            values = encoders.label_vocabularies[feature].categories[values]
+        categories[feature] = [
+            [value, positions[feature], code]
+            if native_categorical
+            else [value, positions[f"{feature}_{label}"], 1]
+            for code, (value, label) in enumerate(
+                zip(values.tolist(), vocabulary.categories.tolist())
+            )
+        ]
+
+    return OnlineTransformer(
+        feature_names=feature_names,
+        age_edges=categories_to_edges(age_categories).tolist(),
+        fare_edges=categories_to_edges(fare_categories).tolist(),
+        age_medians=age_medians.astype(object).values.tolist(),
+        fare_medians=fare_medians.astype(object).values.tolist(),
+        ticket_frequencies={
+            ticket: int(frequency) for ticket, frequency in ticket_frequencies.items()
+        },
+        categories=categories,
+        deck_groups=DECK_GROUPS,
+        missing_deck=MISSING_DECK,
+        missing_embarked=MISSING_EMBARKED,
+        title_pattern=TITLE_PATTERN,
+        title_groups=TITLE_GROUPS,
+        family_size_edges=[float(edge) for edge in FAMILY_SIZE_GROUP_EDGES],
+        family_size_groups=FAMILY_SIZE_GROUPS.categories.tolist(),
+    )
@@ -3,23 +3,88 @@ import os
 from dotenv import load_dotenv
 from typing_extensions import Annotated
 
+import numpy as np
 import pandas as pd
 from zenml import step
 
 from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.materializers import (
+    INPUT_COLUMNS,
+    ArrowDataFrameMaterializer,
+)
 
 load_dotenv()
 
 
-@step
+@step(
+    output_materializers=ArrowDataFrameMaterializer,
+    extra={
+        INPUT_COLUMNS: {
+            "data": [
+                DataFrameColumns.PASSENGER_ID.value,
+                DataFrameColumns.TICKET_NUMBER.value,
+            ]
+        }
+    },
+)
 def add_ticket_frequency_feature(
-    data: pd.DataFrame,
-) -> Annotated[
-    pd.DataFrame, f"data_w_ticket_frequency_{os.getenv('GROUP_NAME', 'Default')}"
+    data: pd.DataFrame, ticket_frequency_index: pd.DataFrame | None = None
+) -> tuple[
+    Annotated[
+        pd.DataFrame, f"data_w_ticket_frequency_{os.getenv('GROUP_NAME', 'Default')}"
+    ],
+    Annotated[
+        pd.DataFrame, f"ticket_frequency_index_{os.getenv('GROUP_NAME', 'Default')}"
+    ],
 ]:
-    frequency = add_ticket_frequency(data=data)
-    data.loc[:, DataFrameColumns.TICKET_FREQUENCY.value] = frequency
-    return data
+    frequencies, index = index_ticket_frequencies(
+        data=data, ticket_frequency_index=ticket_frequency_index
+    )
+    ticket_data = pd.DataFrame(
+        {
+            DataFrameColumns.PASSENGER_ID.value: data[
+                DataFrameColumns.PASSENGER_ID.value
+            ],
+            DataFrameColumns.TICKET_FREQUENCY.value: frequencies,
+        }
+    )
+    return ticket_data, index
+
+
+def index_ticket_frequencies(
+    data: pd.DataFrame, ticket_frequency_index: pd.DataFrame | None = None
+) -> tuple[pd.Series, pd.DataFrame]:
+    """
+    Indexes the tickets of the passengers and looks up their ticket frequencies in the index.
+
+    Without a previous index the frequencies are the ones of `add_ticket_frequency`. With one,
+    the data is a batch of new passengers that is merged into it with
+    `update_ticket_frequency_index`, and the frequencies also count the passengers seen before.
+
+    Args:
+        data: The titanic DataFrame containing the 'PassengerId' and 'Ticket' columns.
+        ticket_frequency_index: The stored ticket frequency index of the passengers seen so
+            far, None to build a new one.
+
+    Returns:
+        A tuple containing:
+            - A Series representing the ticket frequency of every passenger.
+            - The ticket frequency index including the passengers, with the ticket number as a
+              column, as it is stored.
+    """
+    if ticket_frequency_index is None:
+        index = build_ticket_passenger_index(data=data)
+    else:
+        index = update_ticket_frequency_index(
+            index=ticket_frequency_index.set_index(
+                DataFrameColumns.TICKET_NUMBER.value
+            ),
+            data=data,
+        )
+    frequencies = lookup_ticket_frequency(
+        index=index[DataFrameColumns.TICKET_FREQUENCY.value], data=data
+    )
+    return frequencies, index.reset_index()
 
 
 def add_ticket_frequency(data: pd.DataFrame) -> pd.Series:
@@ -53,3 +118,171 @@ def add_ticket_frequency(data: pd.DataFrame) -> pd.Series:
     return data.groupby(DataFrameColumns.TICKET_NUMBER.value)[
         DataFrameColumns.TICKET_NUMBER.value
     ].transform("count")
+
+
+def build_ticket_frequency_index(data: pd.DataFrame) -> pd.Series:
+    """
+    Counts the passengers per ticket number.
+
+    The index is a Series from the ticket number to its frequency. Looking up the frequencies of
+    the passengers with `lookup_ticket_frequency` gives the same values as
+    `add_ticket_frequency`, but the index can be stored and updated with new passengers.
+
+    Args:
+        data: The titanic DataFrame containing the 'Ticket' column.
+
+    Returns:
+        The frequency of every ticket number, indexed by the ticket number.
+    """
+    return (
+        data[DataFrameColumns.TICKET_NUMBER.value]
+        .value_counts(sort=False)
+        .rename(DataFrameColumns.TICKET_FREQUENCY.value)
+    )
+
+
+def build_ticket_passenger_index(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Counts the passengers per ticket number and keeps their 'PassengerId's.
+
+    This is the ticket frequency index that is stored between runs of the feature engineering
+    pipeline. The 'PassengerId's make `update_ticket_frequency_index` count every passenger
+    only once, however often it is merged. Steps that only look up frequencies read the
+    'Ticket' and 'Ticket_Frequency' columns of the stored index with `INPUT_COLUMNS`, so they
+    do not load the 'PassengerId's.
+
+    Args:
+        data: The titanic DataFrame containing the 'PassengerId' and 'Ticket' columns.
+
+    Returns:
+        The frequency and the array of 'PassengerId's of every ticket number, indexed by the
+        ticket number.
+    """
+    data = data.drop_duplicates(DataFrameColumns.PASSENGER_ID.value)
+    codes, tickets = pd.factorize(data[DataFrameColumns.TICKET_NUMBER.value])
+    return _group_passenger_ids(
+        tickets=pd.Index(tickets, name=DataFrameColumns.TICKET_NUMBER.value),
+        codes=codes,
+        passenger_ids=data[DataFrameColumns.PASSENGER_ID.value].to_numpy(np.int64),
+    )
+
+
+def update_ticket_frequency_index(
+    index: pd.DataFrame, data: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Merges a batch of new passengers into a ticket frequency index.
+
+    Passengers whose 'PassengerId' is already listed for their ticket are skipped, so merging
+    the same batch again, e.g. when a pipeline run is retried, leaves the index unchanged. This
+    is why the index keeps the 'PassengerId's of every ticket and grows with the passengers and
+    not only with the tickets: counting every passenger once needs to know which passengers
+    were counted.
+
+    The new passengers are found with a join of the batch and the known passengers of its
+    tickets only, which costs O(batch). The returned index is a copy of the whole index with
+    the tickets of the batch replaced, which costs O(passengers seen so far). The copy is not
+    avoided on purpose: the index is stored as an immutable artifact, so every pipeline run
+    writes a new version of the whole index anyway, and the copy is a small part of writing
+    it.
+
+    Args:
+        index: The ticket frequency index of the passengers seen so far, as built by
+            `build_ticket_passenger_index`.
+        data: The titanic DataFrame of the new passengers containing the 'PassengerId' and
+            'Ticket' columns.
+
+    Returns:
+        The ticket frequency index of all passengers.
+    """
+    batch = build_ticket_passenger_index(data=data)
+    if batch.empty:
+        return index
+    known = index[DataFrameColumns.PASSENGER_IDS.value].reindex(batch.index)
+    is_known = known.notna().to_numpy()
+    tickets = np.arange(len(batch))
+    # The known and the new 'PassengerId's are flattened into (ticket, PassengerId) pairs, so
+    # the new passengers are found with a single hash join over all tickets of the batch.
+    known_codes = np.repeat(
+        tickets[is_known],
+        index[DataFrameColumns.TICKET_FREQUENCY.value]
+        .reindex(batch.index)
+        .to_numpy()[is_known]
+        .astype(np.int64),
+    )
+    known_ids = np.concatenate([np.empty(0, np.int64), *known[is_known]])
+    new_codes = np.repeat(tickets, batch[DataFrameColumns.TICKET_FREQUENCY.value])
+    new_ids = np.concatenate(batch[DataFrameColumns.PASSENGER_IDS.value].tolist())
+    unseen = ~_is_known_pair(
+        codes=new_codes,
+        passenger_ids=new_ids,
+        known_codes=known_codes,
+        known_ids=known_ids,
+    )
+    merged = _group_passenger_ids(
+        tickets=batch.index,
+        codes=np.concatenate([known_codes, new_codes[unseen]]),
+        passenger_ids=np.concatenate([known_ids, new_ids[unseen]]),
+    )
+    return pd.concat([index[~index.index.isin(batch.index)], merged])
+
+
+def _is_known_pair(
+    codes: np.ndarray,
+    passenger_ids: np.ndarray,
+    known_codes: np.ndarray,
+    known_ids: np.ndarray,
+) -> np.ndarray:
+    # A pair is packed into a single integer, which hashes much faster than a tuple, if the
+    # 'PassengerId's are non-negative and the packed integers do not overflow.
+    stride = int(max(known_ids.max(initial=0), passenger_ids.max(initial=0))) + 1
+    if (
+        min(known_ids.min(initial=0), passenger_ids.min(initial=0)) >= 0
+        and (int(codes.max(initial=0)) + 1) * stride < 2**63
+    ):
+        return pd.Index(codes * stride + passenger_ids).isin(
+            known_codes * stride + known_ids
+        )
+    return pd.MultiIndex.from_arrays([codes, passenger_ids]).isin(
+        pd.MultiIndex.from_arrays([known_codes, known_ids])
+    )
+
+
+def _group_passenger_ids(
+    tickets: pd.Index, codes: np.ndarray, passenger_ids: np.ndarray
+) -> pd.DataFrame:
+    # The 'PassengerId's are sorted by the code of their ticket and split into one array per
+    # ticket, which is much faster than collecting them with a groupby. The stable sort keeps
+    # the order in which they were merged.
+    frequencies = np.bincount(codes, minlength=len(tickets)).astype(np.int64)
+    grouped = np.split(
+        passenger_ids[np.argsort(codes, kind="stable")], np.cumsum(frequencies)[:-1]
+    )
+    return pd.DataFrame(
+        {
+            DataFrameColumns.TICKET_FREQUENCY.value: frequencies,
+            DataFrameColumns.PASSENGER_IDS.value: pd.Series(
+                grouped[: len(tickets)], index=tickets, dtype=object
+            ),
+        },
+        index=tickets,
+    )
+
+
+def lookup_ticket_frequency(index: pd.Series, data: pd.DataFrame) -> pd.Series:
+    """
+    Looks up the ticket frequency of every passenger in a ticket frequency index.
+
+    Each lookup is a single hash table probe. Ticket numbers that are not in the index, e.g. of a
+    passenger scored before being merged into the index, have a frequency of 1.
+
+    Args:
+        index: The ticket frequency index.
+        data: The titanic DataFrame containing the 'Ticket' column.
+
+    Returns:
+        A Series representing the frequency of the ticket number of every passenger.
+    """
+    return (
+        data[DataFrameColumns.TICKET_NUMBER.value].map(index).fillna(1).astype(np.int64)
+    )
@@ -0,0 +1,439 @@
+import os
+import tempfile
+import time
+from collections.abc import Iterable, Iterator
+from os.path import join
+from typing import Literal
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import xgboost as xgb
+from dotenv import load_dotenv
+from joblib import Parallel, delayed
+from pandas import Categorical
+from pyarrow import csv
+from typing_extensions import Annotated
+from zenml import log_metadata, step
+from zenml.artifacts.unmaterialized_artifact import UnmaterializedArtifact
+from zenml.io import fileio
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.dataset import (
+    encode_categorical_features,
+    encode_features,
+)
+from titanicsurvivors.steps.feature_engineering.family_size import (
+    add_family_size,
+    group_family_size,
+)
+from titanicsurvivors.steps.feature_engineering.ticket import lookup_ticket_frequency
+from titanicsurvivors.steps.feature_engineering.title import (
+    add_is_married,
+    add_title,
+    group_titles,
+)
+from titanicsurvivors.utils.binning import apply_bins
+from titanicsurvivors.utils.cache import get_artifact_cache
+from titanicsurvivors.utils.cpu import available_cpus
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.encoding import FeatureEncoders
+from titanicsurvivors.utils.external_memory import BATCH_SIZE
+from titanicsurvivors.utils.materializers import INPUT_COLUMNS
+from titanicsurvivors.utils.metrics import THRESHOLD
+
+load_dotenv()
+
+# The boosters and scorers of a worker process by the path they were loaded from, set by
+# `load_model` and `load_scorer`.
+_worker_models: dict[str, xgb.Booster] = {}
+_worker_scorers: dict[str, "PassengerScorer"] = {}
+
+
+class PassengerScorer:
+    """
+    The fitted feature artifacts and the saved model that score batches of raw passengers.
+
+    The scorer is saved once by `score_passenger_batches` and loaded only once per worker process
+    with `load_scorer`, the batches only carry its path. It holds the path of the model and not
+    the Booster, which each worker also loads only once with `load_model`.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        encoders: FeatureEncoders,
+        age_medians: pd.DataFrame,
+        fare_medians: pd.DataFrame,
+        age_categories: Categorical,
+        fare_categories: Categorical,
+        ticket_frequencies: pd.Series,
+        native_categorical: bool = False,
+        threshold: float = THRESHOLD,
+        nthread: int = 1,
+    ):
+        self.model_path = model_path
+        self.encoders = encoders
+        self.age_medians = age_medians
+        self.fare_medians = fare_medians
+        self.age_categories = age_categories
+        self.fare_categories = fare_categories
+        self.ticket_frequencies = ticket_frequencies
+        self.native_categorical = native_categorical
+        self.threshold = threshold
+        self.nthread = nthread
+
+    def score(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Predicts the survival of a batch of raw passengers.
+
+        Args:
+            data: The raw titanic DataFrame of the passengers.
+
+        Returns:
+            The 'PassengerId', the predicted 'Survived' label and its 'Survival_Probability'.
+        """
+        model = load_model(self.model_path, nthread=self.nthread)
+        inputs = transform_passengers(
+            data=data,
+            encoders=self.encoders,
+            age_medians=self.age_medians,
+            fare_medians=self.fare_medians,
+            age_categories=self.age_categories,
+            fare_categories=self.fare_categories,
+            ticket_frequencies=self.ticket_frequencies,
+            native_categorical=self.native_categorical,
+        )
+        probabilities = model.predict(
+            xgb.DMatrix(
+                inputs[model.feature_names],
+                enable_categorical=True,
+                nthread=self.nthread,
+            )
+        )
+        return pd.DataFrame(
+            {
+                DataFrameColumns.PASSENGER_ID.value: data[
+                    DataFrameColumns.PASSENGER_ID.value
+                ].to_numpy(),
+                DataFrameColumns.SURVIVED.value: (
+                    probabilities > np.float32(self.threshold)
+                ).astype(np.int64),
+                DataFrameColumns.SURVIVAL_PROBABILITY.value: probabilities,
+            }
+        )
+
+
+@step(
+    enable_cache=False,
+    extra={
+        INPUT_COLUMNS: {
+            "ticket_frequency_index": [
+                DataFrameColumns.TICKET_NUMBER.value,
+                DataFrameColumns.TICKET_FREQUENCY.value,
+            ]
+        }
+    },
+)
+def score_passengers(
+    model: UnmaterializedArtifact,
+    encoders: UnmaterializedArtifact,
+    age_medians: UnmaterializedArtifact,
+    fare_medians: UnmaterializedArtifact,
+    age_categories: UnmaterializedArtifact,
+    fare_categories: UnmaterializedArtifact,
+    ticket_frequency_index: pd.DataFrame,
+    input_files: list[str],
+    output_path: str,
+    input_format: Literal["csv", "parquet"] = "csv",
+    batch_size: int = BATCH_SIZE,
+    max_workers: int | None = None,
+    native_categorical: bool = False,
+    threshold: float = THRESHOLD,
+) -> Annotated[str, f"batch_predictions_{os.getenv('GROUP_NAME', 'Default')}"]:
+    # The model and the fitted artifacts are loaded through the artifact cache of the process,
+    # so runs in the same environment read them from memory or from the local disk mirror
+    # instead of the artifact store. The ticket frequency index grows with every feature
+    # engineering run and is only read with the columns of `INPUT_COLUMNS` instead.
+    cache = get_artifact_cache()
+    (
+        model,
+        encoders,
+        age_medians,
+        fare_medians,
+        age_categories,
+        fare_categories,
+    ) = (
+        cache.load(artifact_version)
+        for artifact_version in (
+            model,
+            encoders,
+            age_medians,
+            fare_medians,
+            age_categories,
+            fare_categories,
+        )
+    )
+    n_workers = max_workers or available_cpus()
+    fileio.makedirs(output_path)
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as model_dir:
+        model_path = join(model_dir, "model.ubj")
+        model.save_model(model_path)
+        scorer = PassengerScorer(
+            model_path=model_path,
+            encoders=encoders,
+            age_medians=age_medians,
+            fare_medians=fare_medians,
+            age_categories=age_categories,
+            fare_categories=fare_categories,
+            ticket_frequencies=ticket_frequency_index.set_index(
+                DataFrameColumns.TICKET_NUMBER.value
+            )[DataFrameColumns.TICKET_FREQUENCY.value],
+            native_categorical=native_categorical,
+            threshold=threshold,
+            # The workers share the CPUs of the pod instead of each using all of them.
+            nthread=max(available_cpus() // n_workers, 1),
+        )
+        number_of_rows, number_of_survivors, number_of_parts = score_passenger_batches(
+            scorer=scorer,
+            batches=read_passenger_batches(
+                input_files, input_format=input_format, batch_size=batch_size
+            ),
+            output_path=output_path,
+            n_workers=n_workers,
+        )
+
+    seconds = time.perf_counter() - started
+    log_metadata(
+        metadata={
+            "number_of_rows": number_of_rows,
+            "number_of_parts": number_of_parts,
+            "predicted_survival_rate": number_of_survivors / max(number_of_rows, 1),
+            "rows_per_second": number_of_rows / seconds,
+        }
+    )
+    print(f"Scored {number_of_rows} passengers into {number_of_parts} parts.")
+    return output_path
+
+
+def transform_passengers(
+    data: pd.DataFrame,
+    encoders: FeatureEncoders,
+    age_medians: pd.DataFrame,
+    fare_medians: pd.DataFrame,
+    age_categories: Categorical,
+    fare_categories: Categorical,
+    ticket_frequencies: pd.Series,
+    native_categorical: bool = False,
+) -> pd.DataFrame:
+    """
+    Transforms raw passengers into the encoded features of the model without fitting anything.
+
+    The steps of the training pipeline are applied in transform-only mode: missing values are
+    filled by `handle_missing_values` with the fitted group medians, the ages and fares are
+    binned into the fitted bins, the ticket frequencies are looked up in the fitted index and
+    the features are encoded with the fitted encoders. The features of a passenger therefore
+    do not depend on the other passengers of its batch.
+
+    Args:
+        data: The raw titanic DataFrame of the passengers.
+        encoders: The feature encoders fitted by `fit_feature_encoders`.
+        age_medians: The median ages fitted by `fit_missing_value_medians`.
+        fare_medians: The median fares fitted by `fit_missing_value_medians`.
+        age_categories: The fitted age bins.
+        fare_categories: The fitted fare bins.
+        ticket_frequencies: The ticket frequency index, indexed by the ticket number.
+        native_categorical: Whether the features are encoded with
+            `encode_categorical_features` instead of `encode_features`.
+
+    Returns:
+        The encoded features of the passengers.
+    """
+    data = handle_missing_values.entrypoint(
+        data, age_medians=age_medians, fare_medians=fare_medians
+    )
+    family_size = pd.DataFrame(
+        {DataFrameColumns.FAMILY_SIZE.value: add_family_size(data=data)}
+    )
+    title = pd.DataFrame({DataFrameColumns.TITLE.value: add_title(data=data)})
+    data[DataFrameColumns.AGE.value] = apply_bins(
+        data[DataFrameColumns.AGE.value], age_categories
+    ).cat.codes
+    data[DataFrameColumns.FARE.value] = apply_bins(
+        data[DataFrameColumns.FARE.value], fare_categories
+    ).cat.codes
+    data[DataFrameColumns.FAMILY_SIZE_GROUPED.value] = group_family_size(
+        data=family_size
+    )
+    data[DataFrameColumns.TICKET_FREQUENCY.value] = lookup_ticket_frequency(
+        index=ticket_frequencies, data=data
+    )
+    data[DataFrameColumns.TITLE.value] = group_titles(data=title)
+    data[DataFrameColumns.IS_MARRIED.value] = add_is_married(data=title)
+    encode = encode_categorical_features if native_categorical else encode_features
+    return encode(data=data, encoders=encoders)
+
+
+def read_passenger_batches(
+    input_files: list[str],
+    input_format: Literal["csv", "parquet"] = "csv",
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Streams the raw passengers of CSV or Parquet files as record batches.
+
+    Args:
+        input_files: Paths of the files. CSV files can also be given as directories or glob
+            patterns, like the raw data files of `load_raw_data`, Parquet files as a single
+            directory.
+        input_format: The format of the files.
+        batch_size: The maximum number of rows of a batch.
+
+    Returns:
+        An iterator over the record batches of the files, in the order of the files.
+    """
+    if input_format == "parquet":
+        # A single path can also be a directory of Parquet files.
+        dataset = ds.dataset(
+            input_files[0] if len(input_files) == 1 else input_files, format="parquet"
+        )
+    else:
+        # Imported here, because the module creates a ZenML client on import, which the
+        # worker processes that import this module must not do.
+        from titanicsurvivors.steps.raw_data import (
+            RAW_DATA_COLUMN_TYPES,
+            resolve_raw_data_files,
+        )
+
+        dataset = ds.dataset(
+            resolve_raw_data_files(input_files),
+            format=ds.CsvFileFormat(
+                convert_options=csv.ConvertOptions(
+                    column_types=RAW_DATA_COLUMN_TYPES, strings_can_be_null=True
+                ),
+                # Blocks of 16 MiB hold more rows than a batch, so the batches are not cut
+                # short by the blocks of the CSV reader.
+                read_options=csv.ReadOptions(block_size=1 << 24),
+            ),
+        )
+    yield from dataset.to_batches(batch_size=batch_size)
+
+
+def score_passenger_batches(
+    scorer: PassengerScorer,
+    batches: Iterable[pa.RecordBatch],
+    output_path: str,
+    n_workers: int,
+) -> tuple[int, int, int]:
+    """
+    Scores batches of raw passengers in a pool of worker processes.
+
+    Every batch is transformed, predicted and encoded as a Parquet part file by a worker, and
+    written to `part-XXXXX.parquet`, numbered in the order of the batches. The scorer is saved
+    to a temporary file once and every worker loads it on its first batch, so the batches do not
+    carry the fitted artifacts. The parts are written through the filesystem of the artifact
+    store by this process, as the workers have no artifact store to resolve remote paths with.
+    Only `pre_dispatch` batches are read ahead of the workers, so the memory does not grow with
+    the number of batches. The loky workers of joblib start without importing the main module of
+    the pipeline.
+
+    Args:
+        scorer: The scorer of the passengers.
+        batches: The raw passengers, batch by batch.
+        output_path: The directory of the part files.
+        n_workers: The number of worker processes.
+
+    Returns:
+        The number of scored passengers, of the ones predicted to survive and of part files.
+    """
+    number_of_rows, number_of_survivors, number_of_parts = 0, 0, 0
+    with tempfile.TemporaryDirectory() as scorer_dir:
+        scorer_path = join(scorer_dir, "scorer.joblib")
+        joblib.dump(scorer, scorer_path)
+        parts = Parallel(
+            n_jobs=n_workers,
+            backend="loky",
+            pre_dispatch="2*n_jobs",
+            return_as="generator_unordered",
+        )(
+            delayed(score_batch)(scorer_path, part, batch)
+            for part, batch in enumerate(batches)
+        )
+        for part, content, rows, survivors in parts:
+            with fileio.open(
+                join(output_path, f"part-{part:05d}.parquet"), "wb"
+            ) as file:
+                file.write(content)
+            number_of_rows += rows
+            number_of_survivors += survivors
+            number_of_parts += 1
+    return number_of_rows, number_of_survivors, number_of_parts
+
+
+def score_batch(
+    scorer_path: str, part: int, batch: pa.RecordBatch
+) -> tuple[int, bytes, int, int]:
+    """
+    Scores a batch of raw passengers and encodes the predictions as a Parquet part file.
+
+    Args:
+        scorer_path: The path the scorer of the passengers was saved to.
+        part: The number of the part file.
+        batch: The raw passengers.
+
+    Returns:
+        The number of the part file, its content, the number of scored passengers and of the
+        ones predicted to survive.
+    """
+    predictions = load_scorer(scorer_path).score(batch.to_pandas())
+    sink = pa.BufferOutputStream()
+    pq.write_table(
+        pa.Table.from_pandas(predictions, preserve_index=False),
+        sink,
+        compression="zstd",
+    )
+    return (
+        part,
+        sink.getvalue().to_pybytes(),
+        len(predictions),
+        int(predictions[DataFrameColumns.SURVIVED.value].sum()),
+    )
+
+
+def load_scorer(path: str) -> PassengerScorer:
+    """
+    Loads a saved scorer once per worker process and reuses it for later batches.
+
+    Args:
+        path: The path the scorer was saved to with joblib.
+
+    Returns:
+        The loaded scorer.
+    """
+    if path not in _worker_scorers:
+        _worker_scorers.clear()
+        _worker_scorers[path] = joblib.load(path)
+    return _worker_scorers[path]
+
+
+def load_model(path: str, nthread: int) -> xgb.Booster:
+    """
+    Loads a saved Booster once per worker process and reuses it for later batches.
+
+    Args:
+        path: The path the model was saved to.
+        nthread: The number of threads the model predicts with.
+
+    Returns:
+        The loaded model.
+    """
+    if path not in _worker_models:
+        model = xgb.Booster(model_file=path)
+        model.set_param({"nthread": nthread})
+        _worker_models.clear()
+        _worker_models[path] = model
+    return _worker_models[path]
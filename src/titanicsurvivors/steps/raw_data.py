@@ -1,29 +1,268 @@
+import glob
 import os
 import tempfile
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from os.path import join
 
 import mlflow
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
-from typing_extensions import Annotated
+from pyarrow import csv
+from typing_extensions import Annotated, Literal
 from zenml import step
 
+from titanicsurvivors.utils.data import DataFrameColumns
 from titanicsurvivors.utils.experiment_tracking import get_experiment_tracker_name
+from titanicsurvivors.utils.materializers import ArrowDataFrameMaterializer
 
 load_dotenv()
 
+RAW_DATA_COLUMN_TYPES: dict[str, pa.DataType] = {
+    DataFrameColumns.PASSENGER_ID.value: pa.int64(),
+    DataFrameColumns.SURVIVED.value: pa.int64(),
+    DataFrameColumns.TICKET_CLASS.value: pa.int64(),
+    DataFrameColumns.NAME.value: pa.string(),
+    DataFrameColumns.SEX.value: pa.string(),
+    DataFrameColumns.AGE.value: pa.float64(),
+    DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value: pa.int64(),
+    DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value: pa.int64(),
+    DataFrameColumns.TICKET_NUMBER.value: pa.string(),
+    DataFrameColumns.FARE.value: pa.float64(),
+    DataFrameColumns.CABIN_NUMBER.value: pa.string(),
+    DataFrameColumns.PORT_OF_EMBARKATION.value: pa.string(),
+}
 
-@step(experiment_tracker=get_experiment_tracker_name(), enable_cache=False)
+
+@step(
+    experiment_tracker=get_experiment_tracker_name(),
+    enable_cache=False,
+    output_materializers=ArrowDataFrameMaterializer,
+)
 def load_raw_data(
     raw_data_files: list[str],
+    chunk_size: int = 1 << 20,
+    max_workers: int = 1,
+    executor: Literal["thread", "process"] = "thread",
 ) -> Annotated[pd.DataFrame, f"raw_data_{os.getenv('GROUP_NAME', 'Default')}"]:
-    raw_data_df = pd.DataFrame()
-    for raw_data_file in raw_data_files:
-        df = pd.read_csv(raw_data_file, header=0, sep=",")
-        raw_data_df = pd.concat([raw_data_df, df], ignore_index=True)
+    raw_data_table, summary = read_raw_data(
+        raw_data_files=raw_data_files,
+        chunk_size=chunk_size,
+        max_workers=max_workers,
+        executor=executor,
+    )
+
     with tempfile.TemporaryDirectory() as tmp_dir:
-        tmp_data_path = join(tmp_dir, "raw_data.csv")
-        raw_data_df.to_csv(tmp_data_path, index=False)
-        mlflow.log_param("number_of_rows", len(raw_data_df))
+        tmp_data_path = join(tmp_dir, "raw_data.parquet")
+        pq.write_table(raw_data_table, tmp_data_path, compression="zstd")
+        mlflow.log_param("number_of_rows", raw_data_table.num_rows)
+        mlflow.log_metrics(summary_to_metrics(summary=summary))
         mlflow.log_artifact(local_path=tmp_data_path, artifact_path="data")
-    return raw_data_df
+    return raw_data_table.to_pandas(self_destruct=True, split_blocks=True)
+
+
+def read_raw_data(
+    raw_data_files: list[str],
+    chunk_size: int = 1 << 20,
+    max_workers: int = 1,
+    executor: Literal["thread", "process"] = "thread",
+) -> tuple[pa.Table, dict]:
+    """
+    Reads all raw data files into a single Arrow table together with its summary.
+
+    With more than one worker the files are read concurrently in a thread or process pool.
+    Threads are usually sufficient because the Arrow CSV reader releases the GIL, processes avoid
+    any contention at the cost of sending the tables back to the parent process. Independent of
+    the number of workers, the rows of the table are in the order of the resolved files.
+
+    Args:
+        raw_data_files: Paths, directories or glob patterns of the raw data CSV files.
+        chunk_size: Size in bytes of the blocks the files are read in.
+        max_workers: Number of files read at the same time.
+        executor: Whether the files are read by a pool of threads or of processes.
+
+    Returns:
+        A tuple containing:
+            - The table with the rows of all files.
+            - The summary of the table as created by `summarise_batch`.
+    """
+    resolved_files = resolve_raw_data_files(raw_data_files)
+    read_file = partial(read_raw_data_table, chunk_size=chunk_size)
+    if max_workers > 1 and len(resolved_files) > 1:
+        pool_class = (
+            ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        )
+        with pool_class(max_workers=max_workers) as pool:
+            results = list(pool.map(read_file, resolved_files))
+    else:
+        results = [read_file(raw_data_file) for raw_data_file in resolved_files]
+
+    summary = {}
+    for _, file_summary in results:
+        summary = merge_summaries(summary, file_summary)
+    raw_data_table = pa.concat_tables(
+        [table for table, _ in results], promote_options="default"
+    )
+    return raw_data_table, summary
+
+
+def resolve_raw_data_files(raw_data_files: list[str]) -> list[str]:
+    """
+    Expands directories and glob patterns in the list of raw data files.
+
+    Directories are expanded to the CSV files they contain and glob patterns to the files they
+    match, both in sorted order so the row order of the loaded data is deterministic. Plain file
+    paths are passed through unchanged.
+
+    Args:
+        raw_data_files: Paths, directories or glob patterns of the raw data CSV files.
+
+    Returns:
+        The list of CSV file paths to read, in the order they are read.
+    """
+    resolved_files = []
+    for raw_data_file in raw_data_files:
+        if os.path.isdir(raw_data_file):
+            resolved_files.extend(sorted(glob.glob(join(raw_data_file, "*.csv"))))
+        elif glob.has_magic(raw_data_file):
+            resolved_files.extend(sorted(glob.glob(raw_data_file)))
+        else:
+            resolved_files.append(raw_data_file)
+    if not resolved_files:
+        raise FileNotFoundError(f"No raw data files found for {raw_data_files}.")
+    return resolved_files
+
+
+def read_raw_data_file(raw_data_file: str, chunk_size: int) -> Iterator[pa.RecordBatch]:
+    """
+    Streams a raw data CSV file as Arrow record batches of roughly `chunk_size` bytes.
+
+    Known titanic columns are read with the explicit types of `RAW_DATA_COLUMN_TYPES`, so the
+    type of a column does not depend on the values that happen to be in the first chunk.
+
+    Args:
+        raw_data_file: Path of the CSV file.
+        chunk_size: Size in bytes of the blocks the file is read in.
+
+    Returns:
+        An iterator over the record batches of the file.
+    """
+    reader = csv.open_csv(
+        raw_data_file,
+        read_options=csv.ReadOptions(block_size=chunk_size),
+        convert_options=csv.ConvertOptions(
+            column_types=RAW_DATA_COLUMN_TYPES, strings_can_be_null=True
+        ),
+    )
+    yield from reader
+
+
+def read_raw_data_table(raw_data_file: str, chunk_size: int) -> tuple[pa.Table, dict]:
+    """
+    Reads a single raw data CSV file chunk by chunk and summarises it on the fly.
+
+    Args:
+        raw_data_file: Path of the CSV file.
+        chunk_size: Size in bytes of the blocks the file is read in.
+
+    Returns:
+        A tuple containing:
+            - The table with the rows of the file.
+            - The summary of the file as created by `summarise_batch`.
+    """
+    batches = []
+    summary = {}
+    for batch in read_raw_data_file(raw_data_file, chunk_size=chunk_size):
+        summary = merge_summaries(summary, summarise_batch(batch=batch))
+        batches.append(batch)
+    return pa.Table.from_batches(batches), summary
+
+
+def summarise_batch(batch: pa.RecordBatch) -> dict:
+    """
+    Computes the row count and the per column statistics of a record batch.
+
+    For every column the number of missing values is tracked, for numeric columns additionally
+    the count, sum, minimum and maximum of the present values. Summaries can be combined with
+    `merge_summaries` in any order, so the data never has to be scanned a second time.
+
+    Args:
+        batch: The record batch to summarise.
+
+    Returns:
+        The summary of the batch.
+    """
+    summary = {"number_of_rows": batch.num_rows}
+    for name, column in zip(batch.schema.names, batch.columns):
+        column_summary = {"missing": column.null_count}
+        if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+            column_summary["count"] = pc.count(column).as_py()
+            if column_summary["count"]:
+                min_max = pc.min_max(column)
+                column_summary["sum"] = pc.sum(column).as_py()
+                column_summary["min"] = min_max["min"].as_py()
+                column_summary["max"] = min_max["max"].as_py()
+        summary[name] = column_summary
+    return summary
+
+
+def merge_summaries(left: dict, right: dict) -> dict:
+    """
+    Combines two summaries created by `summarise_batch` into the summary of both.
+
+    Args:
+        left: The first summary, may be empty.
+        right: The second summary, may be empty.
+
+    Returns:
+        The combined summary.
+    """
+    merged = {
+        "number_of_rows": left.get("number_of_rows", 0) + right.get("number_of_rows", 0)
+    }
+    for name in {**left, **right}:
+        if name == "number_of_rows":
+            continue
+        left_column, right_column = left.get(name, {}), right.get(name, {})
+        column_summary = {}
+        for statistic in ("missing", "count", "sum"):
+            if statistic in left_column or statistic in right_column:
+                column_summary[statistic] = left_column.get(
+                    statistic, 0
+                ) + right_column.get(statistic, 0)
+        for statistic, combine in (("min", min), ("max", max)):
+            values = [
+                column[statistic]
+                for column in (left_column, right_column)
+                if statistic in column
+            ]
+            if values:
+                column_summary[statistic] = combine(values)
+        merged[name] = column_summary
+    return merged
+
+
+def summary_to_metrics(summary: dict) -> dict[str, float]:
+    """
+    Flattens a summary created by `summarise_batch` into MLflow metrics.
+
+    Args:
+        summary: The summary of the raw data.
+
+    Returns:
+        A dictionary with the missing values, minimum, maximum and mean of the columns.
+    """
+    metrics = {}
+    for name, column_summary in summary.items():
+        if not isinstance(column_summary, dict):
+            continue
+        metrics[f"{name}_missing"] = column_summary["missing"]
+        if column_summary.get("count"):
+            metrics[f"{name}_min"] = column_summary["min"]
+            metrics[f"{name}_max"] = column_summary["max"]
+            metrics[f"{name}_mean"] = column_summary["sum"] / column_summary["count"]
+    return metrics
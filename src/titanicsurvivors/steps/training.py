@@ -1,28 +1,290 @@
 import os
+import tempfile
 
 import mlflow
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
+from sklearn.model_selection import train_test_split
 from typing_extensions import Annotated
-from zenml import step
+from zenml import log_metadata, step
+from zenml.artifacts.unmaterialized_artifact import UnmaterializedArtifact
 import xgboost as xgb
 
+from titanicsurvivors.utils.cpu import available_cpus
+from titanicsurvivors.utils.encoding import SparseFeatures
 from titanicsurvivors.utils.experiment_tracking import get_experiment_tracker_name
+from titanicsurvivors.utils.external_memory import BATCH_SIZE, ParquetBatchIter
+from titanicsurvivors.utils.forest import CompiledForest, compile_booster
+from titanicsurvivors.utils.materializers import CompiledForestMaterializer
 
 load_dotenv()
 
 
 @step(experiment_tracker=get_experiment_tracker_name())
 def train_xgb_classifier(
-    inputs: pd.DataFrame,
+    inputs: pd.DataFrame | SparseFeatures,
     targets: pd.DataFrame,
+    performance_profile: bool = False,
+    validation_split: float = 0.2,
+    max_depth: int = 6,
+    eta: float = 0.1,
+    objective: str = "binary:logistic",
+    eval_metric: str = "error",
+    tree_method: str = "hist",
+    max_bin: int = 256,
+    nthread: int | None = None,
+    early_stopping_rounds: int = 10,
+    seed: int = 0,
+) -> Annotated[xgb.Booster, f"xgb_model_{os.getenv('GROUP_NAME', 'Default')}"]:
+    mlflow.autolog()
+
+    params = {
+        "max_depth": max_depth,
+        "eta": eta,
+        "objective": objective,
+        "eval_metric": eval_metric,
+        "tree_method": tree_method,
+        "max_bin": max_bin,
+        "nthread": nthread or available_cpus(),
+    }
+    if performance_profile:
+        # Performance profile: the features are quantised once into a QuantileDMatrix, the
+        # eval set reuses its cuts, and the rounds stop early on the eval set instead of
+        # cross-validating. The eval set is carved out of the train split, so the test split
+        # stays unseen until the validation.
+        targets = np.asarray(targets).ravel()
+        train_rows, eval_rows = train_test_split(
+            np.arange(len(targets)),
+            test_size=validation_split,
+            shuffle=True,
+            stratify=targets,
+            random_state=seed,
+        )
+        train_inputs, eval_inputs = (
+            inputs.take(rows)
+            if isinstance(inputs, SparseFeatures)
+            else inputs.iloc[rows]
+            for rows in (train_rows, eval_rows)
+        )
+        dtrain = build_quantile_dmatrix(
+            inputs=train_inputs,
+            targets=targets[train_rows],
+            max_bin=max_bin,
+            nthread=params["nthread"],
+        )
+        deval = build_quantile_dmatrix(
+            inputs=eval_inputs,
+            targets=targets[eval_rows],
+            ref=dtrain,
+            max_bin=max_bin,
+            nthread=params["nthread"],
+        )
+        model = xgb.train(
+            params,
+            dtrain,
+            num_boost_round=1000,
+            evals=[(deval, "eval")],
+            early_stopping_rounds=early_stopping_rounds,
+            verbose_eval=False,
+        )
+        return model[: model.best_iteration + 1]
+
+    dtrain = build_dmatrix(inputs=inputs, targets=targets, nthread=params["nthread"])
+    cv_results = xgb.cv(
+        params=params,
+        dtrain=dtrain,
+        num_boost_round=1000,
+        nfold=5,
+        metrics=["error"],
+        early_stopping_rounds=early_stopping_rounds,
+        stratified=True,
+    )
+
+    best_iteration = cv_results["test-error-mean"].idxmin()
+    best_model = xgb.train(params, dtrain, num_boost_round=best_iteration + 1)
+    return best_model
+
+
+@step(experiment_tracker=get_experiment_tracker_name())
+def train_xgb_classifier_out_of_core(
+    encoded_data: UnmaterializedArtifact,
+    test_split: float = 0.2,
+    validation_split: float = 0.2,
+    batch_size: int = BATCH_SIZE,
     max_depth: int = 6,
     eta: float = 0.1,
     objective: str = "binary:logistic",
     eval_metric: str = "error",
+    max_bin: int = 256,
+    nthread: int | None = None,
+) -> Annotated[xgb.Booster, f"xgb_model_{os.getenv('GROUP_NAME', 'Default')}"]:
+    mlflow.autolog()
+
+    # The encoded data is streamed from its Parquet file instead of being loaded, and the
+    # batches are cached on disk by XGBoost, so the memory does not grow with the rows. The
+    # rounds stop early on an eval subset carved out of the train rows, the test subset stays
+    # unseen until the validation.
+    path = os.path.join(encoded_data.uri, "data.parquet")
+    params = {
+        "max_depth": max_depth,
+        "eta": eta,
+        "objective": objective,
+        "eval_metric": eval_metric,
+        "tree_method": "hist",
+        "max_bin": max_bin,
+        "nthread": nthread or available_cpus(),
+    }
+    with tempfile.TemporaryDirectory() as cache_dir:
+        dtrain = xgb.ExtMemQuantileDMatrix(
+            ParquetBatchIter(
+                path,
+                subset="train",
+                test_split=test_split,
+                eval_split=validation_split,
+                batch_size=batch_size,
+                cache_prefix=os.path.join(cache_dir, "train"),
+            ),
+            max_bin=max_bin,
+            nthread=params["nthread"],
+            enable_categorical=True,
+        )
+        deval = xgb.ExtMemQuantileDMatrix(
+            ParquetBatchIter(
+                path,
+                subset="eval",
+                test_split=test_split,
+                eval_split=validation_split,
+                batch_size=batch_size,
+                cache_prefix=os.path.join(cache_dir, "eval"),
+            ),
+            ref=dtrain,
+            max_bin=max_bin,
+            nthread=params["nthread"],
+            enable_categorical=True,
+        )
+        model = xgb.train(
+            params,
+            dtrain,
+            num_boost_round=1000,
+            evals=[(deval, "eval")],
+            early_stopping_rounds=10,
+            verbose_eval=False,
+        )
+    return model[: model.best_iteration + 1]
+
+
+@step(output_materializers=CompiledForestMaterializer)
+def compile_xgb_model(
+    model: xgb.Booster,
+    inputs: pd.DataFrame,
+    tolerance: float = 1e-6,
 ) -> Annotated[
-    xgb.Booster, f"<model_artifact_name>_{os.getenv('GROUP_NAME', 'Default')}"
-]:  # ... Please add the name of the trained model artifact.
-    # ... Please enable mlflow autologging for the training process.
+    CompiledForest, f"compiled_xgb_model_{os.getenv('GROUP_NAME', 'Default')}"
+]:
+    forest = compile_booster(model)
+    # The compiled forest is only exported if it predicts the inputs like the booster.
+    dmatrix = build_dmatrix(inputs=inputs[model.feature_names])
+    margin_difference = float(
+        np.max(
+            np.abs(
+                forest.predict_margin(inputs)
+                - model.predict(dmatrix, output_margin=True)
+            ),
+            initial=0,
+        )
+    )
+    difference = float(
+        np.max(np.abs(forest.predict(inputs) - model.predict(dmatrix)), initial=0)
+    )
+    if max(margin_difference, difference) > tolerance:
+        raise ValueError(
+            f"The compiled model predicts up to {max(margin_difference, difference)} "
+            f"apart from the booster, more than the tolerance of {tolerance}."
+        )
+    log_metadata(
+        metadata={
+            "trees": forest.num_trees,
+            "nodes": forest.num_nodes,
+            "depth": forest.depth,
+            "max_margin_difference": margin_difference,
+            "max_difference": difference,
+        },
+        infer_artifact=True,
+    )
+    return forest
+
+
+def build_dmatrix(
+    inputs: pd.DataFrame | SparseFeatures,
+    targets: pd.Series | None = None,
+    nthread: int | None = None,
+) -> xgb.DMatrix:
+    """
+    Builds the XGBoost DMatrix of dense or sparse encoded features.
+
+    Sparse features are passed to XGBoost as their CSR matrix, so they are never densified.
+    Columns of the pandas 'category' dtype, as encoded by `encode_categorical_features`, are
+    passed as native categorical features.
+
+    Args:
+        inputs: The encoded features, as a DataFrame or as sparse features.
+        targets: The labels of the rows, if any.
+        nthread: The number of threads to build the DMatrix with, all available CPUs if None.
+
+    Returns:
+        The DMatrix of the features.
+    """
+    nthread = nthread or available_cpus()
+    if isinstance(inputs, SparseFeatures):
+        return xgb.DMatrix(
+            inputs.matrix,
+            label=targets,
+            feature_names=inputs.feature_names,
+            nthread=nthread,
+        )
+    return xgb.DMatrix(inputs, label=targets, enable_categorical=True, nthread=nthread)
+
+
+def build_quantile_dmatrix(
+    inputs: pd.DataFrame | SparseFeatures,
+    targets: pd.Series | None = None,
+    ref: xgb.QuantileDMatrix | None = None,
+    max_bin: int = 256,
+    nthread: int | None = None,
+) -> xgb.QuantileDMatrix:
+    """
+    Builds the XGBoost QuantileDMatrix of dense or sparse encoded features.
+
+    A QuantileDMatrix stores the features as their histogram bins instead of as floats, which
+    the 'hist' tree method trains on directly. An eval set built with the training matrix as
+    `ref` is binned with the cuts of the training features.
+
+    Args:
+        inputs: The encoded features, as a DataFrame or as sparse features.
+        targets: The labels of the rows, if any.
+        ref: The QuantileDMatrix whose cuts are used, if any.
+        max_bin: The maximum number of bins per feature.
+        nthread: The number of threads to build the matrix with, all available CPUs if None.
 
-    # ... Please add the provided training script.
+    Returns:
+        The QuantileDMatrix of the features.
+    """
+    nthread = nthread or available_cpus()
+    if isinstance(inputs, SparseFeatures):
+        return xgb.QuantileDMatrix(
+            inputs.matrix,
+            label=targets,
+            feature_names=inputs.feature_names,
+            ref=ref,
+            max_bin=max_bin,
+            nthread=nthread,
+        )
+    return xgb.QuantileDMatrix(
+        inputs,
+        label=targets,
+        ref=ref,
+        max_bin=max_bin,
+        enable_categorical=True,
+        nthread=nthread,
+    )
@@ -0,0 +1,150 @@
+import os
+import tempfile
+from typing import Literal
+
+import mlflow
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from dotenv import load_dotenv
+from joblib import Parallel, delayed
+from sklearn.model_selection import train_test_split
+from typing_extensions import Annotated
+from zenml import ArtifactConfig, log_metadata, step
+from zenml.enums import ArtifactType
+
+from titanicsurvivors.utils.cpu import available_cpus
+from titanicsurvivors.utils.experiment_tracking import get_experiment_tracker_name
+from titanicsurvivors.utils.search import (
+    SEARCH_SPACE,
+    Trial,
+    grid_configurations,
+    random_configurations,
+    run_trial,
+    share_arrays,
+    successive_halving,
+)
+
+load_dotenv()
+
+
+@step(experiment_tracker=get_experiment_tracker_name())
+def search_xgb_hyperparameters(
+    inputs: pd.DataFrame,
+    targets: pd.Series,
+    search: Literal["grid", "random", "halving"] = "random",
+    n_trials: int = 20,
+    validation_split: float = 0.2,
+    max_workers: int | None = None,
+    objective: str = "binary:logistic",
+    eval_metric: str = "logloss",
+    max_bin: int = 256,
+    seed: int = 0,
+) -> Annotated[
+    xgb.Booster,
+    ArtifactConfig(
+        name=f"xgb_model_{os.getenv('GROUP_NAME', 'Default')}",
+        artifact_type=ArtifactType.MODEL,
+    ),
+]:
+    train_inputs, eval_inputs, train_targets, eval_targets = train_test_split(
+        inputs,
+        targets,
+        test_size=validation_split,
+        shuffle=True,
+        stratify=targets,
+        random_state=seed,
+    )
+    max_workers = max_workers or available_cpus()
+    # The workers share the CPUs of the pod instead of each using all of them.
+    nthread = max(available_cpus() // max_workers, 1)
+    base_params = {
+        "objective": objective,
+        "eval_metric": eval_metric,
+        "tree_method": "hist",
+        "max_bin": max_bin,
+        "nthread": nthread,
+        "seed": seed,
+    }
+    configurations = [
+        {**base_params, **configuration}
+        for configuration in (
+            grid_configurations(SEARCH_SPACE)
+            if search == "grid"
+            else random_configurations(SEARCH_SPACE, n_trials=n_trials, seed=seed)
+        )
+    ]
+
+    with tempfile.TemporaryDirectory() as shared_dir:
+        # The matrices are written once to memory-mapped files, the workers map them instead
+        # of receiving a pickled copy with every trial.
+        paths = share_arrays(
+            shared_dir,
+            train_inputs=train_inputs.to_numpy(np.float32),
+            train_targets=train_targets.to_numpy(np.float32),
+            eval_inputs=eval_inputs.to_numpy(np.float32),
+            eval_targets=eval_targets.to_numpy(np.float32),
+        )
+        feature_names = inputs.columns.tolist()
+        # The loky workers of joblib start without importing the main module of the pipeline,
+        # and are reused between the rungs of a successive halving search.
+        with Parallel(n_jobs=max_workers, backend="loky") as parallel:
+
+            def run_trials(configurations: list[dict], num_boost_round: int):
+                rung = parallel(
+                    delayed(run_trial)(
+                        paths, feature_names, configuration, num_boost_round
+                    )
+                    for configuration in configurations
+                )
+                for trial in rung:
+                    log_trial(trial, eval_metric=eval_metric)
+                return rung
+
+            if search == "halving":
+                trials = successive_halving(configurations, run_trials)
+            else:
+                trials = run_trials(configurations, num_boost_round=1000)
+
+    best_trial = min(trials, key=lambda trial: trial.score)
+    mlflow.log_params(best_trial.params)
+    mlflow.log_metric(f"best_{eval_metric}", best_trial.score)
+    log_metadata(
+        metadata={
+            "params": best_trial.params,
+            f"eval_{eval_metric}": best_trial.score,
+            "num_boost_round": best_trial.best_iteration + 1,
+            "trials": len(trials),
+        },
+        infer_model=True,
+    )
+
+    dtrain = xgb.QuantileDMatrix(
+        train_inputs,
+        label=train_targets,
+        max_bin=max_bin,
+        nthread=available_cpus(),
+    )
+    return xgb.train(
+        {**best_trial.params, "nthread": available_cpus()},
+        dtrain,
+        num_boost_round=best_trial.best_iteration + 1,
+    )
+
+
+def log_trial(trial: Trial, eval_metric: str) -> None:
+    """
+    Logs a trial of the search as a nested MLflow run.
+
+    Args:
+        trial: The trial to log.
+        eval_metric: The name of the eval metric of the score.
+    """
+    with mlflow.start_run(nested=True):
+        mlflow.log_params({**trial.params, "num_boost_round": trial.num_boost_round})
+        mlflow.log_metrics(
+            {
+                f"eval_{eval_metric}": trial.score,
+                "best_iteration": trial.best_iteration,
+            }
+        )
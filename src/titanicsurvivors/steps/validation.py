@@ -1,28 +1,159 @@
+import os
+import tempfile
+
 import mlflow
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold
+from typing_extensions import Annotated
 from xgboost import Booster
 from zenml import step
-import xgboost as xgb
+from zenml.artifacts.unmaterialized_artifact import UnmaterializedArtifact
 
+from titanicsurvivors.steps.training import build_dmatrix
+from titanicsurvivors.utils.cpu import available_cpus
+from titanicsurvivors.utils.cross_validation import run_fold, to_feature_matrix
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.encoding import SparseFeatures
 from titanicsurvivors.utils.experiment_tracking import get_experiment_tracker_name
+from titanicsurvivors.utils.external_memory import BATCH_SIZE, ParquetBatchIter
+from titanicsurvivors.utils.materializers import ArrowDataFrameMaterializer
+from titanicsurvivors.utils.metrics import THRESHOLD, BinaryClassificationEvaluator
+from titanicsurvivors.utils.search import share_arrays
 
 load_dotenv()
 
 
 @step(experiment_tracker=get_experiment_tracker_name())
-def validate_xgb_model(model: Booster, inputs: pd.DataFrame, targets: pd.DataFrame):
-    dtest = xgb.DMatrix(inputs)
-    predictions = model.predict(dtest)
+def validate_xgb_model(
+    model: Booster,
+    inputs: pd.DataFrame | SparseFeatures,
+    targets: pd.DataFrame,
+    chunk_size: int = BATCH_SIZE,
+    threshold: float = THRESHOLD,
+):
+    evaluator = BinaryClassificationEvaluator(threshold=threshold)
+    targets = np.asarray(targets).ravel()
+    # The test set is predicted chunk by chunk, so only the matrix of one chunk is built
+    # at a time.
+    for start in range(0, len(inputs), chunk_size):
+        rows = np.arange(start, min(start + chunk_size, len(inputs)))
+        chunk = (
+            inputs.take(rows)
+            if isinstance(inputs, SparseFeatures)
+            else inputs.iloc[rows]
+        )
+        evaluator.update(targets[rows], model.predict(build_dmatrix(inputs=chunk)))
+    log_evaluation(evaluator)
+
+
+@step(experiment_tracker=get_experiment_tracker_name())
+def validate_xgb_model_out_of_core(
+    model: Booster,
+    encoded_data: UnmaterializedArtifact,
+    test_split: float = 0.2,
+    batch_size: int = BATCH_SIZE,
+    threshold: float = THRESHOLD,
+):
+    evaluator = BinaryClassificationEvaluator(threshold=threshold)
+    # Streams the test subset held out by `train_xgb_classifier_out_of_core` from the
+    # Parquet file of the encoded data.
+    batches = ParquetBatchIter(
+        os.path.join(encoded_data.uri, "data.parquet"),
+        subset="test",
+        test_split=test_split,
+        batch_size=batch_size,
+    ).batches()
+    for inputs, targets in batches:
+        evaluator.update(targets, model.predict(build_dmatrix(inputs=inputs)))
+    log_evaluation(evaluator)
+
+
+@step(
+    experiment_tracker=get_experiment_tracker_name(),
+    output_materializers=ArrowDataFrameMaterializer,
+)
+def cross_validate_xgb_classifier(
+    data: pd.DataFrame,
+    model: Booster | None = None,
+    n_splits: int = 5,
+    num_boost_round: int = 100,
+    max_workers: int | None = None,
+    max_depth: int = 6,
+    eta: float = 0.1,
+    objective: str = "binary:logistic",
+    tree_method: str = "hist",
+    max_bin: int = 256,
+    nthread: int | None = None,
+    seed: int = 0,
+) -> Annotated[
+    pd.DataFrame, f"cross_validation_metrics_{os.getenv('GROUP_NAME', 'Default')}"
+]:
+    inputs = data[data.columns.difference([DataFrameColumns.SURVIVED.value])]
+    targets = data[DataFrameColumns.SURVIVED.value].to_numpy(np.float32)
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    # The folds train as many rounds as the trained model, whose number of rounds was found
+    # with early stopping, so they validate the model and not a fixed number of rounds.
+    if model is not None:
+        num_boost_round = model.num_boosted_rounds()
+    # The folds run concurrently and share the thread budget of the training, so they do
+    # not oversubscribe the pod.
+    cpus = nthread or available_cpus()
+    n_workers = min(n_splits, max_workers or cpus)
+    params = {
+        "max_depth": max_depth,
+        "eta": eta,
+        "objective": objective,
+        "tree_method": tree_method,
+        "max_bin": max_bin,
+        "nthread": max(cpus // n_workers, 1),
+        "seed": seed,
+    }
+
+    matrix, feature_types = to_feature_matrix(inputs)
+    with tempfile.TemporaryDirectory() as shared_dir:
+        paths = share_arrays(shared_dir, inputs=matrix, targets=targets)
+        fold_metrics = Parallel(n_jobs=n_workers, backend="loky")(
+            delayed(run_fold)(
+                paths,
+                inputs.columns.tolist(),
+                feature_types,
+                train_rows,
+                test_rows,
+                params,
+                num_boost_round,
+            )
+            for train_rows, test_rows in folds.split(matrix, targets)
+        )
+
+    metrics = pd.DataFrame(
+        fold_metrics, index=[f"fold_{fold}" for fold in range(n_splits)]
+    )
+    metrics = pd.concat([metrics, metrics.agg(["mean", "std"])])
+    for name, row in metrics.iterrows():
+        mlflow.log_metrics(
+            {f"cv_{name}_{metric}": value for metric, value in row.items()}
+        )
+    print(metrics)
+    return metrics
+
 
-    predictions = [round(value) for value in predictions]
+def log_evaluation(evaluator: BinaryClassificationEvaluator) -> None:
+    """
+    Prints the metrics of an evaluation and logs them to MLflow.
 
-    # ... Please insert the calculation of the metrics here.
+    The metrics of the threshold sweep are logged as the table `threshold_sweep.json`.
 
-    print("Test accuracy:", accuracy)
-    print("Test precision:", precision)
-    print("Test recall:", recall)
-    print("Test f1:", f1)
-    mlflow.log_metrics(
-        {"accuracy": accuracy, "precision": precision, "recall": recall, "f1": f1}
+    Args:
+        evaluator: The evaluator that received all chunks of the test set.
+    """
+    metrics = evaluator.metrics()
+    for name, value in metrics.items():
+        print(f"Test {name}:", value)
+    mlflow.log_metrics(metrics)
+    mlflow.log_table(
+        data=evaluator.threshold_sweep().reset_index(),
+        artifact_file="threshold_sweep.json",
     )
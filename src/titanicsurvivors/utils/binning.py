@@ -0,0 +1,326 @@
+from collections.abc import Iterable
+
+import mlflow
+import numpy as np
+import pandas as pd
+
+SKETCH_SIZE = 200
+CHUNK_SIZE = 1 << 16
+
+
+class QuantileSketch:
+    """
+    A mergeable KLL-style sketch of the distribution of a numeric column.
+
+    The sketch keeps a hierarchy of compactors. Level h holds values that each represent 2^h
+    values of the column. Whenever a level exceeds its capacity, it is sorted and every second
+    value (with a random offset) is promoted to the next level, so the memory stays in
+    O(k log(n / k)) independent of the number of values n. Sketches of different chunks or
+    partitions can be merged in any order.
+
+    The normalised rank error of a quantile is below `rank_error_bound` with a probability of
+    about 99%, as long as the sketch has not compacted any value it is exact.
+    """
+
+    def __init__(self, k: int = SKETCH_SIZE, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._compactors: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def rank_error_bound(self) -> float:
+        if len(self._compactors) == 1:
+            return 0.0
+        return 2.296 / self.k**0.9723
+
+    def update(self, values: np.ndarray) -> "QuantileSketch":
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compactors[0] = np.concatenate([self._compactors[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for level, values in enumerate(other._compactors):
+            if level == len(self._compactors):
+                self._compactors.append(np.empty(0))
+            self._compactors[level] = np.concatenate([self._compactors[level], values])
+        self._compress()
+        return self
+
+    def quantiles(self, q: np.ndarray) -> np.ndarray:
+        q = np.asarray(q, dtype=float)
+        if not self.count:
+            return np.full(q.shape, np.nan)
+        values = np.concatenate(self._compactors)
+        weights = np.concatenate(
+            [
+                np.full(len(compactor), 2.0**level)
+                for level, compactor in enumerate(self._compactors)
+            ]
+        )
+        order = np.argsort(values, kind="stable")
+        values, cumulative_weights = values[order], np.cumsum(weights[order])
+        ranks = q * cumulative_weights[-1]
+        positions = np.searchsorted(cumulative_weights, ranks, side="left")
+        result = values[np.minimum(positions, len(values) - 1)]
+        result[q <= 0] = self.min
+        result[q >= 1] = self.max
+        return result
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._compactors) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._compactors):
+            compactor = self._compactors[level]
+            if len(compactor) > self._capacity(level):
+                if level + 1 == len(self._compactors):
+                    self._compactors.append(np.empty(0))
+                compactor = np.sort(compactor)
+                # An odd value out stays on this level, the rest is halved.
+                odd = len(compactor) % 2
+                kept, compactor = (
+                    compactor[len(compactor) - odd :],
+                    compactor[: len(compactor) - odd],
+                )
+                promoted = compactor[self._rng.integers(2) :: 2]
+                self._compactors[level] = kept
+                self._compactors[level + 1] = np.concatenate(
+                    [self._compactors[level + 1], promoted]
+                )
+            level += 1
+
+
+def sketch_quantile_edges(
+    chunks: Iterable[np.ndarray], q: int, k: int = SKETCH_SIZE
+) -> tuple[np.ndarray, float]:
+    """
+    Estimates the edges of `q` quantile bins from chunks of a column with a `QuantileSketch`.
+
+    Args:
+        chunks: The values of the column, chunk by chunk.
+        q: The number of quantile bins.
+        k: The size parameter of the sketch, larger values are more accurate.
+
+    Returns:
+        A tuple containing:
+            - The q + 1 bin edges, the first and last edge are the exact minimum and maximum.
+            - The bound of the normalised rank error of the edges.
+    """
+    sketch = QuantileSketch(k=k)
+    for chunk in chunks:
+        sketch.update(chunk)
+    return sketch.quantiles(np.linspace(0, 1, q + 1)), sketch.rank_error_bound
+
+
+def assign_bins(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Assigns values to the right-closed bins between sorted edges like `pd.qcut` does.
+
+    Every value is located with a binary search over the edges, which takes O(n log k) for n
+    values and k bins and does not sort the values. The lowest edge belongs to the first bin.
+
+    Args:
+        values: The values to bin.
+        edges: The sorted and unique bin edges.
+
+    Returns:
+        The bin codes of the values, -1 for missing values and values outside of the edges.
+    """
+    values = np.asarray(values, dtype=float)
+    positions = np.searchsorted(edges, values, side="left")
+    positions[values == edges[0]] = 1
+    codes = positions - 1
+    codes[(positions == 0) | (positions == len(edges)) | np.isnan(values)] = -1
+    return codes
+
+
+def approximate_qcut(
+    values: pd.Series,
+    q: int,
+    duplicates: str = "raise",
+    chunk_size: int = CHUNK_SIZE,
+) -> pd.Series:
+    """
+    Bins values into `q` quantile-based categories like `pd.qcut`, using streaming edges.
+
+    The bin edges are estimated chunk by chunk with a `QuantileSketch` instead of sorting the
+    whole column, the values are then assigned with `assign_bins`.
+
+    Args:
+        values: The values to bin.
+        q: The number of quantile bins.
+        duplicates: 'raise' to raise an error for non-unique bin edges, 'drop' to drop them.
+        chunk_size: The number of values added to the sketch at once.
+
+    Returns:
+        A categorical Series with the interval of every value.
+    """
+    array = values.to_numpy(dtype=float)
+    edges, _ = sketch_quantile_edges(
+        (
+            array[start : start + chunk_size]
+            for start in range(0, len(array), chunk_size)
+        ),
+        q=q,
+    )
+    unique_edges = np.unique(edges)
+    if len(unique_edges) < len(edges) and duplicates == "raise":
+        raise ValueError(
+            f"Bin edges must be unique: {edges!r}.\n"
+            "You can drop duplicate edges by setting the 'duplicates' kwarg"
+        )
+    return pd.Series(
+        pd.Categorical.from_codes(
+            assign_bins(array, unique_edges),
+            categories=pd.IntervalIndex.from_breaks(unique_edges, closed="right"),
+            ordered=True,
+        ),
+        index=values.index,
+        name=values.name,
+    )
+
+
+def quantile_bins(
+    values: pd.Series, q: int, duplicates: str = "raise", approximate: bool = False
+) -> pd.Series:
+    """
+    Fits `q` quantile-based bins to values and returns the binned values.
+
+    Unlike `pd.qcut`, which rounds the edges in the labels of its categories, the categories
+    carry the exact bin edges, so they can be stored and applied to new data with `apply_bins`.
+
+    Args:
+        values: The values to bin.
+        q: The number of quantile bins.
+        duplicates: 'raise' to raise an error for non-unique bin edges, 'drop' to drop them.
+        approximate: Whether the edges are estimated with `approximate_qcut` instead of sorting
+            the values.
+
+    Returns:
+        A categorical Series with the interval of every value.
+    """
+    if approximate:
+        return approximate_qcut(values, q, duplicates=duplicates)
+    binned, edges = pd.qcut(values, q, duplicates=duplicates, retbins=True)
+    return binned.cat.rename_categories(
+        pd.IntervalIndex.from_breaks(edges, closed="right")
+    )
+
+
+def apply_bins(values: pd.Series, categories: pd.Categorical) -> pd.Series:
+    """
+    Bins values into previously fitted bins without computing any quantiles.
+
+    This is the transform counterpart of `pd.qcut` and `approximate_qcut`: the bin edges are
+    taken from the stored categories and the values are assigned with `assign_bins`, which takes
+    O(n log k) for n values and k bins and works for a single row as well. Values outside of the
+    fitted range fall into the first or last bin, missing values stay missing.
+
+    Args:
+        values: The values to bin.
+        categories: A categorical whose categories are the fitted bins.
+
+    Returns:
+        A categorical Series with the interval of every value.
+    """
+    intervals = pd.IntervalIndex(categories.categories).sort_values()
+    edges = categories_to_edges(categories)
+    array = values.to_numpy(dtype=float)
+    return pd.Series(
+        pd.Categorical.from_codes(
+            assign_bins(np.clip(array, edges[0], edges[-1]), edges),
+            categories=intervals,
+            ordered=True,
+        ),
+        index=values.index,
+        name=values.name,
+    )
+
+
+def categories_to_edges(categories: pd.Categorical) -> np.ndarray:
+    """
+    Returns the sorted bin edges of a categorical of right-closed intervals.
+
+    Args:
+        categories: A categorical whose categories are the bins.
+
+    Returns:
+        The bin edges.
+    """
+    intervals = pd.IntervalIndex(categories.categories).sort_values()
+    return np.append(intervals.left.to_numpy(), intervals.right[-1])
+
+
+def quantile_edge_errors(
+    values: pd.Series, edges: np.ndarray, k: int = SKETCH_SIZE
+) -> dict[str, float]:
+    """
+    Measures how far approximate quantile bin edges are off from the exact quantiles.
+
+    Every inner edge is compared with the quantile it estimates. With ties, all ranks between
+    the share of values less than the edge and the share of values less than or equal to it
+    belong to the edge, so its error is the distance of the quantile from that interval. An
+    exact quantile edge has no error even if it is a value that many rows share, like a filled
+    median age. The ranks are counted with two binary searches per value, so the values never
+    need to be sorted.
+
+    Args:
+        values: The binned values.
+        edges: The sorted bin edges.
+        k: The size parameter of the sketch the edges were estimated with.
+
+    Returns:
+        A dictionary with the largest measured normalised rank error of the inner edges and the
+        error bound of the sketch.
+    """
+    array = values.dropna().to_numpy(dtype=float)
+
+    def inner_edge_ranks(side: str) -> np.ndarray:
+        counts = np.bincount(
+            np.searchsorted(edges, array, side=side), minlength=len(edges) + 1
+        )
+        return np.cumsum(counts)[:-1][1:-1] / len(array)
+
+    # With side="left" a value v is counted in the ranks of the edges >= v, with side="right"
+    # only in the ones of the edges > v.
+    lower_ranks = inner_edge_ranks(side="right")
+    upper_ranks = inner_edge_ranks(side="left")
+    targets = np.linspace(0, 1, len(edges))[1:-1]
+    errors = np.maximum(np.maximum(lower_ranks - targets, targets - upper_ranks), 0)
+    return {
+        "rank_error": float(np.max(errors, initial=0.0)),
+        "rank_error_bound": 2.296 / k**0.9723,
+    }
+
+
+def log_bin_edge_errors(values: pd.Series, categories: pd.Categorical) -> None:
+    """
+    Logs the errors of approximate quantile bin edges as MLflow metrics of the active run.
+
+    Args:
+        values: The binned values, their name is used as prefix of the metric names.
+        categories: A categorical whose categories are the bins of the values.
+    """
+    mlflow.log_metrics(
+        {
+            f"{values.name}_bin_{name}": error
+            for name, error in quantile_edge_errors(
+                values=values, edges=categories_to_edges(categories)
+            ).items()
+        }
+    )
@@ -0,0 +1,405 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from os.path import join
+from typing import Any
+from uuid import UUID
+
+import joblib
+from zenml.client import Client
+from zenml.enums import ModelStages
+from zenml.exceptions import ZenMLBaseException
+from zenml.logger import get_logger
+from zenml.models import ArtifactVersionResponse, ModelVersionResponse
+
+from titanicsurvivors.utils.data import DataFrameColumns
+
+logger = get_logger(__name__)
+
+CACHE_DIR = os.getenv(
+    "TITANIC_CACHE_DIR",
+    join(os.path.expanduser("~"), ".cache", "titanicsurvivors", "artifacts"),
+)
+# The budgets of the deserialised artifacts kept in memory and of their mirror on disk.
+MAX_MEMORY_BYTES = int(os.getenv("TITANIC_CACHE_MAX_MEMORY_MB", "1024")) * 2**20
+MAX_DISK_BYTES = int(os.getenv("TITANIC_CACHE_MAX_DISK_MB", "4096")) * 2**20
+# The seconds between two checks for a new model version in the watched stage.
+MODEL_CHECK_INTERVAL = float(os.getenv("TITANIC_MODEL_CHECK_INTERVAL", "60"))
+MIRROR_SUFFIX = ".joblib"
+
+_cache: "ArtifactCache | None" = None
+_cache_lock = threading.Lock()
+
+
+class ArtifactCache:
+    """
+    Keeps deserialised artifacts in memory and mirrors them to a local disk cache.
+
+    Artifact versions are immutable, so an artifact is cached by its version ID and never has
+    to be invalidated. An artifact that is not in memory is read from its mirror on disk, or
+    else loaded from the artifact store and mirrored. Both tiers evict their least recently
+    used artifacts once they exceed their size budget. The size of an artifact is the size of
+    its mirror, which is a joblib pickle of the deserialised artifact.
+
+    The cache is thread-safe, concurrent loads of the same artifact version load it once.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = CACHE_DIR,
+        max_memory_bytes: int = MAX_MEMORY_BYTES,
+        max_disk_bytes: int = MAX_DISK_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # The artifacts and their sizes by version ID, from the least to the most recently used.
+        self._artifacts: OrderedDict[UUID, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict[UUID, threading.Lock] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        # The mirror may have been written by other processes with a larger budget.
+        self._evict_disk()
+
+    def load(self, artifact_version: ArtifactVersionResponse) -> Any:
+        """
+        Loads an artifact version, from memory if possible.
+
+        Args:
+            artifact_version: The artifact version, as returned by the ZenML client.
+
+        Returns:
+            The deserialised artifact.
+        """
+        artifact_id = artifact_version.id
+        with self._lock:
+            if artifact_id in self._artifacts:
+                self.hits += 1
+                self._artifacts.move_to_end(artifact_id)
+                return self._artifacts[artifact_id][0]
+            loading = self._loading.setdefault(artifact_id, threading.Lock())
+        with loading:
+            with self._lock:
+                # Another thread may have loaded the artifact while this one waited.
+                if artifact_id in self._artifacts:
+                    self.hits += 1
+                    self._artifacts.move_to_end(artifact_id)
+                    return self._artifacts[artifact_id][0]
+            try:
+                artifact, size = self._load_mirrored(artifact_version)
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(artifact_id, None)
+                raise
+            # The artifact is inserted under the same lock that drops its loading lock, so a
+            # thread arriving in between finds it in memory instead of loading it again.
+            with self._lock:
+                self._loading.pop(artifact_id, None)
+                self._artifacts[artifact_id] = (artifact, size)
+                self.memory_bytes += size
+                self._evict_memory()
+        return artifact
+
+    def clear(self) -> None:
+        """Evicts all artifacts from memory, their mirrors on disk are kept."""
+        with self._lock:
+            self._artifacts.clear()
+            self.memory_bytes = 0
+
+    def _load_mirrored(
+        self, artifact_version: ArtifactVersionResponse
+    ) -> tuple[Any, int]:
+        path = join(self.cache_dir, f"{artifact_version.id}{MIRROR_SUFFIX}")
+        try:
+            artifact = joblib.load(path)
+            # The modification time orders the mirrors for the eviction from disk.
+            os.utime(path)
+            with self._lock:
+                self.disk_hits += 1
+            return artifact, os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+        artifact = artifact_version.load()
+        # The mirror is written to a temporary file first, so other processes never read a
+        # partially written one.
+        file, temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(file, "wb") as mirror:
+            joblib.dump(artifact, mirror)
+        os.replace(temporary_path, path)
+        with self._lock:
+            self.misses += 1
+        self._evict_disk()
+        return artifact, os.path.getsize(path)
+
+    def _evict_memory(self) -> None:
+        # The most recently loaded artifact is kept even if it exceeds the budget on its own.
+        while self.memory_bytes > self.max_memory_bytes and len(self._artifacts) > 1:
+            _, (_, size) = self._artifacts.popitem(last=False)
+            self.memory_bytes -= size
+
+    def _evict_disk(self) -> None:
+        mirrors = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(MIRROR_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                mirrors.append((stat.st_mtime, stat.st_size, entry.path))
+        disk_bytes = sum(size for _, size, _ in mirrors)
+        for _, size, path in sorted(mirrors)[:-1]:
+            if disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            disk_bytes -= size
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """
+    Returns the artifact cache of the process.
+
+    The cache is created on first use with the directory and budgets of the
+    `TITANIC_CACHE_DIR`, `TITANIC_CACHE_MAX_MEMORY_MB` and `TITANIC_CACHE_MAX_DISK_MB`
+    environment variables.
+
+    Returns:
+        The artifact cache shared by all callers in the process.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArtifactCache()
+        return _cache
+
+
+class ServingArtifacts:
+    """
+    The model of a model version together with the fitted artifacts that transform its inputs.
+
+    The online transformer is None if the model version was trained without one, the passengers
+    are then transformed with the other artifacts by `transform_passengers`.
+    """
+
+    def __init__(
+        self,
+        model_version_id: UUID,
+        model: Any,
+        encoders: Any,
+        age_medians: Any,
+        fare_medians: Any,
+        age_categories: Any,
+        fare_categories: Any,
+        ticket_frequency_index: Any,
+        online_transformer: Any = None,
+    ):
+        self.model_version_id = model_version_id
+        self.model = model
+        self.encoders = encoders
+        self.age_medians = age_medians
+        self.fare_medians = fare_medians
+        self.age_categories = age_categories
+        self.fare_categories = fare_categories
+        self.ticket_frequency_index = ticket_frequency_index
+        self.online_transformer = online_transformer
+        # The frequencies by ticket number, as `transform_passengers` looks them up.
+        self.ticket_frequencies = ticket_frequency_index.set_index(
+            DataFrameColumns.TICKET_NUMBER.value
+        )[DataFrameColumns.TICKET_FREQUENCY.value]
+
+
+# The attributes of `ServingArtifacts` and the names of their artifacts, without the group
+# suffix. The model and the encoders are outputs of the training pipeline, the others are pinned
+# to the model version by `link_fitted_artifacts`.
+SERVING_ARTIFACTS = {
+    "model": "xgb_model",
+    "encoders": "feature_encoders",
+    "age_medians": "age_medians",
+    "fare_medians": "fare_medians",
+    "age_categories": "age_categories",
+    "fare_categories": "fare_categories",
+    "ticket_frequency_index": "ticket_frequency_index",
+}
+# The artifacts that only some model versions have.
+OPTIONAL_SERVING_ARTIFACTS = {
+    "online_transformer": "online_transformer",
+}
+
+
+def resolve_serving_artifact_versions(
+    model_version: ModelVersionResponse, group_name: str | None = None
+) -> dict[str, ArtifactVersionResponse]:
+    """
+    Resolves the artifact versions of the model of a model version and of the artifacts that
+    transform its inputs.
+
+    Only artifacts linked to the model version are used, so a model is never served with the
+    bins, encoders or ticket frequencies of another feature engineering run.
+
+    Args:
+        model_version: The model version of `titanic_xgboost`.
+        group_name: The group suffix of the artifact names, by default the `GROUP_NAME`
+            environment variable.
+
+    Returns:
+        The artifact versions by the attribute names of `ServingArtifacts`, without the
+        optional artifacts the model version does not have.
+
+    Raises:
+        ValueError: If an artifact that is not optional is not linked to the model version.
+    """
+    group_name = group_name or os.getenv("GROUP_NAME", "Default")
+    artifact_versions = {
+        attribute: model_version.get_artifact(f"{name}_{group_name}")
+        for attribute, name in {
+            **SERVING_ARTIFACTS,
+            **OPTIONAL_SERVING_ARTIFACTS,
+        }.items()
+    }
+    missing = [
+        f"{SERVING_ARTIFACTS[attribute]}_{group_name}"
+        for attribute in SERVING_ARTIFACTS
+        if artifact_versions[attribute] is None
+    ]
+    if missing:
+        raise ValueError(
+            f"The artifacts {missing} are not linked to version '{model_version.name}' of "
+            f"model '{model_version.model.name}', train it again with `train_xgb` or "
+            f"`search_xgb` to pin the artifacts it is served with."
+        )
+    return {
+        attribute: artifact_version
+        for attribute, artifact_version in artifact_versions.items()
+        if artifact_version is not None
+    }
+
+
+def load_serving_artifacts(
+    model_version: ModelVersionResponse,
+    cache: ArtifactCache | None = None,
+    group_name: str | None = None,
+) -> ServingArtifacts:
+    """
+    Loads the model of a model version and the artifacts that transform its inputs through the
+    artifact cache.
+
+    Args:
+        model_version: The model version of `titanic_xgboost`.
+        cache: The artifact cache, by default the one of the process.
+        group_name: The group suffix of the artifact names, by default the `GROUP_NAME`
+            environment variable.
+
+    Returns:
+        The deserialised model and transform artifacts.
+
+    Raises:
+        ValueError: If an artifact that is not optional is not linked to the model version.
+    """
+    cache = cache or get_artifact_cache()
+    artifact_versions = resolve_serving_artifact_versions(model_version, group_name)
+    return ServingArtifacts(
+        model_version_id=model_version.id,
+        **{
+            attribute: cache.load(artifact_version)
+            for attribute, artifact_version in artifact_versions.items()
+        },
+    )
+
+
+class ModelVersionWatcher:
+    """
+    Serves the artifacts of the model version in a stage and hot-swaps them on a new version.
+
+    A daemon thread checks the stage every `interval` seconds. The artifacts of a new version
+    are fully loaded before they replace the current ones with a single assignment, so readers
+    of `artifacts` get either the old or the new version, never a mix of both. A failed check
+    or load is logged and keeps the current version.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "titanic_xgboost",
+        stage: str = ModelStages.PRODUCTION.value,
+        interval: float = MODEL_CHECK_INTERVAL,
+        cache: ArtifactCache | None = None,
+    ):
+        self.model_name = model_name
+        self.stage = stage
+        self.interval = interval
+        self.cache = cache or get_artifact_cache()
+        self._artifacts: ServingArtifacts | None = None
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def artifacts(self) -> ServingArtifacts:
+        """The artifacts of the current model version, loaded on first access."""
+        artifacts = self._artifacts
+        if artifacts is None:
+            self.check()
+            artifacts = self._artifacts
+        return artifacts
+
+    def check(self) -> bool:
+        """
+        Swaps in the artifacts of the model version in the stage if it changed.
+
+        Returns:
+            Whether the model version changed.
+        """
+        model_version = Client().get_model_version(self.model_name, self.stage)
+        current = self._artifacts
+        if current is not None and current.model_version_id == model_version.id:
+            return False
+        self._artifacts = load_serving_artifacts(model_version, cache=self.cache)
+        return True
+
+    def start(self) -> "ModelVersionWatcher":
+        """
+        Starts checking for new model versions in the background.
+
+        Returns:
+            The watcher, with the artifacts of the current model version loaded.
+        """
+        if self._artifacts is None:
+            self.check()
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._watch, name="model-version-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the background checks."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                if self.check():
+                    logger.info(
+                        "Swapped in version %s of model '%s'.",
+                        self._artifacts.model_version_id,
+                        self.model_name,
+                    )
+            except (KeyError, ValueError, OSError, ZenMLBaseException) as error:
+                # A missing model version or artifact and failures of the server or the
+                # artifact store keep the current version, other errors are bugs and end the
+                # watcher.
+                logger.warning(
+                    "Checking for a new version of model '%s' failed: %s",
+                    self.model_name,
+                    error,
+                )
@@ -0,0 +1,55 @@
+import math
+import os
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_CPU_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_CPU_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def available_cpus() -> int:
+    """
+    Returns the number of CPUs the process can use.
+
+    `os.cpu_count` reports the CPUs of the node, not the ones a pod is limited to. The count is
+    therefore bounded by the CPU affinity of the process and by the CPU quota of its cgroup,
+    rounded down so the threads of a pod are not throttled.
+
+    Returns:
+        The number of CPUs, at least one.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.floor(quota))
+    return max(cpus, 1)
+
+
+def cgroup_cpu_quota() -> float | None:
+    """
+    Reads the CPU quota of the cgroup of the process.
+
+    Returns:
+        The quota in CPUs, from cgroup v2 or else from cgroup v1, or None if the cgroup has no
+        quota or its files can not be read.
+    """
+    try:
+        with open(CGROUP_V2_CPU_MAX) as file:
+            quota, period = file.read().split()
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(CGROUP_V1_CPU_QUOTA) as quota_file:
+            quota = int(quota_file.read())
+        with open(CGROUP_V1_CPU_PERIOD) as period_file:
+            period = int(period_file.read())
+    except (OSError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from titanicsurvivors.utils.metrics import classification_metrics
+
+
+def to_feature_matrix(inputs: pd.DataFrame) -> tuple[np.ndarray, list[str]]:
+    """
+    Converts encoded features to a float matrix that can be shared between processes.
+
+    Categorical columns are replaced by their codes, with missing values as NaN, and marked as
+    categorical in the feature types, so XGBoost still splits on their categories.
+
+    Args:
+        inputs: The encoded features.
+
+    Returns:
+        The float32 matrix of the features and the XGBoost feature types of its columns.
+    """
+    matrix = np.empty(inputs.shape, dtype=np.float32)
+    feature_types = []
+    for position, column in enumerate(inputs.columns):
+        values = inputs[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            matrix[:, position] = np.where(codes == -1, np.nan, codes)
+            feature_types.append("c")
+        else:
+            matrix[:, position] = values.to_numpy(np.float32)
+            feature_types.append("q")
+    return matrix, feature_types
+
+
+def run_fold(
+    paths: dict[str, str],
+    feature_names: list[str],
+    feature_types: list[str],
+    train_rows: np.ndarray,
+    test_rows: np.ndarray,
+    params: dict,
+    num_boost_round: int,
+) -> dict[str, float]:
+    """
+    Trains and evaluates one fold of a cross-validation on shared arrays.
+
+    Args:
+        paths: The paths of the `inputs` and `targets` arrays, as returned by `share_arrays`.
+        feature_names: The names of the columns of the inputs.
+        feature_types: The XGBoost feature types of the columns of the inputs.
+        train_rows: The rows to train on.
+        test_rows: The rows to evaluate on.
+        params: The XGBoost parameters, including the `nthread` budget of the fold.
+        num_boost_round: The number of boosting rounds.
+
+    Returns:
+        The metrics of the fold.
+    """
+    inputs = np.load(paths["inputs"], mmap_mode="r")
+    targets = np.load(paths["targets"], mmap_mode="r")
+    # Only the `hist` tree method can train on a QuantileDMatrix.
+    if params["tree_method"] == "hist":
+        dtrain = xgb.QuantileDMatrix(
+            inputs[train_rows],
+            label=targets[train_rows],
+            feature_names=feature_names,
+            feature_types=feature_types,
+            max_bin=params["max_bin"],
+            nthread=params["nthread"],
+            enable_categorical=True,
+        )
+    else:
+        dtrain = xgb.DMatrix(
+            inputs[train_rows],
+            label=targets[train_rows],
+            feature_names=feature_names,
+            feature_types=feature_types,
+            nthread=params["nthread"],
+            enable_categorical=True,
+        )
+    dtest = xgb.DMatrix(
+        inputs[test_rows],
+        feature_names=feature_names,
+        feature_types=feature_types,
+        nthread=params["nthread"],
+        enable_categorical=True,
+    )
+    model = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+    predictions = model.predict(dtest) > 0.5
+    return classification_metrics(targets[test_rows], predictions)
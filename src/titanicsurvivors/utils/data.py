@@ -3,6 +3,7 @@ from enum import Enum
 
 class DataFrameColumns(str, Enum):
     PASSENGER_ID: str = "PassengerId"
+    PASSENGER_IDS: str = "PassengerIds"
     NAME: str = "Name"
     TICKET_CLASS: str = "Pclass"
     SEX: str = "Sex"
@@ -18,6 +19,7 @@ class DataFrameColumns(str, Enum):
     CABIN_NUMBER: str = "Cabin"
     PORT_OF_EMBARKATION: str = "Embarked"
     SURVIVED: str = "Survived"
+    SURVIVAL_PROBABILITY: str = "Survival_Probability"
     DECK: str = "Deck"
     FAMILY_SIZE: str = "Family_Size"
     FAMILY_SIZE_GROUPED: str = "Family_Size_Grouped"
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class Vocabulary:
+    """
+    The sorted categories of a feature together with a hash table from category to code.
+
+    The code of a category is its position in the sorted categories, which is the code a
+    `LabelEncoder` fitted to the same values assigns. The hash table is built once per
+    vocabulary, so encoding a batch or a single row is a lookup per value without any refitting.
+    """
+
+    def __init__(self, categories: np.ndarray):
+        self.categories = categories
+        self._lookup = pd.Index(categories)
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    @classmethod
+    def fit(cls, values: pd.Series) -> "Vocabulary":
+        return cls(np.unique(np.asarray(values)))
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        """Returns the codes of the values, -1 for values that are not in the vocabulary."""
+        return self._lookup.get_indexer(np.asarray(values))
+
+
+class FeatureEncoders:
+    """
+    The fitted vocabularies of the label encoded and of the one-hot encoded features.
+
+    The one-hot encoded features are encoded after the label encoded features, so the vocabulary
+    of a feature that is both contains the label codes.
+    """
+
+    def __init__(
+        self,
+        label_vocabularies: dict[str, Vocabulary],
+        one_hot_vocabularies: dict[str, Vocabulary],
+    ):
+        self.label_vocabularies = label_vocabularies
+        self.one_hot_vocabularies = one_hot_vocabularies
+
+    @property
+    def one_hot_columns(self) -> list[str]:
+        return [
+            f"{feature}_{category}"
+            for feature, vocabulary in self.one_hot_vocabularies.items()
+            for category in vocabulary.categories
+        ]
+
+
+class SparseFeatures:
+    """
+    A CSR feature matrix together with the names of its columns.
+
+    Zeros of the numeric columns are stored explicitly, so XGBoost reads them as values. Only the
+    zeros of the one-hot encoded columns are left out, which XGBoost treats as missing.
+    """
+
+    def __init__(self, matrix: sp.csr_matrix, feature_names: list[str]):
+        self.matrix = matrix
+        self.feature_names = feature_names
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def take(self, rows: np.ndarray) -> "SparseFeatures":
+        return SparseFeatures(self.matrix[rows], self.feature_names)
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns the values of a column as a dense array."""
+        position = self.feature_names.index(name)
+        return self.matrix[:, position].toarray().ravel()
+
+    def select(self, columns: list[str]) -> "SparseFeatures":
+        """Returns the given columns in the given order."""
+        positions = [self.feature_names.index(column) for column in columns]
+        return SparseFeatures(self.matrix[:, positions], list(columns))
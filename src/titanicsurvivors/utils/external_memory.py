@@ -0,0 +1,104 @@
+from collections.abc import Callable, Iterator
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import xgboost as xgb
+from zenml.io import fileio
+from zenml.utils import io_utils
+
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.materializers import restore_categories
+
+BATCH_SIZE = 1 << 16
+
+
+class ParquetBatchIter(xgb.DataIter):
+    """
+    Streams the rows of a Parquet file of encoded features into XGBoost in batches.
+
+    The file is read one batch at a time with `ParquetFile.iter_batches`, so only the current
+    batch is held in memory while XGBoost builds an external-memory DMatrix from it. The label
+    column is split off the batch and the remaining columns are passed in sorted order, the same
+    order as `split_data_into_subset` gives them.
+
+    Rows are assigned to the train, eval or test subset by a random draw seeded with the index of
+    their batch, so the iterators of all subsets of a file split it the same way on every pass.
+    The test subset holds `test_split` of the rows and the eval subset `eval_split` of the rest,
+    which leaves the test subset the same whatever the eval split. The batches can also be read
+    without XGBoost with `batches`, e.g. to evaluate a model on them.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        subset: Literal["train", "eval", "test"] = "train",
+        test_split: float = 0.0,
+        eval_split: float = 0.0,
+        batch_size: int = BATCH_SIZE,
+        seed: int = 0,
+        label: str = DataFrameColumns.SURVIVED.value,
+        cache_prefix: str | None = None,
+    ):
+        self.path = path
+        self.subset = subset
+        self.test_split = test_split
+        self.eval_split = eval_split
+        self.batch_size = batch_size
+        self.seed = seed
+        self.label = label
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def batches(self) -> Iterator[tuple[pd.DataFrame, pd.Series]]:
+        """Yields the features and labels of the rows of the subset, batch by batch."""
+        file = None
+        if io_utils.is_remote(self.path):
+            file = fileio.open(self.path, "rb")
+            parquet_file = pq.ParquetFile(file)
+        else:
+            parquet_file = pq.ParquetFile(self.path, memory_map=True)
+        try:
+            for batch_index, batch in enumerate(
+                parquet_file.iter_batches(batch_size=self.batch_size)
+            ):
+                rows = self._subset_rows(batch_index, batch.num_rows)
+                if not rows.any():
+                    continue
+                data = restore_categories(
+                    batch.to_pandas(), parquet_file.schema_arrow.metadata
+                )[rows]
+                label = data.pop(self.label)
+                yield data[data.columns.sort_values()], label
+        finally:
+            if file is not None:
+                file.close()
+
+    def next(self, input_data: Callable) -> bool:
+        """Passes the rows of the next batch of the subset to XGBoost."""
+        if self._batches is None:
+            self._batches = self.batches()
+        batch = next(self._batches, None)
+        if batch is None:
+            return False
+        data, label = batch
+        input_data(data=data, label=label)
+        return True
+
+    def reset(self) -> None:
+        """Rewinds the iterator to the first batch of the file."""
+        if self._batches is not None:
+            self._batches.close()
+        self._batches = None
+
+    def _subset_rows(self, batch_index: int, num_rows: int) -> np.ndarray:
+        draws = np.random.default_rng([self.seed, batch_index]).random(num_rows)
+        # The draws below `test_split` are the test rows, the following `eval_split` of the
+        # remaining range the eval rows.
+        eval_end = self.test_split + self.eval_split * (1 - self.test_split)
+        if self.subset == "test":
+            return draws < self.test_split
+        if self.subset == "eval":
+            return (draws >= self.test_split) & (draws < eval_end)
+        return draws >= eval_end
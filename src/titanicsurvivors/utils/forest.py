@@ -0,0 +1,256 @@
+import json
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from titanicsurvivors.utils.cross_validation import to_feature_matrix
+
+# The objectives whose margins are turned into probabilities by the logistic function.
+LOGISTIC_OBJECTIVES = ("binary:logistic", "reg:logistic")
+SUPPORTED_OBJECTIVES = (*LOGISTIC_OBJECTIVES, "binary:logitraw")
+# The rows that are routed through the trees at once, bounding the memory of the node matrix.
+CHUNK_SIZE = 2**14
+
+
+class CompiledForest:
+    """
+    A tree ensemble compiled into flat NumPy arrays, predicted without XGBoost.
+
+    The nodes of all trees are stored as one struct of arrays: the feature, threshold, children,
+    default direction of missing values and leaf value of every node. Children are indices into
+    the same arrays and the children of a leaf are the leaf itself, so a batch of rows descends
+    all trees at once, one level per step, with gathers over the arrays and without branching
+    per row. The rows that reached a leaf of a tree drop out of the following steps for that
+    tree, so shallow branches of deep trees cost no more than their depth. Categorical splits
+    hold the index of their row in `category_masks`, the rows whose category is in the mask go
+    right like in XGBoost.
+    """
+
+    def __init__(
+        self,
+        feature_names: list[str],
+        features: np.ndarray,
+        thresholds: np.ndarray,
+        left_children: np.ndarray,
+        right_children: np.ndarray,
+        default_left: np.ndarray,
+        leaf_values: np.ndarray,
+        category_sets: np.ndarray,
+        category_masks: np.ndarray,
+        roots: np.ndarray,
+        depth: int,
+        base_margin: float,
+        objective: str,
+    ):
+        self.feature_names = feature_names
+        self.features = features
+        self.thresholds = thresholds
+        self.left_children = left_children
+        self.right_children = right_children
+        self.default_left = default_left
+        self.leaf_values = leaf_values
+        self.category_sets = category_sets
+        self.category_masks = category_masks
+        self.roots = roots
+        self.depth = depth
+        self.base_margin = base_margin
+        self.objective = objective
+        # The left and right child of every node next to each other, indexed by
+        # `2 * node + go_right`.
+        self._children = np.column_stack([left_children, right_children]).ravel()
+        self._is_leaf = left_children == np.arange(len(left_children))
+        self._has_categories = category_masks.size > 0
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.features)
+
+    def predict(self, inputs: pd.DataFrame | np.ndarray) -> np.ndarray:
+        """
+        Predicts the rows of the inputs like `Booster.predict`.
+
+        Args:
+            inputs: The encoded features, a DataFrame with the columns of the model or a float32
+                matrix in their order with categorical features as their codes.
+
+        Returns:
+            The float32 probabilities, or margins for `binary:logitraw`.
+        """
+        margins = self.predict_margin(inputs)
+        if self.objective in LOGISTIC_OBJECTIVES:
+            return (1 / (1 + np.exp(-margins))).astype(np.float32)
+        return margins
+
+    def predict_margin(self, inputs: pd.DataFrame | np.ndarray) -> np.ndarray:
+        """
+        Predicts the untransformed margins of the rows of the inputs.
+
+        Args:
+            inputs: The encoded features, as for `predict`.
+
+        Returns:
+            The float32 margins.
+        """
+        if isinstance(inputs, pd.DataFrame):
+            inputs, _ = to_feature_matrix(inputs[self.feature_names])
+        matrix = np.asarray(inputs, dtype=np.float32)
+        margins = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), CHUNK_SIZE):
+            chunk = matrix[start : start + CHUNK_SIZE]
+            leaves = self._leaf_values(chunk)
+            # The leaf values are summed tree by tree onto the base margin, in the order and
+            # float32 precision of XGBoost.
+            margins[start : start + CHUNK_SIZE] = np.cumsum(
+                np.column_stack(
+                    [np.full(len(chunk), self.base_margin, np.float32), leaves]
+                ),
+                axis=1,
+                dtype=np.float32,
+            )[:, -1]
+        return margins
+
+    def _leaf_values(self, matrix: np.ndarray) -> np.ndarray:
+        # The (row, tree) pairs of the matrix are flattened into one array of nodes, and only
+        # the pairs that have not reached a leaf yet descend a level per step.
+        num_rows, num_features = matrix.shape
+        values = matrix.ravel()
+        nodes = np.tile(self.roots, num_rows)
+        offsets = np.repeat(
+            np.arange(num_rows, dtype=np.int64) * num_features, self.num_trees
+        )
+        has_missing = bool(np.isnan(values).any())
+        active = np.flatnonzero(~self._is_leaf[nodes])
+        while len(active):
+            current = nodes[active]
+            value = values[offsets[active] + self.features[current]]
+            # A missing value is not below any threshold, so it goes right unless the node
+            # sends missing values left.
+            go_right = ~(value < self.thresholds[current])
+            if has_missing:
+                go_right &= ~(np.isnan(value) & self.default_left[current])
+            if self._has_categories:
+                self._route_categories(current, value, go_right)
+            nodes[active] = self._children[2 * current + go_right]
+            active = active[~self._is_leaf[nodes[active]]]
+        return self.leaf_values[nodes].reshape(num_rows, self.num_trees)
+
+    def _route_categories(
+        self, current: np.ndarray, value: np.ndarray, go_right: np.ndarray
+    ) -> None:
+        positions = np.flatnonzero(self.category_sets[current] >= 0)
+        if len(positions) == 0:
+            return
+        sets = self.category_sets[current[positions]]
+        codes = value[positions]
+        missing = np.isnan(codes)
+        # Codes outside of the mask, like the -1 of unknown categories, are not in the set and
+        # go left.
+        codes = np.where(missing, -1, codes).astype(np.int64)
+        valid = (codes >= 0) & (codes < self.category_masks.shape[1])
+        in_set = valid & self.category_masks[sets, np.where(valid, codes, 0)]
+        go_right[positions] = np.where(
+            missing, ~self.default_left[current[positions]], in_set
+        )
+
+
+def compile_booster(booster: xgb.Booster) -> CompiledForest:
+    """
+    Compiles a trained booster into a `CompiledForest`.
+
+    The trees are read from the JSON model of the booster. The thresholds and leaf values are
+    kept in float32, in which XGBoost stores and compares them, so the forest routes every row
+    to the same leaves as the booster and predicts the same margins. The probabilities can
+    differ from the ones of the booster in the last bit of their float32, from the logistic
+    function of XGBoost.
+
+    Args:
+        booster: A booster of a binary objective with a single output.
+
+    Returns:
+        The compiled forest.
+
+    Raises:
+        ValueError: If the objective of the booster is not supported or it has more than one
+            output.
+    """
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    objective = learner["objective"]["name"]
+    parameters = learner["learner_model_param"]
+    if objective not in SUPPORTED_OBJECTIVES or int(parameters["num_target"]) > 1:
+        raise ValueError(
+            f"Only boosters of the objectives {SUPPORTED_OBJECTIVES} with a single output can "
+            f"be compiled, not '{objective}'."
+        )
+    trees = learner["gradient_booster"]["model"]["trees"]
+
+    features, thresholds, left_children, right_children = [], [], [], []
+    default_left, leaf_values, category_sets, category_masks = [], [], [], []
+    roots, depth, offset = [], 0, 0
+    for tree in trees:
+        left = np.array(tree["left_children"], dtype=np.int32)
+        right = np.array(tree["right_children"], dtype=np.int32)
+        conditions = np.array(tree["split_conditions"], dtype=np.float32)
+        leaves = left == -1
+        nodes = np.arange(len(left), dtype=np.int32)
+        features.append(np.where(leaves, 0, tree["split_indices"]).astype(np.int32))
+        thresholds.append(np.where(leaves, 0, conditions).astype(np.float32))
+        left_children.append(np.where(leaves, nodes, left) + offset)
+        right_children.append(np.where(leaves, nodes, right) + offset)
+        default_left.append(np.array(tree["default_left"], dtype=bool))
+        leaf_values.append(np.where(leaves, conditions, 0).astype(np.float32))
+        sets = np.full(len(left), -1, dtype=np.int32)
+        for node, start, size in zip(
+            tree["categories_nodes"],
+            tree["categories_segments"],
+            tree["categories_sizes"],
+        ):
+            sets[node] = len(category_masks)
+            category_masks.append(tree["categories"][start : start + size])
+        category_sets.append(sets)
+        roots.append(offset)
+        depth = max(depth, _tree_depth(left, right))
+        offset += len(left)
+
+    width = max((max(codes, default=-1) + 1 for codes in category_masks), default=0)
+    masks = np.zeros((len(category_masks), width), dtype=bool)
+    for position, codes in enumerate(category_masks):
+        masks[position, codes] = True
+
+    base_score = np.float32(parameters["base_score"].strip("[]"))
+    # The base score is turned into a margin in float32 arithmetic, like XGBoost does.
+    base_margin = (
+        -np.log(np.float32(1) / base_score - np.float32(1))
+        if objective in LOGISTIC_OBJECTIVES
+        else base_score
+    )
+    return CompiledForest(
+        feature_names=booster.feature_names,
+        features=np.concatenate(features),
+        thresholds=np.concatenate(thresholds),
+        left_children=np.concatenate(left_children).astype(np.int32),
+        right_children=np.concatenate(right_children).astype(np.int32),
+        default_left=np.concatenate(default_left),
+        leaf_values=np.concatenate(leaf_values),
+        category_sets=np.concatenate(category_sets),
+        category_masks=masks,
+        roots=np.array(roots, dtype=np.int32),
+        depth=depth,
+        base_margin=float(base_margin),
+        objective=objective,
+    )
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    # The number of splits on the longest path from the root to a leaf.
+    depth, level = 0, np.array([0])
+    while True:
+        level = level[left[level] != -1]
+        if len(level) == 0:
+            return depth
+        level = np.concatenate([left[level], right[level]])
+        depth += 1
@@ -1,36 +1,357 @@
 import json
 import os
 from typing import Type, ClassVar, Tuple, Any
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import scipy.sparse as sp
+from zenml import get_step_context
 from zenml.materializers.base_materializer import BaseMaterializer
 from zenml.enums import ArtifactType
+from zenml.utils import io_utils
+
+from titanicsurvivors.utils.encoding import FeatureEncoders, SparseFeatures, Vocabulary
+from titanicsurvivors.utils.forest import CompiledForest
+from titanicsurvivors.utils.online import OnlineTransformer
+
+INPUT_COLUMNS = "input_columns"
+CATEGORIES_METADATA_KEY = b"titanicsurvivors.categories"
 
 
 class CategoricalMaterializer(BaseMaterializer):
+    """
+    Stores categoricals of intervals as binary NumPy arrays.
+
+    The codes are stored in their compact integer dtype and the categories as the arrays of
+    their left and right edges. Artifacts written in the former `data.json` layout can still be
+    loaded.
+    """
+
     ASSOCIATED_TYPES: ClassVar[Tuple[Type[Any], ...]] = (pd.Categorical,)
     ASSOCIATED_ARTIFACT_TYPE: ClassVar[ArtifactType] = ArtifactType.DATA
 
     def load(self, data_type: Type[pd.Categorical]) -> pd.Categorical:
         """Read from artifact store."""
-        with self.artifact_store.open(os.path.join(self.uri, "data.json"), "r") as file:
+        json_path = os.path.join(self.uri, "data.json")
+        if self.artifact_store.exists(json_path):
+            return self._load_json(json_path)
+
+        with self.artifact_store.open(os.path.join(self.uri, "data.npz"), "rb") as file:
+            arrays = np.load(file)
+            categories = pd.IntervalIndex.from_arrays(
+                arrays["left"], arrays["right"], closed=str(arrays["closed"])
+            )
+            return pd.Categorical.from_codes(
+                codes=arrays["codes"],
+                categories=categories,
+                ordered=bool(arrays["ordered"]),
+            )
+
+    def save(self, categorical: pd.Categorical) -> None:
+        """Write to artifact store."""
+        categories = pd.IntervalIndex(categorical.categories)
+        with self.artifact_store.open(os.path.join(self.uri, "data.npz"), "wb") as file:
+            np.savez(
+                file,
+                codes=categorical.codes,
+                left=categories.left.to_numpy(),
+                right=categories.right.to_numpy(),
+                closed=np.array(categories.closed),
+                ordered=np.array(categorical.ordered),
+            )
+
+    def _load_json(self, path: str) -> pd.Categorical:
+        with self.artifact_store.open(path, "r") as file:
             cat_dict = json.load(file)
 
-        categories = [
-            pd.Interval(left, right) for left, right in cat_dict["categories"]
-        ]
+        edges = np.asarray(cat_dict["categories"], dtype=float).reshape(-1, 2)
         return pd.Categorical.from_codes(
-            codes=cat_dict["codes"], categories=categories, ordered=cat_dict["ordered"]
+            codes=cat_dict["codes"],
+            categories=pd.IntervalIndex.from_arrays(edges[:, 0], edges[:, 1]),
+            ordered=cat_dict["ordered"],
         )
 
-    def save(self, categorical: pd.Categorical) -> None:
+
+class FeatureEncodersMaterializer(BaseMaterializer):
+    """
+    Stores fitted feature encoders as binary NumPy arrays.
+
+    The vocabularies of the label encoded and of the one-hot encoded features are written to
+    `label.npz` and `one_hot.npz`, one array per feature. String categories are stored as fixed
+    width unicode arrays, so loading them does not need pickle.
+    """
+
+    ASSOCIATED_TYPES: ClassVar[Tuple[Type[Any], ...]] = (FeatureEncoders,)
+    ASSOCIATED_ARTIFACT_TYPE: ClassVar[ArtifactType] = ArtifactType.DATA
+
+    def load(self, data_type: Type[FeatureEncoders]) -> FeatureEncoders:
+        """Read from artifact store."""
+        return FeatureEncoders(
+            label_vocabularies=self._load_vocabularies("label.npz"),
+            one_hot_vocabularies=self._load_vocabularies("one_hot.npz"),
+        )
+
+    def save(self, encoders: FeatureEncoders) -> None:
+        """Write to artifact store."""
+        self._save_vocabularies("label.npz", encoders.label_vocabularies)
+        self._save_vocabularies("one_hot.npz", encoders.one_hot_vocabularies)
+
+    def _load_vocabularies(self, name: str) -> dict[str, Vocabulary]:
+        with self.artifact_store.open(os.path.join(self.uri, name), "rb") as file:
+            arrays = np.load(file)
+            return {feature: Vocabulary(arrays[feature]) for feature in arrays.files}
+
+    def _save_vocabularies(
+        self, name: str, vocabularies: dict[str, Vocabulary]
+    ) -> None:
+        with self.artifact_store.open(os.path.join(self.uri, name), "wb") as file:
+            np.savez(
+                file,
+                **{
+                    feature: vocabulary.categories.astype(str)
+                    if vocabulary.categories.dtype == object
+                    else vocabulary.categories
+                    for feature, vocabulary in vocabularies.items()
+                },
+            )
+
+
+class SparseFeaturesMaterializer(BaseMaterializer):
+    """Stores sparse feature matrices as the binary NumPy arrays of their CSR layout."""
+
+    ASSOCIATED_TYPES: ClassVar[Tuple[Type[Any], ...]] = (SparseFeatures,)
+    ASSOCIATED_ARTIFACT_TYPE: ClassVar[ArtifactType] = ArtifactType.DATA
+
+    def load(self, data_type: Type[SparseFeatures]) -> SparseFeatures:
+        """Read from artifact store."""
+        with self.artifact_store.open(os.path.join(self.uri, "data.npz"), "rb") as file:
+            arrays = np.load(file)
+            matrix = sp.csr_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]),
+                shape=tuple(arrays["shape"]),
+            )
+            return SparseFeatures(
+                matrix, feature_names=arrays["feature_names"].tolist()
+            )
+
+    def save(self, features: SparseFeatures) -> None:
+        """Write to artifact store."""
+        with self.artifact_store.open(os.path.join(self.uri, "data.npz"), "wb") as file:
+            np.savez(
+                file,
+                data=features.matrix.data,
+                indices=features.matrix.indices,
+                indptr=features.matrix.indptr,
+                shape=np.array(features.matrix.shape),
+                feature_names=np.array(features.feature_names, dtype=str),
+            )
+
+
+class OnlineTransformerMaterializer(BaseMaterializer):
+    """Stores online transformers as the JSON of the lookup tables they are built from."""
+
+    ASSOCIATED_TYPES: ClassVar[Tuple[Type[Any], ...]] = (OnlineTransformer,)
+    ASSOCIATED_ARTIFACT_TYPE: ClassVar[ArtifactType] = ArtifactType.DATA
+    TABLES: ClassVar[Tuple[str, ...]] = (
+        "feature_names",
+        "age_edges",
+        "fare_edges",
+        "age_medians",
+        "fare_medians",
+        "ticket_frequencies",
+        "categories",
+        "deck_groups",
+        "missing_deck",
+        "missing_embarked",
+        "title_pattern",
+        "title_groups",
+        "family_size_edges",
+        "family_size_groups",
+    )
+
+    def load(self, data_type: Type[OnlineTransformer]) -> OnlineTransformer:
+        """Read from artifact store."""
+        with self.artifact_store.open(os.path.join(self.uri, "data.json"), "r") as file:
+            return OnlineTransformer(**json.load(file))
+
+    def save(self, transformer: OnlineTransformer) -> None:
         """Write to artifact store."""
         with self.artifact_store.open(os.path.join(self.uri, "data.json"), "w") as file:
-            cat_dict = {
-                "codes": categorical.codes.tolist(),
-                "categories": [
-                    (interval.left, interval.right)
-                    for interval in categorical.categories
-                ],
-                "ordered": categorical.ordered,
+            json.dump({name: getattr(transformer, name) for name in self.TABLES}, file)
+
+
+class CompiledForestMaterializer(BaseMaterializer):
+    """Stores compiled forests as the binary NumPy arrays of their nodes."""
+
+    ASSOCIATED_TYPES: ClassVar[Tuple[Type[Any], ...]] = (CompiledForest,)
+    ASSOCIATED_ARTIFACT_TYPE: ClassVar[ArtifactType] = ArtifactType.MODEL
+    ARRAYS: ClassVar[Tuple[str, ...]] = (
+        "features",
+        "thresholds",
+        "left_children",
+        "right_children",
+        "default_left",
+        "leaf_values",
+        "category_sets",
+        "category_masks",
+        "roots",
+    )
+
+    def load(self, data_type: Type[CompiledForest]) -> CompiledForest:
+        """Read from artifact store."""
+        with self.artifact_store.open(os.path.join(self.uri, "data.npz"), "rb") as file:
+            arrays = np.load(file)
+            return CompiledForest(
+                feature_names=arrays["feature_names"].tolist(),
+                depth=int(arrays["depth"]),
+                base_margin=float(arrays["base_margin"]),
+                objective=str(arrays["objective"]),
+                **{name: arrays[name] for name in self.ARRAYS},
+            )
+
+    def save(self, forest: CompiledForest) -> None:
+        """Write to artifact store."""
+        with self.artifact_store.open(os.path.join(self.uri, "data.npz"), "wb") as file:
+            np.savez(
+                file,
+                feature_names=np.array(forest.feature_names, dtype=str),
+                depth=np.array(forest.depth),
+                base_margin=np.array(forest.base_margin, dtype=np.float32),
+                objective=np.array(forest.objective),
+                **{name: getattr(forest, name) for name in self.ARRAYS},
+            )
+
+
+class ArrowDataFrameMaterializer(BaseMaterializer):
+    """
+    Stores DataFrames as Parquet files with dictionary-encoded string columns.
+
+    A step can declare the columns it reads from each of its DataFrame inputs with
+    `@step(extra={INPUT_COLUMNS: {"<input name>": [...]}})`, only these columns (and the index)
+    of that input are then read from the artifact store. Artifacts on a local artifact store are
+    read memory-mapped.
+
+    Parquet keeps neither the order nor the unused categories of a categorical column, and reads
+    categoricals of numbers back as plain numbers. The categories are therefore stored in the file
+    metadata and restored on load, so the codes of a categorical survive the round trip.
+    """
+
+    ASSOCIATED_TYPES: ClassVar[Tuple[Type[Any], ...]] = (pd.DataFrame,)
+    ASSOCIATED_ARTIFACT_TYPE: ClassVar[ArtifactType] = ArtifactType.DATA
+    ROW_GROUP_SIZE: ClassVar[int] = 1 << 16
+
+    def load(self, data_type: Type[pd.DataFrame]) -> pd.DataFrame:
+        """Read the projected columns from the artifact store."""
+        path = os.path.join(self.uri, "data.parquet")
+        if io_utils.is_remote(path):
+            with self.artifact_store.open(path, "rb") as file:
+                return self._read(pq.ParquetFile(file), get_input_columns(self.uri))
+        return self._read(
+            pq.ParquetFile(path, memory_map=True), get_input_columns(self.uri)
+        )
+
+    def save(self, data: pd.DataFrame) -> None:
+        """Write to artifact store."""
+        table = pa.Table.from_pandas(data)
+        categories = {
+            str(column): {
+                "categories": data[column].cat.categories.tolist(),
+                "ordered": bool(data[column].cat.ordered),
             }
-            json.dump(cat_dict, file)
+            for column in data.columns
+            if isinstance(data[column].dtype, pd.CategoricalDtype)
+            and not isinstance(data[column].cat.categories, pd.IntervalIndex)
+        }
+        if categories:
+            table = table.replace_schema_metadata(
+                {
+                    **(table.schema.metadata or {}),
+                    CATEGORIES_METADATA_KEY: json.dumps(categories),
+                }
+            )
+        string_columns = [
+            field.name
+            for field in table.schema
+            if pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+        ]
+        with self.artifact_store.open(
+            os.path.join(self.uri, "data.parquet"), "wb"
+        ) as file:
+            pq.write_table(
+                table,
+                file,
+                row_group_size=self.ROW_GROUP_SIZE,
+                use_dictionary=string_columns or False,
+                compression="zstd",
+            )
+
+    @staticmethod
+    def _read(parquet_file: pq.ParquetFile, columns: list[str] | None) -> pd.DataFrame:
+        if columns is not None:
+            columns = [
+                column
+                for column in columns
+                if column in parquet_file.schema_arrow.names
+            ]
+        data = parquet_file.read(columns=columns, use_pandas_metadata=True).to_pandas()
+        return restore_categories(data, parquet_file.schema_arrow.metadata)
+
+
+def restore_categories(
+    data: pd.DataFrame, metadata: dict[bytes, bytes] | None
+) -> pd.DataFrame:
+    """
+    Restores the categorical columns of a DataFrame read from a Parquet file.
+
+    Args:
+        data: The DataFrame read from the Parquet file, or from a batch of its rows.
+        metadata: The schema metadata of the Parquet file.
+
+    Returns:
+        The DataFrame with the categories stored by `ArrowDataFrameMaterializer`.
+    """
+    if not metadata or CATEGORIES_METADATA_KEY not in metadata:
+        return data
+    for column, dtype in json.loads(metadata[CATEGORIES_METADATA_KEY]).items():
+        if column in data.columns:
+            # Unlike `astype`, this also reorders the categories of an unordered
+            # categorical, whose dtype compares equal in any order.
+            data[column] = pd.Categorical(
+                data[column],
+                categories=dtype["categories"],
+                ordered=dtype["ordered"],
+            )
+    return data
+
+
+def get_input_columns(uri: str) -> list[str] | None:
+    """
+    Returns the columns the running step declared for the input artifact stored at a URI.
+
+    Args:
+        uri: The URI of the input artifact that is loaded.
+
+    Returns:
+        The columns listed for the input under `INPUT_COLUMNS` in the `extra` configuration of
+        the running step, or None if no step is running or the step reads all columns of the
+        input. An artifact that is passed to several inputs is read with the columns of all of
+        them.
+    """
+    try:
+        step_context = get_step_context()
+    except RuntimeError:
+        return None
+    input_columns = step_context.step_run.config.extra.get(INPUT_COLUMNS)
+    if not input_columns:
+        return None
+    names = [
+        name
+        for name, artifact_versions in step_context.step_run.inputs.items()
+        if any(artifact_version.uri == uri for artifact_version in artifact_versions)
+    ]
+    if not names or any(name not in input_columns for name in names):
+        return None
+    return list(
+        dict.fromkeys(column for name in names for column in input_columns[name])
+    )
@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+THRESHOLD = 0.5
+SWEEP_THRESHOLDS = np.linspace(0.05, 0.95, 19)
+LOG_LOSS_EPSILON = 1e-15
+
+
+def confusion_matrix(targets: np.ndarray, predictions: np.ndarray) -> np.ndarray:
+    """
+    Counts the binary predictions by their true and predicted label.
+
+    Args:
+        targets: The true labels, 0 or 1.
+        predictions: The predicted labels, 0 or 1.
+
+    Returns:
+        The 2x2 matrix `[[tn, fp], [fn, tp]]`, as laid out by sklearn.
+    """
+    codes = 2 * np.asarray(targets, dtype=np.int64) + np.asarray(
+        predictions, dtype=np.int64
+    )
+    return np.bincount(codes.ravel(), minlength=4).reshape(2, 2)
+
+
+def metrics_from_confusion_matrix(matrix: np.ndarray) -> dict[str, float]:
+    """
+    Derives the metrics of binary predictions from their confusion matrix.
+
+    Args:
+        matrix: The confusion matrix `[[tn, fp], [fn, tp]]`.
+
+    Returns:
+        The accuracy, precision, recall and f1 score of the predictions.
+    """
+    return {
+        name: float(value)
+        for name, value in metrics_from_counts(*np.ravel(matrix)).items()
+    }
+
+
+def metrics_from_counts(
+    tn: np.ndarray, fp: np.ndarray, fn: np.ndarray, tp: np.ndarray
+) -> dict[str, np.ndarray]:
+    """
+    Derives the metrics of binary predictions from the counts of a confusion matrix.
+
+    The counts can be arrays, e.g. of the confusion matrices at several thresholds. Precision,
+    recall and f1 are 0 where they are undefined, as in sklearn.
+
+    Args:
+        tn: The number of true negatives.
+        fp: The number of false positives.
+        fn: The number of false negatives.
+        tp: The number of true positives.
+
+    Returns:
+        The accuracy, precision, recall and f1 score of the predictions.
+    """
+    tn, fp, fn, tp = (np.asarray(count, dtype=np.float64) for count in (tn, fp, fn, tp))
+    return {
+        "accuracy": _divide(tp + tn, tn + fp + fn + tp),
+        "precision": _divide(tp, tp + fp),
+        "recall": _divide(tp, tp + fn),
+        "f1": _divide(2 * tp, 2 * tp + fp + fn),
+    }
+
+
+def roc_auc(sorted_targets: np.ndarray, sorted_probabilities: np.ndarray) -> float:
+    """
+    Computes the area under the ROC curve from the rank sum of the positives.
+
+    Tied probabilities get their average rank, so a tie between a positive and a negative counts
+    as half a correctly ordered pair.
+
+    Args:
+        sorted_targets: The true labels, ordered by their probability.
+        sorted_probabilities: The predicted probabilities in ascending order.
+
+    Returns:
+        The ROC-AUC, or NaN if the labels are all of one class.
+    """
+    positives = int(sorted_targets.sum())
+    negatives = len(sorted_targets) - positives
+    if not positives or not negatives:
+        return float("nan")
+    boundaries = np.flatnonzero(np.diff(sorted_probabilities)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(sorted_probabilities)]])
+    ranks = np.repeat((starts + ends + 1) / 2, ends - starts)
+    rank_sum = ranks[sorted_targets == 1].sum()
+    return float((rank_sum - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros_like(numerator),
+        where=denominator > 0,
+    )
+
+
+def classification_metrics(
+    targets: np.ndarray, predictions: np.ndarray
+) -> dict[str, float]:
+    """
+    Computes the metrics of binary predictions.
+
+    Args:
+        targets: The true labels.
+        predictions: The predicted labels.
+
+    Returns:
+        The accuracy, precision, recall and f1 score of the predictions.
+    """
+    return metrics_from_confusion_matrix(confusion_matrix(targets, predictions))
+
+
+class BinaryClassificationEvaluator:
+    """
+    Evaluates predicted probabilities of a binary classifier chunk by chunk.
+
+    The confusion matrix at the threshold and the log-loss are accumulated with every chunk. The
+    labels and probabilities are kept as compact NumPy arrays, which are sorted once to compute
+    the ROC-AUC and the metrics of a sweep over thresholds.
+    """
+
+    def __init__(self, threshold: float = THRESHOLD):
+        self.threshold = threshold
+        self.confusion_matrix = np.zeros((2, 2), dtype=np.int64)
+        self._log_loss_sum = 0.0
+        self._targets: list[np.ndarray] = []
+        self._probabilities: list[np.ndarray] = []
+        self._sorted_chunks: tuple[np.ndarray, np.ndarray] | None = None
+
+    def update(self, targets: np.ndarray, probabilities: np.ndarray) -> None:
+        """Adds a chunk of true labels and predicted probabilities."""
+        targets = np.asarray(targets, dtype=np.int8).ravel()
+        probabilities = np.asarray(probabilities, dtype=np.float32).ravel()
+        self.confusion_matrix += confusion_matrix(
+            targets, probabilities > np.float32(self.threshold)
+        )
+        clipped = np.clip(
+            probabilities.astype(np.float64), LOG_LOSS_EPSILON, 1 - LOG_LOSS_EPSILON
+        )
+        self._log_loss_sum -= float(
+            np.sum(np.where(targets == 1, np.log(clipped), np.log1p(-clipped)))
+        )
+        self._targets.append(targets)
+        self._probabilities.append(probabilities)
+        self._sorted_chunks = None
+
+    def metrics(self) -> dict[str, float]:
+        """Returns the metrics at the threshold, the ROC-AUC and the log-loss."""
+        sorted_targets, sorted_probabilities = self._sorted()
+        return {
+            **metrics_from_confusion_matrix(self.confusion_matrix),
+            "roc_auc": roc_auc(sorted_targets, sorted_probabilities),
+            "log_loss": self._log_loss_sum / max(len(sorted_targets), 1),
+        }
+
+    def threshold_sweep(
+        self, thresholds: np.ndarray = SWEEP_THRESHOLDS
+    ) -> pd.DataFrame:
+        """
+        Returns the metrics of the predictions at each of the thresholds.
+
+        Args:
+            thresholds: The thresholds above which a probability is predicted as positive.
+
+        Returns:
+            The accuracy, precision, recall and f1 score by threshold.
+        """
+        sorted_targets, sorted_probabilities = self._sorted()
+        # The rows at or below a threshold are a prefix of the sorted probabilities. The
+        # thresholds are compared in float32, like the threshold of `update`.
+        below = np.searchsorted(
+            sorted_probabilities, np.asarray(thresholds, np.float32), side="right"
+        )
+        positives_below = np.concatenate([[0], np.cumsum(sorted_targets)])[below]
+        negatives_below = below - positives_below
+        positives = int(sorted_targets.sum())
+        negatives = len(sorted_targets) - positives
+        return pd.DataFrame(
+            metrics_from_counts(
+                tn=negatives_below,
+                fp=negatives - negatives_below,
+                fn=positives_below,
+                tp=positives - positives_below,
+            ),
+            index=pd.Index(thresholds, name="threshold"),
+        )
+
+    def _sorted(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._sorted_chunks is None:
+            targets = np.concatenate(self._targets or [np.empty(0, np.int8)])
+            probabilities = np.concatenate(
+                self._probabilities or [np.empty(0, np.float32)]
+            )
+            order = np.argsort(probabilities, kind="stable")
+            self._sorted_chunks = targets[order], probabilities[order]
+            # Keeps the merged chunks, so they are not concatenated again.
+            self._targets, self._probabilities = [targets], [probabilities]
+        return self._sorted_chunks
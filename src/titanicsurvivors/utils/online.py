@@ -0,0 +1,190 @@
+import math
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+from titanicsurvivors.utils.data import DataFrameColumns
+
+NUMERIC_FEATURES = [
+    DataFrameColumns.AGE.value,
+    DataFrameColumns.FARE.value,
+    DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value,
+    DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value,
+    DataFrameColumns.TICKET_FREQUENCY.value,
+    DataFrameColumns.IS_MARRIED.value,
+]
+
+
+class OnlineTransformer:
+    """
+    Transforms raw passengers into the feature vectors of the model with plain lookup tables.
+
+    The transformer is compiled from the fitted artifacts of the training pipeline by
+    `compile_online_transformer`: the group medians of the missing value handling, the age and
+    fare bin edges, the ticket frequency index and the positions of the categories of the encoded
+    features. A passenger is transformed with dictionary lookups and binary searches over the
+    edges, without building a DataFrame, into a float32 vector in the column order of the model.
+
+    All tables are kept in the JSON-compatible layout they are constructed from, so the
+    transformer can be stored as is by `OnlineTransformerMaterializer`.
+    """
+
+    def __init__(
+        self,
+        feature_names: list[str],
+        age_edges: list[float],
+        fare_edges: list[float],
+        age_medians: list[list],
+        fare_medians: list[list],
+        ticket_frequencies: dict[str, int],
+        categories: dict[str, list[list]],
+        deck_groups: dict[str, str],
+        missing_deck: str,
+        missing_embarked: str,
+        title_pattern: str,
+        title_groups: dict[str, str],
+        family_size_edges: list[float],
+        family_size_groups: list[str],
+    ):
+        self.feature_names = feature_names
+        self.age_edges = age_edges
+        self.fare_edges = fare_edges
+        self.age_medians = age_medians
+        self.fare_medians = fare_medians
+        self.ticket_frequencies = ticket_frequencies
+        self.categories = categories
+        self.deck_groups = deck_groups
+        self.missing_deck = missing_deck
+        self.missing_embarked = missing_embarked
+        self.title_pattern = title_pattern
+        self.title_groups = title_groups
+        self.family_size_edges = family_size_edges
+        self.family_size_groups = family_size_groups
+
+        positions = {name: position for position, name in enumerate(feature_names)}
+        self._numeric_positions = [positions[name] for name in NUMERIC_FEATURES]
+        # The medians by their group, keyed by ('Sex', 'Pclass') and ('Pclass', 'Parch',
+        # 'SibSp').
+        self._age_medians = {tuple(row[:-1]): row[-1] for row in age_medians}
+        self._fare_medians = {tuple(row[:-1]): row[-1] for row in fare_medians}
+        # The position and value of every category, columns of unknown categories keep their
+        # default: 0 for one-hot encoded and NaN for native categorical features.
+        self._categories = {
+            feature: {value: (position, code) for value, position, code in entries}
+            for feature, entries in categories.items()
+        }
+        self._defaults = np.zeros(len(feature_names), dtype=np.float32)
+        for feature in categories:
+            if feature in positions:
+                self._defaults[positions[feature]] = np.nan
+        self._title_regex = re.compile(title_pattern)
+
+    def transform(self, passenger: dict) -> np.ndarray:
+        """
+        Transforms a raw passenger into its feature vector.
+
+        Args:
+            passenger: The raw titanic columns of the passenger, missing values can be absent,
+                None or NaN.
+
+        Returns:
+            The float32 feature vector in the column order of the model.
+        """
+        vector = self._defaults.copy()
+        self._fill(vector, passenger)
+        return vector
+
+    def transform_batch(self, passengers: list[dict]) -> np.ndarray:
+        """
+        Transforms a small batch of raw passengers into a feature matrix.
+
+        Args:
+            passengers: The raw titanic columns of the passengers.
+
+        Returns:
+            The float32 feature matrix with a row per passenger.
+        """
+        matrix = np.tile(self._defaults, (len(passengers), 1))
+        for row, passenger in zip(matrix, passengers):
+            self._fill(row, passenger)
+        return matrix
+
+    def _fill(self, vector: np.ndarray, passenger: dict) -> None:
+        get = passenger.get
+        ticket_class = get(DataFrameColumns.TICKET_CLASS.value)
+        sex = get(DataFrameColumns.SEX.value)
+        # Missing counts of relatives are 0, like `fill_missing_count` fills them.
+        siblings = get(DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value)
+        if _is_missing(siblings):
+            siblings = 0
+        parents = get(DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value)
+        if _is_missing(parents):
+            parents = 0
+
+        age = get(DataFrameColumns.AGE.value)
+        if _is_missing(age):
+            age = self._age_medians.get((sex, ticket_class), math.nan)
+        fare = get(DataFrameColumns.FARE.value)
+        if _is_missing(fare):
+            fare = self._fare_medians.get((ticket_class, parents, siblings), math.nan)
+        embarked = get(DataFrameColumns.PORT_OF_EMBARKATION.value)
+        if _is_missing(embarked):
+            embarked = self.missing_embarked
+        cabin = get(DataFrameColumns.CABIN_NUMBER.value)
+        deck = (
+            self.missing_deck
+            if _is_missing(cabin)
+            else self.deck_groups.get(cabin[:1], self.missing_deck)
+        )
+        name = get(DataFrameColumns.NAME.value)
+        match = None if _is_missing(name) else self._title_regex.match(name)
+        title = match["title"] if match else None
+        family_size = siblings + parents + 1
+        group = bisect_left(self.family_size_edges, family_size)
+
+        (
+            age_position,
+            fare_position,
+            parents_position,
+            siblings_position,
+            ticket_position,
+            married_position,
+        ) = self._numeric_positions
+        vector[age_position] = _bin_code(age, self.age_edges)
+        vector[fare_position] = _bin_code(fare, self.fare_edges)
+        vector[parents_position] = parents
+        vector[siblings_position] = siblings
+        vector[ticket_position] = self.ticket_frequencies.get(
+            get(DataFrameColumns.TICKET_NUMBER.value), 1
+        )
+        vector[married_position] = title == "Mrs"
+        for feature, value in (
+            (DataFrameColumns.TICKET_CLASS.value, ticket_class),
+            (DataFrameColumns.SEX.value, sex),
+            (DataFrameColumns.DECK.value, deck),
+            (DataFrameColumns.PORT_OF_EMBARKATION.value, embarked),
+            (DataFrameColumns.TITLE.value, self.title_groups.get(title, title)),
+            (
+                DataFrameColumns.FAMILY_SIZE_GROUPED.value,
+                self.family_size_groups[group - 1]
+                if 0 < group <= len(self.family_size_groups)
+                else None,
+            ),
+        ):
+            category = self._categories[feature].get(value)
+            if category is not None:
+                vector[category[0]] = category[1]
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _bin_code(value: float, edges: list[float]) -> int:
+    # The scalar counterpart of `apply_bins`: values outside of the edges fall into the first
+    # or last bin and missing values get the code -1.
+    if math.isnan(value):
+        return -1
+    value = min(max(value, edges[0]), edges[-1])
+    return max(bisect_left(edges, value), 1) - 1
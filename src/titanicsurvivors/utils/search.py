@@ -0,0 +1,187 @@
+import itertools
+import math
+import os
+from collections.abc import Callable
+
+import numpy as np
+import xgboost as xgb
+
+SEARCH_SPACE = {
+    "max_depth": [3, 4, 6, 8],
+    "eta": [0.05, 0.1, 0.3],
+    "min_child_weight": [1, 3, 5],
+    "subsample": [0.8, 1.0],
+}
+
+# The matrices of a worker process, set by `load_shared_matrices`.
+_worker_matrices: dict = {}
+
+
+class Trial:
+    """The parameters of a training run of the search and the eval score it reached."""
+
+    def __init__(
+        self, params: dict, num_boost_round: int, score: float, best_iteration: int
+    ):
+        self.params = params
+        self.num_boost_round = num_boost_round
+        self.score = score
+        self.best_iteration = best_iteration
+
+
+def grid_configurations(space: dict[str, list]) -> list[dict]:
+    """Returns every combination of the values of the search space."""
+    return [dict(zip(space, values)) for values in itertools.product(*space.values())]
+
+
+def random_configurations(
+    space: dict[str, list], n_trials: int, seed: int = 0
+) -> list[dict]:
+    """Returns up to `n_trials` distinct combinations drawn from the search space."""
+    grid = grid_configurations(space)
+    rows = np.random.default_rng(seed).choice(
+        len(grid), size=min(n_trials, len(grid)), replace=False
+    )
+    return [grid[row] for row in rows]
+
+
+def successive_halving(
+    configurations: list[dict],
+    run_trials: Callable[[list[dict], int], list[Trial]],
+    min_rounds: int = 25,
+    max_rounds: int = 1000,
+    factor: int = 3,
+) -> list[Trial]:
+    """
+    Runs a successive halving search over the number of boosting rounds.
+
+    All configurations are trained with `min_rounds` rounds, the best `1 / factor` of them are
+    trained again with `factor` times as many rounds, and so on until one configuration is left
+    or `max_rounds` is reached.
+
+    Args:
+        configurations: The parameter sets to start the search with.
+        run_trials: Trains the given parameter sets with the given number of rounds.
+        min_rounds: The number of rounds of the first rung.
+        max_rounds: The maximum number of rounds of a rung.
+        factor: The factor by which the configurations are reduced per rung.
+
+    Returns:
+        The trials of all rungs.
+    """
+    trials = []
+    num_boost_round = min_rounds
+    while True:
+        rung = run_trials(configurations, num_boost_round)
+        trials.extend(rung)
+        if len(configurations) == 1 or num_boost_round >= max_rounds:
+            return trials
+        rung.sort(key=lambda trial: trial.score)
+        configurations = [
+            trial.params for trial in rung[: math.ceil(len(rung) / factor)]
+        ]
+        num_boost_round = min(num_boost_round * factor, max_rounds)
+
+
+def share_arrays(directory: str, **arrays: np.ndarray) -> dict[str, str]:
+    """
+    Writes arrays to `.npy` files that worker processes map into memory.
+
+    The workers read the arrays from the page cache of the files instead of receiving a pickled
+    copy with every trial.
+
+    Args:
+        directory: The directory to write the files to.
+        **arrays: The arrays by their name.
+
+    Returns:
+        The paths of the files by the name of their array.
+    """
+    paths = {}
+    for name, array in arrays.items():
+        paths[name] = os.path.join(directory, f"{name}.npy")
+        np.save(paths[name], np.ascontiguousarray(array))
+    return paths
+
+
+def load_shared_matrices(
+    paths: dict[str, str], feature_names: list[str], max_bin: int, nthread: int
+) -> dict[str, xgb.QuantileDMatrix]:
+    """
+    Builds the train and eval QuantileDMatrix of a worker from the shared arrays.
+
+    The matrices are built on the first trial of a worker process and reused by its later
+    trials on the same arrays.
+
+    Args:
+        paths: The paths of the `train_inputs`, `train_targets`, `eval_inputs` and
+            `eval_targets` arrays, as returned by `share_arrays`.
+        feature_names: The names of the columns of the inputs.
+        max_bin: The maximum number of bins per feature.
+        nthread: The number of threads to build the matrices with.
+
+    Returns:
+        The `train` and `eval` matrices.
+    """
+    key = (tuple(paths.items()), max_bin)
+    if _worker_matrices.get("key") == key:
+        return _worker_matrices
+    arrays = {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+    dtrain = xgb.QuantileDMatrix(
+        arrays["train_inputs"],
+        label=arrays["train_targets"],
+        feature_names=feature_names,
+        max_bin=max_bin,
+        nthread=nthread,
+    )
+    deval = xgb.QuantileDMatrix(
+        arrays["eval_inputs"],
+        label=arrays["eval_targets"],
+        feature_names=feature_names,
+        ref=dtrain,
+        max_bin=max_bin,
+        nthread=nthread,
+    )
+    _worker_matrices.clear()
+    _worker_matrices.update(key=key, train=dtrain, eval=deval)
+    return _worker_matrices
+
+
+def run_trial(
+    paths: dict[str, str],
+    feature_names: list[str],
+    params: dict,
+    num_boost_round: int,
+) -> Trial:
+    """
+    Trains on the shared arrays and stops early on the eval set.
+
+    Args:
+        paths: The paths of the shared arrays, as returned by `share_arrays`.
+        feature_names: The names of the columns of the inputs.
+        params: The XGBoost parameters, the last metric of `eval_metric` is the score.
+        num_boost_round: The maximum number of rounds.
+
+    Returns:
+        The trial with the best eval score, lower is better.
+    """
+    matrices = load_shared_matrices(
+        paths, feature_names, max_bin=params["max_bin"], nthread=params["nthread"]
+    )
+    evals_result = {}
+    model = xgb.train(
+        params,
+        matrices["train"],
+        num_boost_round=num_boost_round,
+        evals=[(matrices["eval"], "eval")],
+        early_stopping_rounds=10,
+        evals_result=evals_result,
+        verbose_eval=False,
+    )
+    scores = list(evals_result["eval"].values())[-1]
+    return Trial(
+        params=params,
+        num_boost_round=num_boost_round,
+        score=float(scores[model.best_iteration]),
+        best_iteration=model.best_iteration,
+    )
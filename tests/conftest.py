@@ -0,0 +1,44 @@
+import os
+from os.path import join
+
+import pandas as pd
+import pytest
+
+from titanicsurvivors.steps.data_cleaning import (
+    fit_missing_value_medians,
+    handle_missing_values,
+)
+from titanicsurvivors.steps.dataset import fit_feature_encoders
+from titanicsurvivors.steps.feature_engineering.common import engineer_features
+from titanicsurvivors.steps.feature_engineering.ticket import (
+    build_ticket_frequency_index,
+)
+
+TRAIN_DATA_PATH = join(os.path.dirname(__file__), "..", "data", "train.csv")
+
+
+class FittedArtifacts:
+    """The artifacts of the training pipeline, fitted on `data/train.csv`."""
+
+    def __init__(self, raw_data: pd.DataFrame):
+        self.raw_data = raw_data
+        self.age_medians, self.fare_medians = fit_missing_value_medians.entrypoint(
+            data=raw_data
+        )
+        self.features, self.age_categories, self.fare_categories, _ = (
+            engineer_features.entrypoint(
+                data=handle_missing_values.entrypoint(raw_data.copy())
+            )
+        )
+        self.encoders = fit_feature_encoders(data=self.features)
+        self.ticket_frequencies = build_ticket_frequency_index(data=raw_data)
+
+
+@pytest.fixture(scope="session")
+def raw_data() -> pd.DataFrame:
+    return pd.read_csv(TRAIN_DATA_PATH)
+
+
+@pytest.fixture(scope="session")
+def fitted(raw_data: pd.DataFrame) -> FittedArtifacts:
+    return FittedArtifacts(raw_data)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.utils.binning import (
+    approximate_qcut,
+    categories_to_edges,
+    quantile_edge_errors,
+)
+from titanicsurvivors.utils.data import DataFrameColumns
+
+
+def test_exact_edges_of_tied_values_have_no_rank_error(raw_data):
+    # The missing ages are filled with a few group medians, which ties many of them on edges.
+    ages = handle_missing_values.entrypoint(raw_data.copy())[DataFrameColumns.AGE.value]
+    edges = pd.qcut(ages, 10, retbins=True)[1]
+
+    errors = quantile_edge_errors(ages, edges=edges)
+
+    assert errors["rank_error"] == 0.0
+
+
+def test_misplaced_edge_is_measured(raw_data):
+    fares = raw_data[DataFrameColumns.FARE.value]
+    edges = pd.qcut(fares, 4, retbins=True)[1]
+    edges[2] = fares.quantile(0.6)
+
+    errors = quantile_edge_errors(fares, edges=edges)
+
+    lower = np.mean(fares < edges[2])
+    assert errors["rank_error"] == lower - 0.5 > 0
+
+
+def test_approximate_edges_of_tied_values_are_within_the_bound():
+    values = pd.Series(np.random.default_rng(0).integers(0, 50, 1_000_000) / 2)
+
+    binned = approximate_qcut(values, 10, duplicates="drop")
+    errors = quantile_edge_errors(values, edges=categories_to_edges(binned.cat))
+
+    assert errors["rank_error"] <= errors["rank_error_bound"]
@@ -0,0 +1,128 @@
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from titanicsurvivors.utils.cache import (
+    SERVING_ARTIFACTS,
+    ArtifactCache,
+    load_serving_artifacts,
+    resolve_serving_artifact_versions,
+)
+
+
+class ArtifactVersion:
+    # The attributes of an `ArtifactVersionResponse` that the cache uses.
+    def __init__(self, artifact):
+        self.id = uuid.uuid4()
+        self.artifact = artifact
+        self.error = None
+        self.loads = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def load(self):
+        self.loads += 1
+        self.started.set()
+        self.release.wait(timeout=10)
+        if self.error is not None:
+            raise self.error
+        return self.artifact
+
+
+def test_concurrent_loads_load_an_artifact_once(tmp_path):
+    cache = ArtifactCache(cache_dir=str(tmp_path))
+    artifact_version = ArtifactVersion({"values": list(range(100))})
+    results = []
+
+    def load():
+        results.append(cache.load(artifact_version))
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    artifact_version.started.wait(timeout=10)
+    artifact_version.release.set()
+    for thread in threads:
+        thread.join()
+    # A thread arriving after the load finished reads the artifact from memory.
+    results.append(cache.load(artifact_version))
+
+    assert artifact_version.loads == 1
+    assert cache.misses == 1 and cache.disk_hits == 0
+    assert all(result is results[0] for result in results)
+
+
+def test_a_failed_load_can_be_retried(tmp_path):
+    cache = ArtifactCache(cache_dir=str(tmp_path))
+    artifact_version = ArtifactVersion([1, 2, 3])
+    artifact_version.release.set()
+    artifact_version.error = OSError("artifact store unavailable")
+    with pytest.raises(OSError):
+        cache.load(artifact_version)
+
+    artifact_version.error = None
+    assert cache.load(artifact_version) == [1, 2, 3]
+    assert cache.load(artifact_version) is cache.load(artifact_version)
+    assert artifact_version.loads == 2
+
+
+class ModelVersion:
+    # The attributes of a `ModelVersionResponse` that the resolution of its artifacts uses.
+    def __init__(self, artifacts: dict):
+        self.id = uuid.uuid4()
+        self.name = "3"
+        self.model = SimpleNamespace(name="titanic_xgboost")
+        self.artifacts = {
+            name: ArtifactVersion(artifact) for name, artifact in artifacts.items()
+        }
+        for artifact_version in self.artifacts.values():
+            artifact_version.release.set()
+
+    def get_artifact(self, name: str):
+        return self.artifacts.get(name)
+
+
+def serving_artifacts(fitted) -> dict:
+    return {
+        "xgb_model_Default": "model",
+        "feature_encoders_Default": fitted.encoders,
+        "age_medians_Default": fitted.age_medians,
+        "fare_medians_Default": fitted.fare_medians,
+        "age_categories_Default": fitted.age_categories,
+        "fare_categories_Default": fitted.fare_categories,
+        "ticket_frequency_index_Default": fitted.ticket_frequencies.reset_index(),
+    }
+
+
+def test_artifacts_linked_to_the_model_version_are_served(fitted, tmp_path):
+    model_version = ModelVersion(serving_artifacts(fitted))
+    artifact_versions = resolve_serving_artifact_versions(
+        model_version, group_name="Default"
+    )
+    # A model version trained without an online transformer is served without one.
+    assert set(artifact_versions) == set(SERVING_ARTIFACTS)
+    assert (
+        artifact_versions["fare_medians"]
+        is model_version.artifacts["fare_medians_Default"]
+    )
+
+    artifacts = load_serving_artifacts(
+        model_version,
+        cache=ArtifactCache(cache_dir=str(tmp_path)),
+        group_name="Default",
+    )
+    assert artifacts.model_version_id == model_version.id
+    assert artifacts.online_transformer is None
+    pd.testing.assert_series_equal(
+        artifacts.ticket_frequencies, fitted.ticket_frequencies
+    )
+
+
+def test_a_missing_artifact_of_the_model_version_raises(fitted):
+    artifacts = serving_artifacts(fitted)
+    del artifacts["age_medians_Default"]
+    with pytest.raises(ValueError, match="age_medians_Default"):
+        resolve_serving_artifact_versions(ModelVersion(artifacts), group_name="Default")
@@ -0,0 +1,50 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from titanicsurvivors.steps.dataset import encode_features
+from titanicsurvivors.utils.external_memory import ParquetBatchIter
+
+ROW = "Row"
+
+
+@pytest.fixture(scope="module")
+def encoded_path(fitted, tmp_path_factory) -> str:
+    path = str(tmp_path_factory.mktemp("encoded") / "data.parquet")
+    encoded_data = encode_features(data=fitted.features, encoders=fitted.encoders)
+    # The position of every row, to tell which rows a subset streams.
+    encoded_data[ROW] = np.arange(len(encoded_data))
+    pq.write_table(pa.Table.from_pandas(encoded_data), path)
+    return path
+
+
+def subset_rows(path: str, subset: str, eval_split: float = 0.0) -> np.ndarray:
+    # Small batches, so the rows are drawn with the seeds of several batches.
+    batches = ParquetBatchIter(
+        path, subset=subset, test_split=0.2, eval_split=eval_split, batch_size=100
+    ).batches()
+    return np.concatenate(
+        [np.empty(0, dtype=np.int64)]
+        + [inputs[ROW].to_numpy() for inputs, _ in batches]
+    )
+
+
+def test_subsets_partition_the_rows(encoded_path, fitted):
+    train, eval_, test = (
+        subset_rows(encoded_path, subset, eval_split=0.2)
+        for subset in ("train", "eval", "test")
+    )
+    np.testing.assert_array_equal(
+        np.sort(np.concatenate([train, eval_, test])), np.arange(len(fitted.features))
+    )
+    assert 0.1 < len(eval_) / (len(train) + len(eval_)) < 0.3
+    assert 0.1 < len(test) / len(fitted.features) < 0.3
+
+
+def test_the_eval_split_leaves_the_test_subset_unchanged(encoded_path):
+    np.testing.assert_array_equal(
+        subset_rows(encoded_path, "test", eval_split=0.0),
+        subset_rows(encoded_path, "test", eval_split=0.2),
+    )
+    assert len(subset_rows(encoded_path, "eval", eval_split=0.0)) == 0
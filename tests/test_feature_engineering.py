@@ -0,0 +1,28 @@
+import pandas as pd
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.feature_engineering.common import engineer_features
+from titanicsurvivors.steps.feature_engineering.ticket import (
+    add_ticket_frequency_feature,
+)
+from titanicsurvivors.utils.data import DataFrameColumns
+
+
+def test_fused_step_merges_into_the_ticket_frequency_index(raw_data):
+    data = handle_missing_values.entrypoint(raw_data.copy())
+    first, second = data.iloc[:600], data.iloc[400:]
+    _, index = add_ticket_frequency_feature.entrypoint(data=first)
+
+    expected_data, expected_index = add_ticket_frequency_feature.entrypoint(
+        data=second, ticket_frequency_index=index
+    )
+    features, _, _, fused_index = engineer_features.entrypoint(
+        data=second, ticket_frequency_index=index
+    )
+
+    pd.testing.assert_frame_equal(fused_index, expected_index)
+    pd.testing.assert_series_equal(
+        features[DataFrameColumns.TICKET_FREQUENCY.value],
+        expected_data[DataFrameColumns.TICKET_FREQUENCY.value].reset_index(drop=True),
+    )
+    assert fused_index[DataFrameColumns.TICKET_FREQUENCY.value].sum() == len(data)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from titanicsurvivors.steps.dataset import encode_categorical_features, encode_features
+from titanicsurvivors.utils import forest as forest_module
+from titanicsurvivors.utils.cross_validation import to_feature_matrix
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.forest import compile_booster
+
+
+def encoded_features(
+    fitted, native_categorical: bool
+) -> tuple[pd.DataFrame, pd.Series]:
+    encode = encode_categorical_features if native_categorical else encode_features
+    inputs = encode(data=fitted.features, encoders=fitted.encoders)
+    targets = inputs.pop(DataFrameColumns.SURVIVED.value)
+    return inputs[inputs.columns.sort_values()], targets
+
+
+def with_missing_values(matrix: np.ndarray, seed: int) -> np.ndarray:
+    # Every feature misses in a tenth of the rows, so the default directions are taken.
+    matrix = matrix.copy()
+    matrix[np.random.default_rng(seed).random(matrix.shape) < 0.1] = np.nan
+    return matrix
+
+
+@pytest.mark.parametrize("native_categorical", [False, True])
+@pytest.mark.parametrize("objective", ["binary:logistic", "binary:logitraw"])
+def test_compiled_forest_predicts_like_the_booster(
+    fitted, native_categorical, objective, monkeypatch
+):
+    # Small chunks, so the rows are routed through several of them.
+    monkeypatch.setattr(forest_module, "CHUNK_SIZE", 500)
+    inputs, targets = encoded_features(fitted, native_categorical)
+    matrix, feature_types = to_feature_matrix(inputs)
+    # Deep trees on training rows with missing values, so the splits learn default directions
+    # and the paths are far longer than the levels of the shallow branches.
+    booster = xgb.train(
+        {
+            "max_depth": 50,
+            "eta": 0.1,
+            "objective": objective,
+            "max_cat_to_onehot": 1,
+            "seed": 0,
+        },
+        xgb.DMatrix(
+            with_missing_values(matrix, seed=0),
+            label=targets,
+            feature_names=list(inputs.columns),
+            feature_types=feature_types,
+            enable_categorical=True,
+        ),
+        num_boost_round=30,
+    )
+    forest = compile_booster(booster)
+    assert forest.depth > 10
+    assert (forest.category_masks.size > 0) == native_categorical
+
+    # The rows include missing values the booster was not trained on and unknown categories.
+    rows = np.concatenate([matrix, with_missing_values(matrix, seed=1)])
+    if native_categorical:
+        categorical = [
+            position for position, kind in enumerate(feature_types) if kind == "c"
+        ]
+        rows[: len(matrix) // 10, categorical] = -1
+    np.testing.assert_array_equal(
+        forest.predict_margin(rows),
+        booster.inplace_predict(rows, validate_features=False, predict_type="margin"),
+    )
+    np.testing.assert_allclose(
+        forest.predict(rows),
+        booster.inplace_predict(rows, validate_features=False),
+        rtol=0,
+        atol=1.2e-7,
+    )
+    # A DataFrame is predicted by the columns of the model, in any order.
+    np.testing.assert_array_equal(
+        forest.predict_margin(inputs[inputs.columns[::-1]]),
+        booster.predict(
+            xgb.DMatrix(inputs, enable_categorical=True), output_margin=True
+        ),
+    )
+
+
+def test_compiling_a_multi_class_booster_raises(fitted):
+    inputs, targets = encoded_features(fitted, native_categorical=False)
+    booster = xgb.train(
+        {"objective": "multi:softprob", "num_class": 2},
+        xgb.DMatrix(inputs, label=targets),
+        num_boost_round=2,
+    )
+    with pytest.raises(ValueError, match="multi:softprob"):
+        compile_booster(booster)
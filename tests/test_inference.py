@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+import xgboost as xgb
+
+from titanicsurvivors.steps.data_cleaning import handle_missing_values
+from titanicsurvivors.steps.feature_engineering.online import build_online_transformer
+from titanicsurvivors.steps.inference import (
+    PassengerScorer,
+    score_passenger_batches,
+    transform_passengers,
+)
+from titanicsurvivors.utils.data import DataFrameColumns
+
+
+def transform(fitted, data: pd.DataFrame, native_categorical: bool = False):
+    return transform_passengers(
+        data=data.copy(),
+        encoders=fitted.encoders,
+        age_medians=fitted.age_medians,
+        fare_medians=fitted.fare_medians,
+        age_categories=fitted.age_categories,
+        fare_categories=fitted.fare_categories,
+        ticket_frequencies=fitted.ticket_frequencies,
+        native_categorical=native_categorical,
+    )
+
+
+def test_missing_values_are_filled_with_the_fitted_medians(fitted, raw_data):
+    data = raw_data.assign(**{DataFrameColumns.FARE.value: np.nan}).head(20)
+    data.loc[:, DataFrameColumns.AGE.value] = np.nan
+
+    filled = handle_missing_values.entrypoint(
+        data.copy(), age_medians=fitted.age_medians, fare_medians=fitted.fare_medians
+    )
+
+    expected_ages = data.merge(
+        fitted.age_medians,
+        how="left",
+        on=[DataFrameColumns.SEX.value, DataFrameColumns.TICKET_CLASS.value],
+        suffixes=("_raw", ""),
+    )[DataFrameColumns.AGE.value]
+    np.testing.assert_array_equal(
+        filled[DataFrameColumns.AGE.value].to_numpy(), expected_ages.to_numpy()
+    )
+    assert filled[DataFrameColumns.FARE.value].notna().all()
+
+
+@pytest.mark.parametrize("native_categorical", [False, True])
+def test_single_rows_with_missing_age_are_scored_like_the_batch(
+    fitted, raw_data, native_categorical
+):
+    missing_age = raw_data[raw_data[DataFrameColumns.AGE.value].isna()].head(25)
+    assert len(missing_age) == 25
+
+    batch = transform(fitted, raw_data, native_categorical)
+    for index in missing_age.index:
+        row = transform(fitted, raw_data.loc[[index]], native_categorical)
+        pd.testing.assert_frame_equal(row, batch.loc[[index], row.columns])
+
+
+def test_single_rows_with_missing_age_match_the_online_transformer(fitted, raw_data):
+    transformer = build_online_transformer(
+        age_medians=fitted.age_medians,
+        fare_medians=fitted.fare_medians,
+        age_categories=fitted.age_categories,
+        fare_categories=fitted.fare_categories,
+        ticket_frequencies=fitted.ticket_frequencies,
+        encoders=fitted.encoders,
+    )
+    missing_age = raw_data[raw_data[DataFrameColumns.AGE.value].isna()].head(25)
+
+    for index, passenger in missing_age.iterrows():
+        row = transform(fitted, raw_data.loc[[index]])
+        np.testing.assert_array_equal(
+            transformer.transform(passenger.to_dict()),
+            row[transformer.feature_names].to_numpy(dtype=np.float32)[0],
+        )
+
+
+def test_batches_scored_by_workers_match_the_whole_file(fitted, raw_data, tmp_path):
+    inputs = transform(fitted, raw_data)
+    model = xgb.train(
+        {"max_depth": 4},
+        xgb.DMatrix(
+            inputs.drop(columns=DataFrameColumns.SURVIVED.value).sort_index(axis=1),
+            label=raw_data[DataFrameColumns.SURVIVED.value],
+        ),
+        num_boost_round=10,
+    )
+    model_path = str(tmp_path / "model.ubj")
+    model.save_model(model_path)
+    scorer = PassengerScorer(
+        model_path=model_path,
+        encoders=fitted.encoders,
+        age_medians=fitted.age_medians,
+        fare_medians=fitted.fare_medians,
+        age_categories=fitted.age_categories,
+        fare_categories=fitted.fare_categories,
+        ticket_frequencies=fitted.ticket_frequencies,
+    )
+    output_path = tmp_path / "predictions"
+    output_path.mkdir()
+    batches = pa.Table.from_pandas(raw_data).to_batches(max_chunksize=100)
+
+    rows, _, parts = score_passenger_batches(
+        scorer=scorer, batches=batches, output_path=str(output_path), n_workers=2
+    )
+
+    assert (rows, parts) == (len(raw_data), len(batches))
+    predictions = pd.read_parquet(output_path).sort_values(
+        DataFrameColumns.PASSENGER_ID.value
+    )
+    np.testing.assert_array_equal(
+        predictions[DataFrameColumns.SURVIVAL_PROBABILITY.value],
+        model.predict(xgb.DMatrix(inputs[model.feature_names])),
+    )
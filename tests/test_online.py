@@ -0,0 +1,157 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from titanicsurvivors.steps.feature_engineering.online import build_online_transformer
+from titanicsurvivors.steps.inference import transform_passengers
+from titanicsurvivors.utils.data import DataFrameColumns
+from titanicsurvivors.utils.materializers import OnlineTransformerMaterializer
+from titanicsurvivors.utils.online import OnlineTransformer
+
+
+def online_transformer(fitted, native_categorical: bool) -> OnlineTransformer:
+    transformer = build_online_transformer(
+        age_medians=fitted.age_medians,
+        fare_medians=fitted.fare_medians,
+        age_categories=fitted.age_categories,
+        fare_categories=fitted.fare_categories,
+        ticket_frequencies=fitted.ticket_frequencies,
+        encoders=fitted.encoders,
+        native_categorical=native_categorical,
+    )
+    # The transformer is served after a round trip through the JSON of its materializer.
+    tables = {
+        name: getattr(transformer, name)
+        for name in OnlineTransformerMaterializer.TABLES
+    }
+    return OnlineTransformer(**json.loads(json.dumps(tables)))
+
+
+def offline_matrix(
+    fitted, data: pd.DataFrame, feature_names: list[str], native_categorical: bool
+) -> np.ndarray:
+    inputs = transform_passengers(
+        data=data.copy(),
+        encoders=fitted.encoders,
+        age_medians=fitted.age_medians,
+        fare_medians=fitted.fare_medians,
+        age_categories=fitted.age_categories,
+        fare_categories=fitted.fare_categories,
+        ticket_frequencies=fitted.ticket_frequencies,
+        native_categorical=native_categorical,
+    )[feature_names]
+    # Native categorical features reach the model as their codes, unknown ones as NaN.
+    for column in inputs.columns:
+        if isinstance(inputs[column].dtype, pd.CategoricalDtype):
+            inputs[column] = inputs[column].cat.codes.replace(-1, np.nan)
+    return inputs.to_numpy(dtype=np.float32)
+
+
+def assert_rows_match(fitted, data: pd.DataFrame, native_categorical: bool) -> None:
+    transformer = online_transformer(fitted, native_categorical)
+    passengers = data.to_dict("records")
+    np.testing.assert_array_equal(
+        transformer.transform_batch(passengers),
+        offline_matrix(fitted, data, transformer.feature_names, native_categorical),
+    )
+    # Every passenger on its own, like a request of the online service.
+    for index, passenger in zip(data.index, passengers):
+        np.testing.assert_array_equal(
+            transformer.transform(passenger),
+            offline_matrix(
+                fitted,
+                data.loc[[index]],
+                transformer.feature_names,
+                native_categorical,
+            )[0],
+        )
+
+
+@pytest.mark.parametrize("native_categorical", [False, True])
+def test_training_passengers_match_the_offline_path(
+    fitted, raw_data, native_categorical
+):
+    transformer = online_transformer(fitted, native_categorical)
+    np.testing.assert_array_equal(
+        transformer.transform_batch(raw_data.to_dict("records")),
+        offline_matrix(fitted, raw_data, transformer.feature_names, native_categorical),
+    )
+
+
+@pytest.mark.parametrize("native_categorical", [False, True])
+def test_single_passengers_with_missing_age_and_fare(
+    fitted, raw_data, native_categorical
+):
+    data = raw_data.sample(20, random_state=0).assign(
+        **{DataFrameColumns.AGE.value: np.nan, DataFrameColumns.FARE.value: np.nan}
+    )
+    assert_rows_match(fitted, data, native_categorical)
+
+
+@pytest.mark.parametrize("native_categorical", [False, True])
+def test_passengers_with_missing_relatives(fitted, raw_data, native_categorical):
+    data = raw_data.head(4).copy()
+    data[DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value] = [np.nan, 1, np.nan, 0]
+    data[DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value] = [0, np.nan, np.nan, 2]
+    # The fares are filled with the medians of the groups of the filled counts.
+    data[DataFrameColumns.FARE.value] = np.nan
+    assert_rows_match(fitted, data, native_categorical)
+
+    # Counts that are absent or None are missing too.
+    transformer = online_transformer(fitted, native_categorical)
+    passenger = data.iloc[2].to_dict()
+    del passenger[DataFrameColumns.NUM_OF_SIBLINGS_OR_SPOUSES.value]
+    passenger[DataFrameColumns.NUM_OF_PARENTS_OR_CHILDREN.value] = None
+    np.testing.assert_array_equal(
+        transformer.transform(passenger), transformer.transform(data.iloc[2].to_dict())
+    )
+
+
+@pytest.mark.parametrize("native_categorical", [False, True])
+def test_unseen_tickets_count_their_passenger_only(
+    fitted, raw_data, native_categorical
+):
+    data = raw_data.head(10).assign(
+        **{
+            DataFrameColumns.TICKET_NUMBER.value: [
+                f"UNSEEN {number}" for number in range(10)
+            ]
+        }
+    )
+    assert_rows_match(fitted, data, native_categorical)
+
+    transformer = online_transformer(fitted, native_categorical)
+    position = transformer.feature_names.index(DataFrameColumns.TICKET_FREQUENCY.value)
+    assert (
+        transformer.transform_batch(data.to_dict("records"))[:, position] == 1
+    ).all()
+
+
+@pytest.mark.parametrize("native_categorical", [False, True])
+def test_unseen_titles_and_unknown_categories(fitted, raw_data, native_categorical):
+    data = raw_data.head(6).copy()
+    data[DataFrameColumns.NAME.value] = [
+        "Doe, Sir. John",
+        "Doe, Admiral. John",
+        "Doe John",
+        "Doe, Mrs. Jane",
+        "Doe, Lady. Jane",
+        "Doe, Countess. Jane",
+    ]
+    data[DataFrameColumns.PORT_OF_EMBARKATION.value] = ["X", "S", np.nan, "Q", "C", "X"]
+    data[DataFrameColumns.CABIN_NUMBER.value] = ["Z12", np.nan, "T", "A1", "", "G6"]
+    assert_rows_match(fitted, data, native_categorical)
+
+
+@pytest.mark.parametrize("native_categorical", [False, True])
+def test_unknown_classes_and_sexes_without_medians(
+    fitted, raw_data, native_categorical
+):
+    data = raw_data.head(4).copy()
+    data[DataFrameColumns.TICKET_CLASS.value] = [4, 1, 4, 2]
+    data[DataFrameColumns.SEX.value] = ["male", "unknown", "female", "unknown"]
+    data[DataFrameColumns.AGE.value] = [np.nan, np.nan, 30.0, np.nan]
+    data[DataFrameColumns.FARE.value] = [np.nan, 10.0, np.nan, 20.0]
+    assert_rows_match(fitted, data, native_categorical)
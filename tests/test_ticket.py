@@ -0,0 +1,65 @@
+import pandas as pd
+import pyarrow as pa
+
+from titanicsurvivors.steps.feature_engineering.ticket import (
+    add_ticket_frequency,
+    build_ticket_passenger_index,
+    lookup_ticket_frequency,
+    update_ticket_frequency_index,
+)
+from titanicsurvivors.utils.data import DataFrameColumns
+
+
+def round_trip(index: pd.DataFrame) -> pd.DataFrame:
+    # The index is stored as a Parquet table between pipeline runs.
+    return (
+        pa.Table.from_pandas(index.reset_index())
+        .to_pandas()
+        .set_index(DataFrameColumns.TICKET_NUMBER.value)
+    )
+
+
+def frequencies(index: pd.DataFrame, data: pd.DataFrame) -> pd.Series:
+    return lookup_ticket_frequency(
+        index=index[DataFrameColumns.TICKET_FREQUENCY.value], data=data
+    )
+
+
+def test_incremental_index_matches_the_full_recomputation(raw_data):
+    batches = [
+        raw_data.iloc[start : start + 250] for start in range(0, len(raw_data), 250)
+    ]
+    index = build_ticket_passenger_index(data=batches[0])
+    for batch in batches[1:]:
+        index = update_ticket_frequency_index(index=round_trip(index), data=batch)
+
+    pd.testing.assert_series_equal(
+        frequencies(index, raw_data), add_ticket_frequency(data=raw_data)
+    )
+
+
+def test_merging_a_batch_again_leaves_the_index_unchanged(raw_data):
+    first, second = raw_data.iloc[:500], raw_data.iloc[500:]
+    index = update_ticket_frequency_index(
+        index=build_ticket_passenger_index(data=first), data=second
+    )
+
+    merged_again = update_ticket_frequency_index(index=round_trip(index), data=second)
+    overlapping = update_ticket_frequency_index(
+        index=merged_again, data=raw_data.iloc[400:600]
+    )
+
+    for updated in (merged_again, overlapping):
+        pd.testing.assert_series_equal(
+            frequencies(updated, raw_data), add_ticket_frequency(data=raw_data)
+        )
+
+
+def test_passengers_are_counted_once_within_a_batch(raw_data):
+    data = pd.concat([raw_data, raw_data.iloc[:10]])
+
+    index = build_ticket_passenger_index(data=data)
+
+    pd.testing.assert_series_equal(
+        frequencies(index, raw_data), add_ticket_frequency(data=raw_data)
+    )